@@ -0,0 +1,193 @@
+"""
+Per-file Analysis Module
+Reads every source file exactly once and turns it into a single record
+that both /upload and /upload-analyze consume
+"""
+
+import os
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from . import scanner
+from .utils import list_zip_members, read_zip_bytes
+from .function_extractor import extract_functions_and_classes_from_lines
+from .symbol_index import extract_call_sites
+
+# Parallel scanning (opt-in): 0 or 1 worker = scan serially in-process
+SCAN_WORKERS = int(os.environ.get('LEGACYMAP_SCAN_WORKERS', '0'))
+# Files per task sent to a worker process
+SCAN_CHUNK_SIZE = int(os.environ.get('LEGACYMAP_SCAN_CHUNK_SIZE', '64'))
+# Workers never fork the (multi-threaded) server: a fork could copy a lock
+# another thread holds (SQLite, job and store locks) and deadlock the child
+POOL_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def analyze_bytes(rel_path, data, functions=True):
+    """
+    Analyze one source file from its raw bytes
+    functions=False skips function-level data (definitions and call sites)
+    Returns: dict with path, loc, imports_raw, functions_classes, call_sites, sha256, bytes
+    """
+    text = scanner.decode_source(data)
+    lines = scanner.split_text_lines(text)
+    language = scanner.language_for(rel_path)
+    return {
+        'path': rel_path,
+        'loc': scanner.count_loc(lines),
+        'imports_raw': scanner.extract_imports_from_text(text, language),
+        'functions_classes': extract_functions_and_classes_from_lines(lines, language) if functions else [],
+        'call_sites': extract_call_sites(lines) if functions else [],
+        'sha256': hashlib.sha256(data).hexdigest(),
+        'bytes': len(data),
+    }
+
+
+# Directory names skipped while walking a tree (never hold source files)
+VCS_DIRS = {'.git', '.hg', '.svn'}
+
+
+def list_directory_sources(repo_root):
+    """
+    Find source files under an extracted repo
+    Returns: List of (rel_path, full_path)
+    """
+    sources = []
+    for root, dirs, files in os.walk(repo_root):
+        # Don't descend into VCS metadata of local checkouts
+        dirs[:] = [d for d in dirs if d not in VCS_DIRS]
+        for fname in files:
+            if scanner.is_source_file(fname):
+                full = os.path.join(root, fname)
+                sources.append((os.path.relpath(full, repo_root), full))
+    return sources
+
+
+def list_archive_sources(z):
+    """
+    Find source members in an open ZIP
+    Returns: List of (rel_path, member_name)
+    """
+    return [(rel, member) for member, rel in list_zip_members(z) if scanner.is_source_file(rel)]
+
+
+def scan_directory(repo_root, functions=True, workers=None, chunk_size=None):
+    """Analyze every source file of an extracted repo, one read per file"""
+    sources = list_directory_sources(repo_root)
+    return _run_chunked(_analyze_paths_chunk, sources, functions, workers, chunk_size)
+
+
+def scan_archive(z, functions=True, workers=None, chunk_size=None):
+    """Analyze every source member of an open ZIP without extracting it"""
+    sources = list_archive_sources(z)
+    if _effective_workers(workers) <= 1:
+        # Serial: read each member lazily, no need to hold every blob at once
+        return [analyze_bytes(rel, read_zip_bytes(z, member), functions) for rel, member in sources]
+    # Workers can't share the ZipFile handle, so ship them the member bytes
+    blobs = [(rel, read_zip_bytes(z, member)) for rel, member in sources]
+    return _run_chunked(_analyze_blobs_chunk, blobs, functions, workers, chunk_size)
+
+
+def scan_archive_incremental(z, previous, workers=None, chunk_size=None):
+    """
+    Like scan_archive, but reuse records from an earlier scan for every file
+    whose content hash is already known (same path or moved) and only
+    analyze new/changed content
+    previous: records from the earlier scan
+    Returns: (records, changes) - changes has added/changed/removed path lists
+             and the number of reused records
+    """
+    by_hash = {rec['sha256']: rec for rec in previous}
+    old_hashes = {rec['path']: rec['sha256'] for rec in previous}
+    
+    records = []
+    todo = []  # (position in records, rel_path, bytes) still to analyze
+    changes = {'added': [], 'changed': [], 'removed': [], 'reused': 0}
+    
+    for rel, member in list_archive_sources(z):
+        data = read_zip_bytes(z, member)
+        digest = hashlib.sha256(data).hexdigest()
+        
+        if rel not in old_hashes:
+            changes['added'].append(rel)
+        elif old_hashes[rel] != digest:
+            changes['changed'].append(rel)
+        
+        hit = by_hash.get(digest)
+        if hit is not None:
+            records.append(dict(hit, path=rel))
+            changes['reused'] += 1
+        else:
+            records.append(None)
+            todo.append((len(records) - 1, rel, data))
+    
+    fresh = _run_chunked(_analyze_blobs_chunk, [(rel, data) for _, rel, data in todo], True, workers, chunk_size)
+    for (pos, _, _), rec in zip(todo, fresh):
+        records[pos] = rec
+    
+    new_paths = {rec['path'] for rec in records}
+    changes['removed'] = [path for path in old_hashes if path not in new_paths]
+    return records, changes
+
+
+def shutdown_pool():
+    """Stop the scan worker processes (called on app shutdown)"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+        _pool_workers = 0
+
+
+# ============================================================================
+# PROCESS POOL HELPERS
+# ============================================================================
+
+def _analyze_paths_chunk(chunk, functions):
+    # Runs in a worker: (rel_path, full_path) -> record
+    return [analyze_bytes(rel, scanner.read_file_bytes(full), functions) for rel, full in chunk]
+
+
+def _analyze_blobs_chunk(chunk, functions):
+    # Runs in a worker: (rel_path, bytes) -> record
+    return [analyze_bytes(rel, data, functions) for rel, data in chunk]
+
+
+def _effective_workers(workers):
+    return SCAN_WORKERS if workers is None else workers
+
+
+def _get_pool(workers):
+    # One long-lived pool per process; rebuilt only if the worker count changes
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers,
+                                        mp_context=multiprocessing.get_context(POOL_START_METHOD))
+            _pool_workers = workers
+        return _pool
+
+
+def _run_chunked(fn, items, functions, workers, chunk_size):
+    """
+    Run fn over items, sharded across the process pool when enabled
+    Returns: records in the same order as items, so results match a serial scan
+    """
+    workers = _effective_workers(workers)
+    chunk_size = max(1, chunk_size or SCAN_CHUNK_SIZE)
+    if workers <= 1 or len(items) <= chunk_size:
+        return fn(items, functions)
+
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    records = []
+    for part in _get_pool(workers).map(fn, chunks, [functions] * len(chunks)):
+        records.extend(part)
+    return records
@@ -0,0 +1,199 @@
+"""
+Call Graph Module
+Repo-wide function-level call graph built once per upload from the extracted
+definitions and call sites: caller -> callee edges, fan-in / fan-out per
+function and cycles of mutually recursive functions
+"""
+
+import re
+from array import array
+
+from .graph import DependencyGraph
+
+# Receivers that mean "a method of the caller's own class"
+SELF_RECEIVERS = {'this', 'self', 'cls'}
+TRAILING_NAME = re.compile(r'(\w*)\s*$')
+
+
+def build_call_graph(records, file_edges):
+    """
+    records: per-file scan records (functions_classes with line spans, call_sites)
+    file_edges: resolved file-level imports [{'source', 'target'}, ...]
+
+    A call site belongs to the innermost function whose span contains it.
+    A plain call name( resolves to functions/methods of that name in the same
+    file, else in files the caller's file imports, else to the only definition
+    of that name in the repo. this.name( / self.name( stays in the same file;
+    obj.name( looks in imported files, then other functions of the same file.
+    Anything else (builtins, ambiguous names, calls outside any function) is
+    counted as unresolved.
+
+    Returns: {
+        'graph': DependencyGraph over function ids (edge A -> B: A calls B),
+        'functions': [{'id', 'key', 'file', 'name', 'qualname', 'type',
+                       'line_start', 'line_end', 'fan_in', 'fan_out', 'cycle'}, ...],
+        'calls': [{'source', 'target', 'line', 'count'}, ...],
+        'cycles': [[function key, ...], ...],
+        'unresolved_calls': int
+    }
+    """
+    functions = []
+    by_file = {}      # path -> function ids, in line order
+    by_name = {}      # name -> {file: function ids}
+    headers = set()   # (path, line, name) of every definition line
+    keys = set()
+
+    for rec in records:
+        path = rec['path']
+        for item in rec['functions_classes']:
+            headers.add((path, item['line_start'], item['name']))
+            if item['type'] == 'class':
+                continue
+            qualname = _qualname(item)
+            key = f"{path}::{qualname}"
+            if key in keys:
+                # Redefinition (or overload) of the same name: keep both
+                key = f"{key}@{item['line_start']}"
+            keys.add(key)
+            fid = len(functions)
+            functions.append({
+                'id': fid,
+                'key': key,
+                'file': path,
+                'name': item['name'],
+                'qualname': qualname,
+                'type': item['type'],
+                'line_start': item['line_start'],
+                'line_end': item.get('line_end') or item['line_start'],
+                'fan_in': 0,
+                'fan_out': 0,
+                'cycle': None,
+            })
+            by_file.setdefault(path, []).append(fid)
+            by_name.setdefault(item['name'], {}).setdefault(path, []).append(fid)
+
+    imports_of = {}
+    for edge in file_edges:
+        imports_of.setdefault(edge['source'], []).append(edge['target'])
+
+    calls = {}  # (caller, callee) -> [first line, count]
+    unresolved = 0
+    for rec in records:
+        path = rec['path']
+        own = by_file.get(path)
+        if not own:
+            continue
+        imported = imports_of.get(path, ())
+        sites = rec.get('call_sites', [])
+        for (name, line, code), caller in zip(sites, _enclosing(functions, own, sites)):
+            if (path, line, name) in headers:
+                continue
+            callees = _resolve(by_name.get(name), path, imported, caller, _receiver(code, name))
+            if caller is None or not callees:
+                unresolved += 1
+                continue
+            for callee in callees:
+                pair = (caller, callee)
+                if pair in calls:
+                    calls[pair][1] += 1
+                else:
+                    calls[pair] = [line, 1]
+
+    src = array('i', (a for a, _ in calls))
+    dst = array('i', (b for _, b in calls))
+    graph = DependencyGraph([f['key'] for f in functions], src, dst)
+
+    for fid, func in enumerate(functions):
+        func['fan_out'] = graph.out_degree(fid)
+        func['fan_in'] = graph.in_degree(fid)
+
+    cycles = []
+    for comp in graph.strongly_connected_components():
+        if len(comp) == 1 and comp[0] not in graph.successors(comp[0]):
+            continue
+        comp.sort()
+        for fid in comp:
+            functions[fid]['cycle'] = len(cycles)
+        cycles.append([functions[fid]['key'] for fid in comp])
+
+    return {
+        'graph': graph,
+        'functions': functions,
+        'calls': [
+            {'source': functions[a]['key'], 'target': functions[b]['key'], 'line': line, 'count': count}
+            for (a, b), (line, count) in calls.items()
+        ],
+        'cycles': cycles,
+        'unresolved_calls': unresolved,
+    }
+
+
+def _qualname(item):
+    # AST items carry the full enclosing path; regex items only the class
+    parent = item.get('parent') or item.get('parent_class')
+    return f"{parent}.{item['name']}" if parent else item['name']
+
+
+def _enclosing(functions, own, sites):
+    """
+    Innermost function of one file containing each call site, in one sweep
+    (sites and definitions are both in line order; spans nest)
+    Yields: function id or None per site
+    """
+    stack = []
+    j = 0
+    for _, line, _ in sites:
+        while j < len(own) and functions[own[j]]['line_start'] <= line:
+            start = functions[own[j]]['line_start']
+            while stack and functions[stack[-1]]['line_end'] < start:
+                stack.pop()
+            stack.append(own[j])
+            j += 1
+        while stack and functions[stack[-1]]['line_end'] < line:
+            stack.pop()
+        yield stack[-1] if stack else None
+
+
+def _receiver(code, name):
+    """
+    What a call is made on: None for a plain name(, the identifier before the
+    dot for obj.name( ('' when it isn't one, e.g. f().name( )
+    """
+    pos = 0
+    while True:
+        idx = code.find(name, pos)
+        if idx == -1:
+            return None
+        pos = idx + len(name)
+        if idx and (code[idx - 1].isalnum() or code[idx - 1] == '_'):
+            continue
+        rest = code[pos:].lstrip()
+        if rest.startswith('('):
+            break
+    before = code[:idx].rstrip()
+    if not before.endswith('.'):
+        return None
+    return TRAILING_NAME.search(before[:-1]).group(1)
+
+
+def _resolve(files, path, imported, caller, receiver):
+    # files: {file: function ids} for the called name; looked up per file, so
+    # a name defined in thousands of files costs no more than a rare one
+    if not files:
+        return ()
+    same_file = files.get(path, ())
+    if receiver in SELF_RECEIVERS:
+        return same_file
+    via_import = [fid for target in imported for fid in files.get(target, ())]
+    if receiver is not None:
+        # obj.name( is rarely the caller itself (emailService.send( inside send)
+        return via_import or [fid for fid in same_file if fid != caller]
+    if same_file:
+        return same_file
+    if via_import:
+        return via_import
+    if len(files) == 1:
+        only, = files.values()
+        if len(only) == 1:
+            return only
+    return ()
@@ -0,0 +1,55 @@
+"""
+Command-line batch mode
+Runs the /upload analysis on directories already on disk, without a server:
+
+    python -m app.cli PATH [PATH ...] [--out-dir DIR]
+
+One path and no --out-dir prints the JSON result; with --out-dir each repo
+is written to DIR/<directory name>.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+
+with contextlib.redirect_stdout(sys.stderr):
+    # main.py announces itself on import; keep stdout for the JSON result
+    from .main import analyze_directory
+from .analysis import shutdown_pool
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m app.cli', description='Analyze local source directories')
+    parser.add_argument('paths', nargs='+', help='directories to analyze')
+    parser.add_argument('--out-dir', help='write <name>.json per directory instead of printing')
+    args = parser.parse_args(argv)
+
+    if args.out_dir is None and len(args.paths) > 1:
+        parser.error('--out-dir is required with more than one path')
+
+    try:
+        for path in args.paths:
+            repo_root = os.path.realpath(path)
+            if not os.path.isdir(repo_root):
+                print(f"Not a directory: {path}", file=sys.stderr)
+                return 1
+            result = analyze_directory(repo_root)
+
+            if args.out_dir is None:
+                json.dump(result, sys.stdout)
+                sys.stdout.write('\n')
+                continue
+            os.makedirs(args.out_dir, exist_ok=True)
+            out_path = os.path.join(args.out_dir, os.path.basename(repo_root) + '.json')
+            with open(out_path, 'w') as f:
+                json.dump(result, f)
+            print(f"{path} -> {out_path} ({result['summary']['total_files']} files)", file=sys.stderr)
+    finally:
+        shutdown_pool()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
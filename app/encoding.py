@@ -0,0 +1,116 @@
+"""
+Response Encoding Module
+Field selection (view=summary|graph|full, fields=...) over analysis results
+and compact body encoding: orjson when installed (stdlib json otherwise),
+MessagePack when the client asks for it in Accept and msgpack is installed
+"""
+
+import json
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json below
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional: JSON is always available
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+VIEWS = ("full", "graph", "summary")
+
+# Per-node fields of each result kind
+UPLOAD_NODE_FIELDS = ('path', 'loc', 'imports_raw', 'imports', 'imported_by_count', 'imports_count', 'risk')
+DETAILED_NODE_FIELDS = ('loc', 'imports', 'imported_by', 'imports_count', 'imported_by_count', 'risk', 'functions_classes')
+# What view=graph keeps per node (edges carry the import lists)
+GRAPH_NODE_FIELDS = ('path', 'loc', 'imports_count', 'imported_by_count', 'risk')
+
+
+def dumps(content):
+    """Compact JSON as UTF-8 bytes"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(',', ':')).encode('utf-8')
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with dumps() (orjson when available)"""
+
+    def render(self, content):
+        return dumps(content)
+
+
+def parse_fields(fields, node_fields):
+    """
+    "loc,risk" -> ('loc', 'risk'); None/empty -> None (keep every field)
+    Raises: ValueError for fields the nodes of this result don't have
+    """
+    if not fields:
+        return None
+    names = tuple(f.strip() for f in fields.split(',') if f.strip())
+    unknown = [f for f in names if f not in node_fields]
+    if unknown:
+        raise ValueError(f"unknown fields {', '.join(unknown)} (expected any of {', '.join(node_fields)})")
+    return names
+
+
+def select(result, view="full", fields=None):
+    """
+    Trim an /upload or /upload-analyze result without copying what's kept
+    view=full: everything; graph: nodes with GRAPH_NODE_FIELDS plus edges;
+    summary: no nodes or edges. Outside view=full, top-risky entries drop
+    functions_classes (already on the node). fields: node fields to keep
+    Returns: result itself when nothing is trimmed, else a new dict
+    """
+    if view == "full" and fields is None:
+        return result
+    keep = fields or (GRAPH_NODE_FIELDS if view == "graph" else None)
+    out = {}
+    for key, value in result.items():
+        if key in ('nodes', 'edges') and view == "summary":
+            continue
+        if key == 'nodes' and keep is not None:
+            value = {path: {f: meta[f] for f in keep if f in meta} for path, meta in value.items()}
+        elif key == 'top_10_risky' and view != "full":
+            value = [{k: v for k, v in item.items() if k != 'functions_classes'} for item in value]
+        out[key] = value
+    return out
+
+
+def negotiate(accept):
+    """
+    Media type for a response body from the Accept header: MessagePack when
+    it's preferred (highest q, the first listed on a tie) and msgpack is
+    installed, JSON otherwise
+    """
+    if not accept or msgpack is None:
+        return JSON_MEDIA_TYPE
+    best, best_q = JSON_MEDIA_TYPE, -1.0
+    for part in accept.split(','):
+        media, _, params = part.strip().partition(';')
+        media = media.strip().lower()
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if media in MSGPACK_MEDIA_TYPES and q > best_q and q > 0:
+            best, best_q = media, q
+        elif media in (JSON_MEDIA_TYPE, '*/*', 'application/*') and q > best_q:
+            best, best_q = JSON_MEDIA_TYPE, q
+    return best
+
+
+def encode(content, media_type):
+    """Body bytes for one of the negotiate() media types"""
+    if media_type in MSGPACK_MEDIA_TYPES:
+        return msgpack.packb(content, use_bin_type=True)
+    return dumps(content)
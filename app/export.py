@@ -0,0 +1,129 @@
+"""
+Export Module
+Columnar tables (nodes, edges, functions, calls, components) of a stored
+/upload-analyze result with stable integer ids, written as CSV, or as
+Parquet when pyarrow is installed
+"""
+
+import csv
+import io
+import zipfile
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # optional: CSV needs nothing
+    pyarrow = None
+
+TABLES = ('nodes', 'edges', 'functions', 'calls', 'components')
+FORMATS = ('csv', 'parquet')
+MEDIA_TYPES = {'csv': 'text/csv', 'parquet': 'application/vnd.apache.parquet', 'zip': 'application/zip'}
+# Rows encoded per chunk of a streamed CSV
+CSV_CHUNK_ROWS = 5000
+
+
+def columns(repo, table):
+    """
+    One table of a stored repo as columns
+    Ids: node id = position in the analysis' node list (the DependencyGraph id),
+    function id = position in the call graph; they never change for a repo_id
+    Returns: (column names, list of equal-length column lists)
+    """
+    nodes = repo['graph']['nodes']
+    if table == 'nodes':
+        return (
+            ['node_id', 'path', 'loc', 'imports_count', 'imported_by_count', 'risk', 'functions'],
+            [list(range(len(nodes))),
+             [n['path'] for n in nodes],
+             [n['loc'] for n in nodes],
+             [n['imports_count'] for n in nodes],
+             [n['imported_by_count'] for n in nodes],
+             [n['risk'] for n in nodes],
+             [len(n.get('functions_classes', ())) for n in nodes]],
+        )
+
+    graph = repo['graph']['reachability'].graph
+    if table == 'edges':
+        pairs = list(graph.edges())
+        return ['source_id', 'target_id'], [[a for a, _ in pairs], [b for _, b in pairs]]
+
+    if table == 'components':
+        # Import cycles only (SCCs of one file are not components)
+        comp_ids, node_ids = [], []
+        cycles = [c for c in repo['graph']['reachability'].components if len(c) > 1]
+        for comp_id, members in enumerate(cycles):
+            for v in sorted(members):
+                comp_ids.append(comp_id)
+                node_ids.append(v)
+        return ['component_id', 'node_id'], [comp_ids, node_ids]
+
+    call_graph = repo['call_graph']
+    functions = call_graph['functions']
+    if table == 'functions':
+        return (
+            ['function_id', 'node_id', 'name', 'qualname', 'type', 'line_start', 'line_end',
+             'fan_in', 'fan_out', 'cycle'],
+            [[f['id'] for f in functions],
+             [graph.ids[f['file']] for f in functions],
+             [f['name'] for f in functions],
+             [f['qualname'] for f in functions],
+             [f['type'] for f in functions],
+             [f['line_start'] for f in functions],
+             [f['line_end'] for f in functions],
+             [f['fan_in'] for f in functions],
+             [f['fan_out'] for f in functions],
+             [f['cycle'] for f in functions]],
+        )
+
+    if table == 'calls':
+        ids = call_graph['graph'].ids
+        calls = call_graph['calls']
+        return (
+            ['source_id', 'target_id', 'line', 'count'],
+            [[ids[c['source']] for c in calls],
+             [ids[c['target']] for c in calls],
+             [c['line'] for c in calls],
+             [c['count'] for c in calls]],
+        )
+
+    raise ValueError(f"unknown table {table!r} (expected one of {', '.join(TABLES)})")
+
+
+def iter_csv(names, cols):
+    """CSV of columns (header row first), yielded in chunks of CSV_CHUNK_ROWS rows"""
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator='\n')
+    writer.writerow(names)
+    rows = zip(*cols)
+    while True:
+        chunk = [row for _, row in zip(range(CSV_CHUNK_ROWS), rows)]
+        if chunk:
+            writer.writerows(chunk)
+        data = buf.getvalue()
+        if data:
+            yield data.encode('utf-8')
+            buf.seek(0)
+            buf.truncate()
+        if len(chunk) < CSV_CHUNK_ROWS:
+            return
+
+
+def parquet_bytes(names, cols):
+    """One table as a Parquet file (requires pyarrow)"""
+    table = pyarrow.table(dict(zip(names, cols)))
+    out = io.BytesIO()
+    pyarrow.parquet.write_table(table, out)
+    return out.getvalue()
+
+
+def write_zip(repo, fileobj, format='csv'):
+    """Every table as <table>.csv / <table>.parquet in one ZIP written to fileobj"""
+    with zipfile.ZipFile(fileobj, 'w', zipfile.ZIP_DEFLATED) as z:
+        for table in TABLES:
+            names, cols = columns(repo, table)
+            if format == 'parquet':
+                z.writestr(f"{table}.parquet", parquet_bytes(names, cols))
+            else:
+                with z.open(f"{table}.csv", 'w') as member:
+                    for chunk in iter_csv(names, cols):
+                        member.write(chunk)
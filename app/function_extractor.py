@@ -3,8 +3,17 @@ Function/Class Extractor Module
 Extracts function and class definitions with their metadata
 """
 
+import ast
 import re
-import os
+
+from .scanner import language_for
+
+# Keywords that look like calls/method headers to the regexes below
+CONTROL_KEYWORDS = ['if', 'for', 'while', 'switch', 'catch']
+
+# String literals and // comments, dropped before counting braces
+_BRACE_NOISE = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|`[^`]*`|//.*')
+
 
 def extract_functions_and_classes(file_path):
     """
@@ -17,12 +26,101 @@ def extract_functions_and_classes(file_path):
     except:
         return []
     
+    return extract_functions_and_classes_from_lines(lines, language_for(file_path))
+
+
+def extract_functions_and_classes_from_lines(lines, language=None):
+    """
+    Same as extract_functions_and_classes, for lines that were already read
+    (e.g. straight from a ZIP member)
+    language='python' uses the AST (exact end lines, nesting, decorators);
+    everything else, and Python that doesn't parse, goes through the regexes
+    """
+    if language == 'python':
+        items = extract_python_definitions(''.join(lines))
+        if items is not None:
+            return items
+    return extract_with_regex(lines, language)
+
+
+def extract_python_definitions(source):
+    """
+    Classes, functions and methods of a Python module from its AST
+    Returns: List of dicts (name, type, line_start, line_end, language,
+             parent_class, parent, depth, decorators, is_async) in source
+             order, or None if the source doesn't parse
+    """
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+    
+    items = []
+    _visit_python(tree, items, parent=None, parent_class=None, depth=0)
+    items.sort(key=lambda item: item['line_start'])
+    return items
+
+
+# Statement-list fields: definitions can only appear in these, so expressions
+# are never walked
+_BLOCK_FIELDS = ('body', 'orelse', 'finalbody', 'handlers', 'cases')
+
+
+def _visit_python(node, items, parent, parent_class, depth):
+    # parent: qualified name of the enclosing def/class; parent_class: set only
+    # for defs directly in a class body (methods)
+    for child in _child_statements(node):
+        if isinstance(child, ast.ClassDef):
+            kind = 'class'
+        elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            kind = 'method' if parent_class else 'function'
+        else:
+            _visit_python(child, items, parent, parent_class, depth)
+            continue
+        
+        items.append({
+            'name': child.name,
+            'type': kind,
+            'line_start': child.lineno,
+            'line_end': child.end_lineno,
+            'language': 'python',
+            'parent_class': parent_class,
+            'parent': parent,
+            'depth': depth,
+            'decorators': [_decorator_name(d) for d in child.decorator_list],
+            'is_async': isinstance(child, ast.AsyncFunctionDef)
+        })
+        qualname = f"{parent}.{child.name}" if parent else child.name
+        _visit_python(child, items, qualname, child.name if kind == 'class' else None, depth + 1)
+
+
+def _child_statements(node):
+    for field in _BLOCK_FIELDS:
+        block = getattr(node, field, None)
+        if block:
+            yield from block
+
+
+def _decorator_name(node):
+    # @app.get('/x') -> 'app.get'; @cached -> 'cached'
+    if isinstance(node, ast.Call):
+        node = node.func
+    return ast.unparse(node)
+
+
+def extract_with_regex(lines, language=None):
+    """
+    Line-regex extractor for JavaScript/TypeScript/Java (and Python that doesn't parse)
+    Open classes and functions are tracked by indentation (Python) or brace
+    depth (braces), so items get a line_end and a class stops owning
+    definitions once its body closes
+    language: the file's language, if known, overrides the per-pattern guess
+    """
     functions_classes = []
     
     # Regex patterns
     class_pattern = re.compile(r'^\s*class\s+(\w+)\s*[\(:]')
     func_pattern = re.compile(r'^\s*(async\s+)?def\s+(\w+)\s*\(')
-    method_pattern = re.compile(r'^\s*(async\s+)?def\s+(\w+)\s*\(')
     js_class_pattern = re.compile(r'^\s*class\s+(\w+)\s*\{')
     js_func_pattern = re.compile(r'^\s*function\s+(\w+)\s*\(')
     js_method_pattern = re.compile(r'^\s*(\w+)\s*\([^)]*\)\s*\{')
@@ -31,110 +129,124 @@ def extract_functions_and_classes(file_path):
     java_class_pattern = re.compile(r'^\s*(public|private|protected)?\s*(static)?\s*class\s+(\w+)')
     java_method_pattern = re.compile(r'^\s*(public|private|protected)?\s*(static)?\s*(\w+)\s+(\w+)\s*\([^)]*\)\s*\{')
     
-    current_class = None
+    # Open definitions, innermost last:
+    # Python items as [item, indent], brace items as [item, depth_before, opened]
+    py_open = []
+    brace_open = []
+    depth = 0
+    last_code_line = 0
     
     for i, line in enumerate(lines, 1):
+        stripped = line.strip()
+        
+        if stripped and not stripped.startswith('#'):
+            # A Python block ends at the first code line indented no deeper than its header
+            indent = len(line) - len(line.lstrip())
+            while py_open and py_open[-1][1] >= indent:
+                py_open.pop()[0]['line_end'] = last_code_line
+        
+        current_class = _innermost_class(py_open, brace_open)
+        item = None
+        
         # Python class
         match = class_pattern.match(line)
         if match:
-            current_class = {
-                'name': match.group(1),
-                'type': 'class',
-                'line_start': i,
-                'language': 'python',
-                'parent_class': None
-            }
-            functions_classes.append(current_class)
-            current_class = match.group(1)
-            continue
+            item = _regex_item(match.group(1), 'class', i, 'python', None)
         
-        # Python function
-        match = func_pattern.match(line)
-        if match:
-            item = {
-                'name': match.group(2),
-                'type': 'function',
-                'line_start': i,
-                'language': 'python',
-                'parent_class': current_class if isinstance(current_class, str) else None
-            }
+        # Python function (a method when directly inside a Python class)
+        if item is None:
+            match = func_pattern.match(line)
+            if match:
+                in_class = bool(py_open) and py_open[-1][0]['type'] == 'class'
+                item = _regex_item(match.group(2), 'method' if in_class else 'function', i, 'python',
+                                   py_open[-1][0]['name'] if in_class else None)
+        
+        if item is not None:
             functions_classes.append(item)
-            continue
+            py_open.append([item, len(line) - len(line.lstrip())])
         
         # JavaScript class
-        match = js_class_pattern.match(line)
-        if match:
-            current_class = {
-                'name': match.group(1),
-                'type': 'class',
-                'line_start': i,
-                'language': 'javascript',
-                'parent_class': None
-            }
-            functions_classes.append(current_class)
-            current_class = match.group(1)
-            continue
+        if item is None:
+            match = js_class_pattern.match(line)
+            if match:
+                item = _regex_item(match.group(1), 'class', i, 'javascript', None)
         
         # JavaScript function
-        match = js_func_pattern.match(line)
-        if match:
-            item = {
-                'name': match.group(1),
-                'type': 'function',
-                'line_start': i,
-                'language': 'javascript',
-                'parent_class': current_class if isinstance(current_class, str) else None
-            }
-            functions_classes.append(item)
-            continue
+        if item is None:
+            match = js_func_pattern.match(line)
+            if match:
+                item = _regex_item(match.group(1), 'function', i, 'javascript', current_class)
         
         # Java class
-        match = java_class_pattern.match(line)
-        if match:
-            class_name = match.group(3)
-            current_class = {
-                'name': class_name,
-                'type': 'class',
-                'line_start': i,
-                'language': 'java',
-                'parent_class': None
-            }
-            functions_classes.append(current_class)
-            current_class = class_name
-            continue
+        if item is None:
+            match = java_class_pattern.match(line)
+            if match:
+                item = _regex_item(match.group(3), 'class', i, 'java', None)
         
         # Java method
-        if isinstance(current_class, str):
+        if item is None and current_class and not stripped.startswith('//'):
             match = java_method_pattern.match(line)
-            if match and line.strip() and not line.strip().startswith('//'):
-                method_name = match.group(4)
-                if method_name not in ['if', 'for', 'while', 'switch', 'catch']:
-                    item = {
-                        'name': method_name,
-                        'type': 'method',
-                        'line_start': i,
-                        'language': 'java',
-                        'parent_class': current_class
-                    }
-                    functions_classes.append(item)
+            if match and match.group(4) not in CONTROL_KEYWORDS:
+                item = _regex_item(match.group(4), 'method', i, 'java', current_class)
         
         # JavaScript method (within class)
-        if isinstance(current_class, str):
+        if item is None and current_class and not stripped.startswith('//'):
             match = js_method_pattern.match(line)
-            if match and line.strip() and not line.strip().startswith('//'):
-                item = {
-                    'name': match.group(1),
-                    'type': 'method',
-                    'line_start': i,
-                    'language': 'javascript',
-                    'parent_class': current_class
-                }
-                if item['name'] not in ['if', 'for', 'while', 'switch', 'catch']:
-                    functions_classes.append(item)
+            if match and match.group(1) not in CONTROL_KEYWORDS:
+                item = _regex_item(match.group(1), 'method', i, 'javascript', current_class)
+        
+        if item is not None and item['language'] != 'python':
+            functions_classes.append(item)
+            brace_open.append([item, depth, False])
+        
+        # Brace blocks end on the line that brings depth back to where they started
+        if '{' in line or '}' in line:
+            code = _BRACE_NOISE.sub('', line) if ('"' in line or "'" in line or '`' in line or '/' in line) else line
+            for ch in code:
+                if ch == '{':
+                    depth += 1
+                    for entry in brace_open:
+                        entry[2] = True
+                elif ch == '}':
+                    depth -= 1
+                    while brace_open and brace_open[-1][2] and depth <= brace_open[-1][1]:
+                        brace_open.pop()[0]['line_end'] = i
+        
+        if stripped:
+            last_code_line = i
+    
+    # Still open at end of file
+    for entry in py_open + brace_open:
+        entry[0]['line_end'] = last_code_line
+    
+    if language:
+        for item in functions_classes:
+            item['language'] = language
     
     return functions_classes
 
 
+def _regex_item(name, kind, line, language, parent_class):
+    return {
+        'name': name,
+        'type': kind,
+        'line_start': line,
+        'line_end': line,
+        'language': language,
+        'parent_class': parent_class
+    }
+
+
+def _innermost_class(py_open, brace_open):
+    # Name of the most recently opened class that is still open, if any
+    best = None
+    for entry in py_open + brace_open:
+        item = entry[0]
+        if item['type'] == 'class' and (best is None or item['line_start'] > best['line_start']):
+            best = item
+    return best['name'] if best else None
+
+
 def find_function_calls(file_path, function_name):
     """
     Find all places where a function is called
@@ -168,7 +280,7 @@ def find_function_calls(file_path, function_name):
     return calls
 
 
-def find_function_dependencies(file_path, function_name):
+def find_function_dependencies(file_path, function_name, line_start=None, line_end=None):
     """
     Find what a function depends on (its imports/calls within)
     Returns: List of dependencies
@@ -179,6 +291,22 @@ def find_function_dependencies(file_path, function_name):
     except:
         return []
     
+    return find_function_dependencies_in_lines(lines, function_name, line_start, line_end)
+
+
+def find_function_dependencies_in_lines(lines, function_name, line_start=None, line_end=None):
+    """
+    Same as find_function_dependencies, for lines that were already read
+    (lets batch lookups read each file once)
+    line_start/line_end: the definition's span from the extractor; the body is
+    then sliced directly instead of being found by regex and brace counting
+    """
+    if line_start is not None and line_end is not None:
+        dependencies = []
+        for i in range(line_start, min(line_end, len(lines))):
+            dependencies.extend(_line_dependencies(lines[i], i + 1))
+        return dependencies
+    
     # Find function definition - for both Python and JavaScript
     # Python: def function_name( or async def function_name(
     # JavaScript: function_name() { or methodName(...) {
@@ -222,19 +350,25 @@ def find_function_dependencies(file_path, function_name):
         if in_function and brace_count <= 0:
             break
         
-        if not line.strip():
-            continue
-        
-        # Find function calls within this function
-        for match in re.finditer(r'\b(\w+)\s*\(', line):
-            func_name = match.group(1)
-            # Filter out keywords and common non-function calls
-            if func_name not in ['if', 'for', 'while', 'return', 'print', 'len', 'throw', 'switch', 'catch']:
-                dependencies.append({
-                    'name': func_name,
-                    'line': i + 1,
-                    'code': line.strip()
-                })
+        dependencies.extend(_line_dependencies(line, i + 1))
+    
+    return dependencies
+
+
+def _line_dependencies(line, line_number):
+    if not line.strip():
+        return []
     
+    # Find function calls on this line
+    dependencies = []
+    for match in re.finditer(r'\b(\w+)\s*\(', line):
+        func_name = match.group(1)
+        # Filter out keywords and common non-function calls
+        if func_name not in ['if', 'for', 'while', 'return', 'print', 'len', 'throw', 'switch', 'catch']:
+            dependencies.append({
+                'name': func_name,
+                'line': line_number,
+                'code': line.strip()
+            })
     return dependencies
 
@@ -0,0 +1,268 @@
+"""
+Dependency Graph Module
+Compact file-level graph: integer node ids, CSR (offsets + targets arrays)
+forward and reverse adjacency, an iterative Tarjan SCC, and transitive
+reachability over the condensation DAG of the SCCs
+"""
+
+import os
+import threading
+from array import array
+
+# Largest condensation DAG whose closures are kept as bitsets (they take about
+# components^2 / 16 bytes per direction); bigger graphs walk the DAG per query
+REACH_BITSET_MAX = int(os.environ.get('LEGACYMAP_REACH_BITSET_MAX', '20000'))
+
+
+class DependencyGraph:
+    """
+    Immutable directed graph over repo files (edge A -> B: A imports B), or
+    over functions for the call graph (edge A -> B: A calls B)
+    paths[i] is the file (function key) of node i, ids[path] its node id
+    Successors of i are fwd_targets[fwd_offsets[i]:fwd_offsets[i + 1]]
+    (same layout for predecessors in rev_*). Parallel edges are kept.
+    """
+
+    __slots__ = ('paths', 'ids', 'fwd_offsets', 'fwd_targets', 'rev_offsets', 'rev_targets')
+
+    def __init__(self, paths, src, dst):
+        self.paths = list(paths)
+        self.ids = {p: i for i, p in enumerate(self.paths)}
+        n = len(self.paths)
+        self.fwd_offsets, self.fwd_targets = _csr(n, src, dst)
+        self.rev_offsets, self.rev_targets = _csr(n, dst, src)
+
+    @property
+    def node_count(self):
+        return len(self.paths)
+
+    @property
+    def edge_count(self):
+        return len(self.fwd_targets)
+
+    def successors(self, i):
+        return self.fwd_targets[self.fwd_offsets[i]:self.fwd_offsets[i + 1]]
+
+    def predecessors(self, i):
+        return self.rev_targets[self.rev_offsets[i]:self.rev_offsets[i + 1]]
+
+    def out_degree(self, i):
+        return self.fwd_offsets[i + 1] - self.fwd_offsets[i]
+
+    def in_degree(self, i):
+        return self.rev_offsets[i + 1] - self.rev_offsets[i]
+
+    def edges(self):
+        """Yields (src_id, dst_id) grouped by source, in insertion order per source"""
+        offs, targets = self.fwd_offsets, self.fwd_targets
+        for i in range(self.node_count):
+            for k in range(offs[i], offs[i + 1]):
+                yield i, targets[k]
+
+    def strongly_connected_components(self):
+        """
+        Iterative Tarjan (no recursion limit on deep import chains), O(V + E)
+        Returns: list of components, each a list of node ids; components come
+        out in reverse topological order (dependencies before dependents)
+        """
+        n = self.node_count
+        offs, targets = self.fwd_offsets, self.fwd_targets
+        index = [-1] * n
+        low = [0] * n
+        on_stack = [False] * n
+        stack = []
+        comps = []
+        counter = 0
+
+        for root in range(n):
+            if index[root] != -1:
+                continue
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            work = [[root, offs[root]]]  # (node, next edge position) call frames
+
+            while work:
+                frame = work[-1]
+                v, pos = frame
+                if pos < offs[v + 1]:
+                    frame[1] = pos + 1
+                    w = targets[pos]
+                    if index[w] == -1:
+                        index[w] = low[w] = counter
+                        counter += 1
+                        stack.append(w)
+                        on_stack[w] = True
+                        work.append([w, offs[w]])
+                    elif on_stack[w] and index[w] < low[v]:
+                        low[v] = index[w]
+                    continue
+
+                work.pop()
+                if work:
+                    u = work[-1][0]
+                    if low[v] < low[u]:
+                        low[u] = low[v]
+                if low[v] == index[v]:
+                    comp = []
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = False
+                        comp.append(w)
+                        if w == v:
+                            break
+                    comps.append(comp)
+
+        return comps
+
+
+class Reachability:
+    """
+    Transitive dependencies / dependents of every node of a DependencyGraph
+    The SCCs are collapsed into a DAG (component ids in reverse topological
+    order, so a component only reaches lower ids); each component's closure is
+    one int bitset over component ids, built bottom-up with one OR per DAG edge.
+    Closures are built on first use, once per direction (only up to
+    REACH_BITSET_MAX components; above that each query walks the DAG).
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.components = graph.strongly_connected_components()
+        self.component = array('i', [0]) * graph.node_count
+        for c, members in enumerate(self.components):
+            for v in members:
+                self.component[v] = c
+
+        src = array('i')
+        dst = array('i')
+        for c, members in enumerate(self.components):
+            seen = {c}
+            for v in members:
+                for w in graph.successors(v):
+                    d = self.component[w]
+                    if d not in seen:
+                        seen.add(d)
+                        src.append(c)
+                        dst.append(d)
+        k = len(self.components)
+        self.dag_offsets, self.dag_targets = _csr(k, src, dst)
+        self.rev_dag_offsets, self.rev_dag_targets = _csr(k, dst, src)
+        self._closures = {}
+        self._lock = threading.Lock()
+
+    def dependencies(self, i, max_depth=None):
+        """Node ids i reaches (transitively imports), excluding i"""
+        return self._reach(i, max_depth, forward=True)
+
+    def dependents(self, i, max_depth=None):
+        """Node ids that reach i (transitively import it), excluding i"""
+        return self._reach(i, max_depth, forward=False)
+
+    def cycle(self, i):
+        """Other node ids in i's SCC (files importing each other in a cycle)"""
+        return [v for v in self.components[self.component[i]] if v != i]
+
+    def _reach(self, i, max_depth, forward):
+        if max_depth is not None:
+            return self._bounded(i, max_depth, forward)
+        if len(self.components) > REACH_BITSET_MAX:
+            comps = self._walk(self.component[i], forward)
+        else:
+            bits = self._closure(forward)[self.component[i]]
+            # Set bits via bin(): one C-level scan instead of a shift per bit
+            digits = bin(bits)[:1:-1]
+            comps = []
+            c = digits.find('1')
+            while c != -1:
+                comps.append(c)
+                c = digits.find('1', c + 1)
+        out = []
+        for c in comps:
+            out.extend(self.components[c])
+        out.remove(i)
+        return out
+
+    def _walk(self, start, forward):
+        if forward:
+            offs, targets = self.dag_offsets, self.dag_targets
+        else:
+            offs, targets = self.rev_dag_offsets, self.rev_dag_targets
+        seen = bytearray(len(self.components))
+        seen[start] = 1
+        todo = [start]
+        for c in todo:
+            for pos in range(offs[c], offs[c + 1]):
+                d = targets[pos]
+                if not seen[d]:
+                    seen[d] = 1
+                    todo.append(d)
+        return todo
+
+    def _closure(self, forward):
+        closure = self._closures.get(forward)
+        if closure is not None:
+            return closure
+        with self._lock:
+            if forward not in self._closures:
+                k = len(self.components)
+                if forward:
+                    offs, targets, order = self.dag_offsets, self.dag_targets, range(k)
+                else:
+                    offs, targets, order = self.rev_dag_offsets, self.rev_dag_targets, range(k - 1, -1, -1)
+                bits = [0] * k
+                for c in order:
+                    acc = 1 << c
+                    for pos in range(offs[c], offs[c + 1]):
+                        acc |= bits[targets[pos]]
+                    bits[c] = acc
+                self._closures[forward] = bits
+            return self._closures[forward]
+
+    def _bounded(self, i, max_depth, forward):
+        # Depth-limited BFS on the node graph (depth = import hops from i)
+        step = self.graph.successors if forward else self.graph.predecessors
+        seen = {i}
+        frontier = [i]
+        for _ in range(max_depth):
+            nxt = []
+            for v in frontier:
+                for w in step(v):
+                    if w not in seen:
+                        seen.add(w)
+                        nxt.append(w)
+            if not nxt:
+                break
+            frontier = nxt
+        seen.discard(i)
+        return list(seen)
+
+
+def build_graph(paths, edge_pairs):
+    """
+    paths: node files in id order; edge_pairs: iterable of (src_path, dst_path)
+    Returns: DependencyGraph
+    """
+    ids = {p: i for i, p in enumerate(paths)}
+    src = array('i')
+    dst = array('i')
+    for a, b in edge_pairs:
+        src.append(ids[a])
+        dst.append(ids[b])
+    return DependencyGraph(paths, src, dst)
+
+
+def _csr(n, src, dst):
+    # Counting sort of edges by source; stable, so per-source order is insertion order
+    offsets = array('i', [0]) * (n + 1)
+    for s in src:
+        offsets[s + 1] += 1
+    for i in range(n):
+        offsets[i + 1] += offsets[i]
+    targets = array('i', [0]) * len(src)
+    fill = offsets[:-1]
+    for s, d in zip(src, dst):
+        targets[fill[s]] = d
+        fill[s] += 1
+    return offsets, targets
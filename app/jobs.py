@@ -0,0 +1,110 @@
+"""
+Background Job Module
+Runs blocking analyses in a worker pool so the asyncio event loop
+(and light endpoints like /) stays responsive while big uploads are analyzed.
+Every status change is also written to the SQLite store, so a job can be
+polled from any server process, not only the one running it
+"""
+
+import os
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from . import sqlite_store
+
+# Number of analyses that may run at the same time
+JOB_WORKERS = int(os.environ.get('LEGACYMAP_JOB_WORKERS', '2'))
+# Finished jobs (and their results) are forgotten after this many seconds
+JOB_TTL_SECONDS = int(os.environ.get('LEGACYMAP_JOB_TTL_SECONDS', '3600'))
+
+_jobs = {}
+_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="legacymap-job")
+
+
+def submit_job(kind, fn, *args):
+    """
+    Queue fn(*args) on the worker pool
+    Returns: job dict (job_id, kind, status='queued', ...)
+    """
+    _prune_finished()
+    job = {
+        'job_id': str(uuid.uuid4()),
+        'kind': kind,
+        'status': 'queued',
+        'submitted_at': time.time(),
+        'started_at': None,
+        'finished_at': None,
+        'result': None,
+        'error': None,
+    }
+    with _lock:
+        _jobs[job['job_id']] = job
+    _publish(job)
+    _executor.submit(_run, job, fn, args)
+    return dict(job)
+
+
+def get_job(job_id):
+    """
+    Jobs of this process come from memory, others from the SQLite store
+    Returns: copy of the job dict, or None if unknown/expired
+    """
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is not None:
+            return dict(job)
+    if not sqlite_store.enabled():
+        return None
+    try:
+        return sqlite_store.load_job(job_id)
+    except sqlite_store.Error as e:
+        print(f"[WARN] Could not read job {job_id}: {e}")
+        return None
+
+
+def shutdown_jobs():
+    _executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _run(job, fn, args):
+    job['status'] = 'running'
+    job['started_at'] = time.time()
+    _publish(job)
+    try:
+        job['result'] = fn(*args)
+        job['status'] = 'done'
+    except Exception as ex:
+        job['error'] = str(ex) or ex.__class__.__name__
+        job['status'] = 'failed'
+    finally:
+        job['finished_at'] = time.time()
+        _publish(job)
+
+
+def _publish(job):
+    # Shared copy for the other server processes; this one keeps serving from memory
+    if not sqlite_store.enabled():
+        return
+    try:
+        sqlite_store.save_job(dict(job))
+    except (*sqlite_store.Error, TypeError, ValueError) as e:
+        print(f"[WARN] Could not persist job {job['job_id']}: {e}")
+
+
+def _prune_finished():
+    cutoff = time.time() - JOB_TTL_SECONDS
+    with _lock:
+        expired = [
+            job_id for job_id, job in _jobs.items()
+            if job['finished_at'] is not None and job['finished_at'] < cutoff
+        ]
+        for job_id in expired:
+            del _jobs[job_id]
+    if sqlite_store.enabled():
+        try:
+            sqlite_store.prune_jobs(cutoff)
+        except sqlite_store.Error as e:
+            print(f"[WARN] Could not prune jobs: {e}")
@@ -10,7 +10,7 @@ print(">>> main.py is running <<<")
 # IMPORTS & CLASSES USED
 # ============================================================================
 
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, UploadFile, HTTPException, Header
 # CLASS 1: FastAPI - Web framework main class (Line 1)
 #   Purpose: Handle HTTP requests and responses
 #   Methods used: @app.post() decorator for endpoints
@@ -28,11 +28,6 @@ from fastapi import FastAPI, File, UploadFile, HTTPException
 #   Purpose: Return HTTP error responses
 #   Usage: raise HTTPException(status_code=400, detail="message")
 
-from fastapi.responses import JSONResponse
-# CLASS 5: JSONResponse - JSON response formatter (Line 2)
-#   Purpose: Return JSON data to client
-#   Usage: JSONResponse(content=dict, status_code=200)
-
 import os
 # MODULE: Operating system operations
 # Functions: os.walk(), os.path.join(), os.path.relpath(), os.remove()
@@ -44,7 +39,7 @@ import uuid
 import shutil
 # MODULE: File operations (not directly used, imported for potential cleanup)
 
-from .utils import extract_zip_to_temp, cleanup
+from .utils import extract_zip_to_temp, cleanup, open_upload_zip, extract_zip_members, save_upload_to_temp, sha256_file, link_files
 # FUNCTION 1: extract_zip_to_temp (Source: utils.py:1-10)
 #   Parameters: zip_path (str)
 #   Returns: temp_directory_path (str)
@@ -52,13 +47,25 @@ from .utils import extract_zip_to_temp, cleanup
 #   Uses: tempfile.mkdtemp(), ZipFile.extractall()
 #   Called at: Line 32
 
+# FUNCTIONS: open_upload_zip / extract_zip_members / save_upload_to_temp / sha256_file (Source: utils.py)
+#   Purpose: In-archive mode - scan source members straight from the ZipFile handle
+#   Used when: ?in_archive=true on /upload and /upload-analyze
+
 from . import scanner
 # MODULE: scanner.py - Code analysis functions
 #   Functions: is_source_file(), read_file_lines(), count_loc(), extract_imports(), normalize_import_path()
 
-from .function_extractor import extract_functions_and_classes, find_function_calls, find_function_dependencies
+from .analysis import scan_directory, scan_archive, scan_archive_incremental, list_archive_sources, shutdown_pool
+# MODULE: analysis.py - Single-pass per-file analysis
+#   Functions: scan_directory(), scan_archive() -> one record per source file
+#              scan_archive_incremental() -> reuses records whose sha256 is unchanged
+#   Record: {"path", "loc", "imports_raw", "functions_classes", "sha256"}
+#   Parallel: set LEGACYMAP_SCAN_WORKERS (and LEGACYMAP_SCAN_CHUNK_SIZE) to
+#   shard files across a ProcessPoolExecutor
+
+from .function_extractor import find_function_dependencies_in_lines
 # MODULE: function_extractor.py - Function/class extraction
-#   Functions: extract_functions_and_classes(), find_function_calls(), find_function_dependencies()
+#   Functions: find_function_dependencies_in_lines() - dependencies of one function in its source lines
 
 # FUNCTION 2: cleanup (Source: utils.py:12-17)
 #   Parameters: path (str)
@@ -67,66 +74,77 @@ from .function_extractor import extract_functions_and_classes, find_function_cal
 #   Uses: shutil.rmtree()
 #   Called at: Line 120
 
-from .scanner import (
-    is_source_file,           # Function: scanner.py:1-8
-    read_file_lines,          # Function: scanner.py:10-15
-    count_loc,                # Function: scanner.py:17-22
-    extract_imports,          # Function: scanner.py:24-35
-    normalize_import_path     # Function: scanner.py:37-45
-)
-
-# FUNCTION 3: is_source_file (Source: scanner.py:1-8)
-#   Parameters: path (str)
-#   Returns: bool
-#   Purpose: Check if file is .js, .ts, or .py
-#   Called at: Line 51
-
-# FUNCTION 4: read_file_lines (Source: scanner.py:10-15)
-#   Parameters: path (str)
-#   Returns: list of strings (file lines)
-#   Purpose: Read file content line by line
-#   Called at: Lines 57, 75
-
-# FUNCTION 5: count_loc (Source: scanner.py:17-22)
-#   Parameters: lines (list)
-#   Returns: int (count of non-empty, non-comment lines)
-#   Purpose: Calculate Lines of Code metric
-#   Called at: Line 58
-
-# FUNCTION 6: extract_imports (Source: scanner.py:24-35)
-#   Parameters: lines (list)
-#   Returns: list of import paths
-#   Purpose: Extract all require() and import statements
-#   Called at: Lines 59, 77
-
-# FUNCTION 7: normalize_import_path (Source: scanner.py:37-45)
-#   Parameters: import_path (str), from_file (str), repo_root (str)
-#   Returns: normalized_path (str)
-#   Purpose: Convert relative paths to actual file paths
-#   Called at: Line 78
-
-from collections import defaultdict
-# CLASS 6: defaultdict - Dictionary with default values (Line 33)
-#   Purpose: Automatically create missing keys with default value
-#   Usage: graph = defaultdict(list) creates dict where new keys = []
-#   Called at: Line 33, 34
-
-import networkx as nx
-# MODULE: Graph analysis library (networkx)
-# CLASS 7: nx.DiGraph - Directed Graph class (Line 37)
-#   Purpose: Create dependency graph (A→B means A depends on B)
-#   Methods: add_node(), add_edge(), strongly_connected_components()
-#   Called at: Line 94
+from .graph import build_graph, Reachability
+# MODULE: graph.py - Compact dependency graph (replaces defaultdicts + networkx)
+# CLASS 6: DependencyGraph - integer node ids, CSR forward/reverse adjacency
+#   Purpose: Dependency graph (A→B means A depends on B), held once
+#   Methods: in_degree(), out_degree(), edges(), strongly_connected_components()
+#   Built by: build_graph(paths, [(from, to), ...])
 
 from fastapi.middleware.cors import CORSMiddleware
 # CORS Middleware for frontend integration
 
+from pydantic import BaseModel
+from typing import List
+# CLASS: BaseModel - request body schemas (batch function details)
+
+from starlette.concurrency import run_in_threadpool
+# FUNCTION: run_in_threadpool - run blocking analysis off the asyncio event loop
+
+from . import jobs
+# MODULE: jobs.py - Background analysis jobs (POST /jobs, GET /jobs/{job_id})
+
+from . import result_cache
+# MODULE: result_cache.py - On-disk /upload results keyed by SHA-256 of the ZIP
+
+from . import repo_store
+# MODULE: repo_store.py - Uploaded repos (tree + records) with TTL/LRU eviction and disk quota
+
+from .symbol_index import build_symbol_index
+# FUNCTION: build_symbol_index - identifier -> call sites / definitions, built once per upload
+
+from .call_graph import build_call_graph
+# FUNCTION: build_call_graph - function-level caller -> callee graph, built once per upload
+
+from . import streaming
+# MODULE: streaming.py - NDJSON responses (?format=ndjson) and cursor pagination
+
+from . import metrics
+# MODULE: metrics.py - Per-stage timings (?timings=true) and Prometheus /metrics
+
+from . import risk
+# MODULE: risk.py - Weighted risk signals (size, fan-in/out, PageRank, betweenness, cycles) and top-K
+
+from . import encoding
+# MODULE: encoding.py - view=/fields= selection, orjson / MessagePack bodies (Accept)
+
+from . import export
+# MODULE: export.py - Columnar CSV / Parquet tables of a stored analysis (GET /repos/{repo_id}/export)
+
+from . import sqlite_store
+# MODULE: sqlite_store.py - Analyses and job state in SQLite (survive restarts, shared by all workers)
+
+import tempfile
+from fastapi.responses import StreamingResponse
+
+from fastapi.responses import Response
+from starlette.middleware.gzip import GZipMiddleware
+# CLASS: GZipMiddleware - gzip bodies for clients sending Accept-Encoding: gzip
+
+import time
+import heapq
+import sys
+from fastapi.responses import PlainTextResponse
+
 # ============================================================================
 # APPLICATION INITIALIZATION
 # ============================================================================
 
 app = FastAPI(title="LegacyMap AI - Hacker MVP Backend")
 
+# Virtual repo root used for path math when nothing is extracted (in-archive mode)
+ARCHIVE_ROOT = "/"
+
 # Add CORS middleware to allow frontend connections
 app.add_middleware(
     CORSMiddleware,
@@ -136,6 +154,54 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip for clients that accept it; large analysis results shrink ~10x
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=int(os.environ.get('LEGACYMAP_GZIP_MIN_BYTES', '1024')),
+    compresslevel=int(os.environ.get('LEGACYMAP_GZIP_LEVEL', '5')),
+)
+
+# Request duration histograms per endpoint, exported on /metrics
+# (added last, so it's outermost and includes compression time)
+app.add_middleware(metrics.RequestMetricsMiddleware)
+
+
+def _worker_count(argv=None, environ=None):
+    """
+    Server processes requested for this deployment: uvicorn's --workers, else
+    WEB_CONCURRENCY (uvicorn's default for --workers, set by most PaaS hosts)
+    Returns: int (1 when neither is set or parseable)
+    """
+    argv = sys.argv if argv is None else argv
+    environ = os.environ if environ is None else environ
+    value = environ.get('WEB_CONCURRENCY')
+    for i, arg in enumerate(argv):
+        if arg == '--workers' and i + 1 < len(argv):
+            value = argv[i + 1]
+        elif arg.startswith('--workers='):
+            value = arg.partition('=')[2]
+    try:
+        return max(1, int(value))
+    except (TypeError, ValueError):
+        return 1
+
+
+@app.on_event("startup")
+def check_workers():
+    # Without the database, repo ids and job ids live in one process's memory
+    # and other workers answer 404 for them
+    workers = _worker_count()
+    if workers > 1 and not sqlite_store.enabled():
+        print(f"[WARN] {workers} workers without LEGACYMAP_DB_PATH: repo_id and job_id "
+              f"only resolve on the worker that created them")
+
+
+@app.on_event("shutdown")
+def stop_workers():
+    jobs.shutdown_jobs()
+    shutdown_pool()
+    repo_store.clear()
+
 
 @app.get("/")
 def home():
@@ -154,16 +220,22 @@ def home():
 # Output: JSON with dependency graph, risk scores, and analysis
 
 @app.post("/upload")
-async def upload_zip(file: UploadFile = File(...)):
+async def upload_zip(file: UploadFile = File(...), in_archive: bool = False, format: str = "json", timings: bool = False,
+                     view: str = "full", fields: str = None, accept: str = Header(None)):
     """
     MAIN ORCHESTRATION FUNCTION
+    in_archive=true: scan source members straight from the ZIP (no /tmp copy, no extraction)
+    format=ndjson: stream summary/node/edge/component lines instead of one JSON document
+    timings=true: add per-stage durations and file/byte counts under "timings"
+    view=summary|graph|full, fields=loc,risk,...: trim the result (see encoding.select)
+    Accept: application/msgpack for a MessagePack body
     Workflow:
-    1. Validate and save uploaded ZIP file
+    1. Validate uploaded ZIP file
     2. Extract ZIP contents to temporary directory
     3. Scan all source files (JS, TS, Python)
     4. Count lines of code (LOC) for each file
     5. Extract import statements and normalize paths
-    6. Build dependency graph using networkx
+    6. Build dependency graph (compact CSR graph, graph.py)
     7. Calculate risk scores for each file
     8. Identify connected components (code clusters)
     9. Return comprehensive JSON response
@@ -171,7 +243,7 @@ async def upload_zip(file: UploadFile = File(...)):
     """
     
     # ════════════════════════════════════════════════════════════════════
-    # STEP 1: FILE VALIDATION & SAVE
+    # STEP 1: FILE VALIDATION
     # ════════════════════════════════════════════════════════════════════
     # Location: Line 73-83
     
@@ -181,421 +253,449 @@ async def upload_zip(file: UploadFile = File(...)):
         #   Status: 400 Bad Request
         #   Reason: File must be .zip format
         raise HTTPException(status_code=400, detail="Upload a zip file")
+    _check_format(format)
+    node_fields = _check_view(view, fields, encoding.UPLOAD_NODE_FIELDS)
     
-    # Generate unique identifier for this upload
-    uid = str(uuid.uuid4())[:8]
-    # FUNCTION: uuid.uuid4() generates UUID
-    #   Returns: Unique 8-character string
-    #   Purpose: Ensure temp files don't conflict
-    
-    # Create temporary file path
-    local_zip = f"/tmp/{uid}.zip"
-    # Format: /tmp/[8-char-uuid].zip
+    # Starlette already streamed the body into a SpooledTemporaryFile
+    # (file.file), so the ZIP is read straight from it - no /tmp copy.
+    # Everything after validation is blocking (file I/O, regex, graph work):
+    # run it in a worker thread so the event loop keeps serving requests.
+    (result, cache_status), stage_timings = await run_in_threadpool(
+        metrics.collect, "/upload", analyze_zip_cached, file.file, in_archive)
+    # FUNCTION CALL: run_in_threadpool() (from starlette.concurrency)
+    #   Runs: analyze_zip_cached() -> cached result, or analyze_zip() (steps 2-10 below)
+    #   metrics.collect() times every stage below it (metrics.stage blocks)
+    #   cache_status: "HIT" | "MISS" | "BYPASS" (cache disabled)
     
-    # Save uploaded file to disk
-    with open(local_zip, "wb") as f:
-        # FUNCTION: open() - built-in file handler
-        # Mode: "wb" = write binary
-        
-        content = await file.read()
-        # AWAIT: Async operation to read entire file
-        # Returns: bytes of file content
-        
-        f.write(content)
-        # METHOD: Write bytes to file
+    headers = {"X-LegacyMap-Cache": cache_status}
+    result = encoding.select(result, view, node_fields)
+    return _respond(result, format, streaming.upload_events, stage_timings, timings, headers, accept)
+    # FUNCTION CALL: _respond() - JSON / MessagePack body (or NDJSON stream), serialization timed
+
+
+def _respond(result, format, events, stage_timings, include_timings, headers=None, accept=None):
+    """
+    Encode an analysis result as JSON or MessagePack (per Accept), or NDJSON via events(result)
+    include_timings: add stage_timings under "timings" (a copy - cached results stay untouched)
+    Encoding is recorded as the "serialize" stage on /metrics; it can't
+    be part of the body it produces
+    """
+    if include_timings:
+        result = dict(result, timings=stage_timings.as_dict())
+    if format == "ndjson":
+        return streaming.ndjson_response(events(result), headers=headers)
+    start = time.perf_counter()
+    media_type = encoding.negotiate(accept)
+    body = encoding.encode(result, media_type)
+    response = Response(content=body, media_type=media_type, headers=dict(headers or {}, Vary="Accept"))
+    metrics.record_stage(stage_timings, 'serialize', time.perf_counter() - start)
+    return response
 
-    # ════════════════════════════════════════════════════════════════════
-    # STEP 2: EXTRACT ZIP FILE
-    # ════════════════════════════════════════════════════════════════════
-    # Location: Line 105-108
-    
-    repo_root = extract_zip_to_temp(local_zip)
-    # FUNCTION CALL: extract_zip_to_temp()
-    #   Source: utils.py:1-10
-    #   Parameter: local_zip = "/tmp/[uuid].zip"
-    #   Returns: temp_directory path (e.g., /tmp/legacymap_abc123/)
-    #   Actions: Creates temp folder, extracts all ZIP contents
-    #   Uses internally: tempfile.mkdtemp(), zipfile.ZipFile.extractall()
 
+def _check_format(format):
+    if format not in ("json", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be json or ndjson")
+
+
+def _check_view(view, fields, node_fields):
+    """
+    Validate view= / fields= before any work is done
+    Returns: parsed fields tuple, or None
+    """
+    if view not in encoding.VIEWS:
+        raise HTTPException(status_code=400, detail="view must be one of " + ", ".join(encoding.VIEWS))
     try:
+        return encoding.parse_fields(fields, node_fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _count_scanned(records):
+    metrics.count('files', len(records))
+    metrics.count('bytes', sum(rec['bytes'] for rec in records))
+
+
+def analyze_zip_cached(zip_source, in_archive=False):
+    """
+    analyze_zip() behind the content-addressed result cache
+    Identical archives (same SHA-256) return the stored result without re-scanning
+    Returns: (result dict, cache_status)
+    """
+    if not result_cache.enabled():
+        return analyze_zip(zip_source, in_archive), "BYPASS"
+    
+    with metrics.stage('cache_lookup'):
+        # Non-default LEGACYMAP_RISK_WEIGHTS change the result, so they're part of the key
+        cache_key = result_cache.make_key(sha256_file(zip_source), "upload" + risk.weights_tag(risk.WEIGHTS))
+        result = result_cache.get(cache_key)
+    if result is not None:
+        return result, "HIT"
+    
+    result = analyze_zip(zip_source, in_archive)
+    with metrics.stage('cache_store'):
+        result_cache.put(cache_key, result)
+    return result, "MISS"
+
+
+def analyze_zip(zip_source, in_archive=False):
+    """
+    STEPS 2-10 OF /upload (blocking - call from a worker thread or job)
+    zip_source: path or seekable file object of the uploaded ZIP
+    Returns: result dict (summary, nodes, edges, components)
+    """
+
+    zf = None
+    # zipfile.ZipFile handle when scanning in-archive, None when extracting
+
+    if in_archive:
+        # IN-ARCHIVE MODE: open the ZIP and scan members from it.
+        # Nothing is written to /tmp and nothing is extracted.
+        with metrics.stage('open_archive'):
+            zf = open_upload_zip(zip_source)
+        repo_root = ARCHIVE_ROOT
+    else:
         # ════════════════════════════════════════════════════════════════════
-        # STEP 3: INITIALIZE DATA STRUCTURES
-        # ════════════════════════════════════════════════════════════════════
-        # Location: Line 110-120
-        
-        # Dictionary to store node metadata
-        nodes = {}
-        # KEY: file path (e.g., "services/userService.js")
-        # VALUE: {"path": str, "loc": int, "imports": list, "risk": float, ...}
-        
-        # Directed graph for dependencies (file A imports file B)
-        graph = defaultdict(list)    # from -> [to,...]
-        # CLASS: defaultdict(list)
-        # KEY: source file path
-        # VALUE: list of target files it imports
-        # Example: graph["index.js"] = ["utils/logger.js", "services/user.js"]
-        
-        # Reverse mapping for quick lookup (which files import me?)
-        reverse = defaultdict(list)  # to -> [from,...]
-        # CLASS: defaultdict(list)
-        # KEY: target file path
-        # VALUE: list of files that import this file
-        # Example: reverse["utils/logger.js"] = ["index.js", "userService.js"]
-        
-        total_loc = 0
-        # Integer: Sum of all lines of code across all files
-        
-        file_list = []
-        # List: tuples of (full_path, relative_path) for all source files
-        
-        # ════════════════════════════════════════════════════════════════════
-        # STEP 3A: DISCOVER ALL SOURCE FILES
+        # STEP 2: EXTRACT ZIP FILE
         # ════════════════════════════════════════════════════════════════════
-        # Location: Line 121-130
+        # Location: Line 105-108
         
-        for root, dirs, files in os.walk(repo_root):
-            # FUNCTION: os.walk() - recursive directory traversal
-            # Yields: (root_path, subdirs, files_in_root)
-            # Purpose: Walk through all directories in extracted repo
-            
-            for fname in files:
-                # Loop through each file in current directory
-                
-                full = os.path.join(root, fname)
-                # FUNCTION: os.path.join() - create full path
-                # Result: /tmp/legacymap_xyz/services/userService.js
-                
-                rel = os.path.relpath(full, repo_root)
-                # FUNCTION: os.path.relpath() - create relative path
-                # Result: services/userService.js (relative to repo root)
-                
-                if is_source_file(full):
-                    # FUNCTION CALL: is_source_file()
-                    #   Source: scanner.py:1-8
-                    #   Input: full path
-                    #   Returns: True if ends with .js, .ts, or .py
-                    #   Called: Line 127
-                    
-                    file_list.append((full, rel))
-                    # Store tuple: (full_path, relative_path)
+        with metrics.stage('extract'):
+            repo_root = extract_zip_to_temp(zip_source)
+        # FUNCTION CALL: extract_zip_to_temp()
+        #   Source: utils.py:1-10
+        #   Parameter: zip_source = uploaded ZIP (path or file object)
+        #   Returns: temp_directory path (e.g., /tmp/legacymap_abc123/)
+        #   Actions: Creates temp folder, extracts all ZIP contents
+        #   Uses internally: tempfile.mkdtemp(), zipfile.ZipFile.extractall()
 
+    try:
+        with metrics.stage('scan'):
+            if zf is not None:
+                records = scan_archive(zf, functions=False)
+            else:
+                records = scan_directory(repo_root, functions=False)
+        _count_scanned(records)
+        # FUNCTION CALL: scan_archive() / scan_directory()
+        #   Source: analysis.py
+        #   Returns: list of {"path", "loc", "imports_raw", "functions_classes", "sha256", "bytes"}
+        #   functions=False: /upload doesn't report functions, skip extracting them
+
+        return analyze_repo(records, repo_root)
+        # FUNCTION CALL: analyze_repo() - steps 3-9 below
+    finally:
         # ════════════════════════════════════════════════════════════════════
-        # STEP 3B: BUILD METADATA FOR EACH FILE
+        # STEP 10: CLEANUP TEMPORARY FILES
         # ════════════════════════════════════════════════════════════════════
-        # Location: Line 131-149
+        # Location: Line 251-260
+        # Purpose: Free up disk space, remove temporary files
+
+        if zf is not None:
+            # In-archive: nothing on disk, just close the ZIP handle
+            zf.close()
+        else:
+            with metrics.stage('cleanup'):
+                cleanup(repo_root)
+            # FUNCTION CALL: cleanup()
+            #   Source: utils.py:12-17
+            #   Input: repo_root = temporary directory path
+            #   Action: Recursively delete directory and all contents
+            #   Uses: shutil.rmtree()
+
+def analyze_repo(records, repo_root):
+    """
+    STEPS 3-9 OF /upload: graph, counts, risk and components from per-file records
+    Shared by uploaded ZIPs and server-local directories (/analyze-local, CLI)
+    repo_root: directory the record paths are relative to (ARCHIVE_ROOT in-archive)
+    Returns: result dict (summary, nodes, edges, components)
+    """
+    stopwatch = metrics.Stopwatch()
+    # CLASS INSTANCE: metrics.Stopwatch - lap() closes one timed stage
+    
+    # ════════════════════════════════════════════════════════════════════
+    # STEP 3: INITIALIZE DATA STRUCTURES
+    # ════════════════════════════════════════════════════════════════════
+    # Location: Line 110-120
+    
+    # Dictionary to store node metadata
+    nodes = {}
+    # KEY: file path (e.g., "services/userService.js")
+    # VALUE: {"path": str, "loc": int, "imports": list, "risk": float, ...}
+    
+    # Dependency pairs (file A imports file B), turned into a compact
+    # DependencyGraph once all imports are resolved (Step 4)
+    edge_pairs = []
+    # List: (from_path, to_path) tuples
+    # Example: [("index.js", "utils/logger.js"), ("index.js", "services/user.js")]
+    
+    total_loc = 0
+    # Integer: Sum of all lines of code across all files
+    
+    # ════════════════════════════════════════════════════════════════════
+    # STEP 3A+3B: SCAN EVERY SOURCE FILE ONCE
+    # ════════════════════════════════════════════════════════════════════
+    # Each file was read exactly once; LOC, raw imports and content hash
+    # all come out of the same per-file record.
+    
+    # (records come from scan_archive() / scan_directory() in the caller)
+
+    resolve_import = scanner.make_import_resolver({rec['path'] for rec in records}, repo_root)
+    # FUNCTION CALL: make_import_resolver()
+    #   Source: scanner.py
+    #   Snapshot of all source paths, taken once; resolving imports never
+    #   touches the filesystem and repeats are memoized per (from_dir, import)
+    
+    for rec in records:
+        # Loop through each source file record
         
-        for full, rel in file_list:
-            # Loop through each source file
-            
-            lines = read_file_lines(full)
-            # FUNCTION CALL: read_file_lines()
-            #   Source: scanner.py:10-15
-            #   Input: full path to file
-            #   Returns: list of strings (each line)
-            #   Called: Line 134
-            
-            loc = count_loc(lines)
-            # FUNCTION CALL: count_loc()
-            #   Source: scanner.py:17-22
-            #   Input: lines (list of strings)
-            #   Returns: integer (non-empty, non-comment lines)
-            #   Logic: Filters out blank lines and comments
-            #   Example: 15 lines total, 3 are comments → returns 12
-            #   Called: Line 135
+        rel = rec['path']
+        
+        nodes[rel] = {
+            # Store metadata in nodes dictionary
+            "path": rel,
+            # Relative file path
             
-            imps = extract_imports(lines)
-            # FUNCTION CALL: extract_imports()
-            #   Source: scanner.py:24-35
-            #   Input: lines (list of strings)
-            #   Returns: list of import paths
-            #   Logic: Regex patterns for require() and import statements
-            #   Example: ["./utils/logger", "../services/user"]
-            #   Called: Line 136
+            "loc": rec['loc'],
+            # Lines of code count
             
-            nodes[rel] = {
-                # Store metadata in nodes dictionary
-                "path": rel,
-                # Relative file path
-                
-                "loc": loc,
-                # Lines of code count
-                
-                "imports_raw": imps,
-                # Raw import paths (not yet normalized)
-                
-                "imports": []
-                # Will be filled with normalized paths in Step 4
-            }
+            "imports_raw": rec['imports_raw'],
+            # Raw import paths (not yet normalized)
             
-            total_loc += loc
-            # Accumulate total LOC across all files
+            "imports": []
+            # Will be filled with normalized paths in Step 4
+        }
+        
+        total_loc += rec['loc']
+        # Accumulate total LOC across all files
 
-        # ════════════════════════════════════════════════════════════════════
-        # STEP 4: NORMALIZE IMPORTS & BUILD DEPENDENCY GRAPH
-        # ════════════════════════════════════════════════════════════════════
-        # Location: Line 150-170
-        # Purpose: Convert relative paths to actual file paths and create edges
+    # ════════════════════════════════════════════════════════════════════
+    # STEP 4: NORMALIZE IMPORTS & BUILD DEPENDENCY GRAPH
+    # ════════════════════════════════════════════════════════════════════
+    # Location: Line 150-170
+    # Purpose: Convert relative paths to actual file paths and create edges
+    
+    for rec in records:
+        # Loop through each source file record again (no re-read)
+        
+        rel = rec['path']
+        
+        normalized = []
+        seen = set()
+        # List to store normalized import paths (each target once, like /upload-analyze:
+        # 'from pkg import a, b' gives one raw import per name)
         
-        for full, rel in file_list:
-            # Loop through each source file again
+        for imp in rec['imports_raw']:
+            # Loop through each import statement
+            # Example: imp = "./utils/logger"
             
-            lines = read_file_lines(full)
-            # Re-read file lines
+            normalized_path = resolve_import(imp, rel)
+            # FUNCTION CALL: resolve_import() (same rules as normalize_import_path)
+            #   Source: scanner.py
+            #   Parameters:
+            #     - imp: relative import path (e.g., "./utils/logger")
+            #     - rel: current file's repo-relative path
+            #   Returns: actual file path or external package name
+            #   Logic: Matches relative path to actual files in project
+            #   Example: "./utils/logger" → "utils/logger.js"
+            #   Called: Line 159
             
-            imps = extract_imports(lines)
-            # Re-extract imports
+            if normalized_path in seen:
+                continue
+            seen.add(normalized_path)
+            # Already counted for this file
             
-            normalized = []
-            # List to store normalized import paths
+            normalized.append(normalized_path)
+            # Add to normalized list
             
-            for imp in imps:
-                # Loop through each import statement
-                # Example: imp = "./utils/logger"
+            # Add edge to dependency graph if it points to a known file
+            if normalized_path in nodes:
+                # Check if normalized path is a file in our project
                 
-                normalized_path = normalize_import_path(imp, os.path.join(repo_root, rel), repo_root)
-                # FUNCTION CALL: normalize_import_path()
-                #   Source: scanner.py:37-45
-                #   Parameters:
-                #     - imp: relative import path (e.g., "./utils/logger")
-                #     - from_file: current file's path
-                #     - repo_root: project root directory
-                #   Returns: actual file path or external package name
-                #   Logic: Matches relative path to actual files in project
-                #   Example: "./utils/logger" → "utils/logger.js"
-                #   Called: Line 159
-                
-                normalized.append(normalized_path)
-                # Add to normalized list
-                
-                # Add edge to dependency graph if it points to a known file
-                if normalized_path in nodes:
-                    # Check if normalized path is a file in our project
-                    
-                    graph[rel].append(normalized_path)
-                    # Add edge: rel → normalized_path
-                    # Meaning: current file imports normalized_path
-                    # Example: graph["index.js"] = ["utils/logger.js", ...]
-                    
-                    reverse[normalized_path].append(rel)
-                    # Add reverse edge: who imports this file?
-                    # Meaning: normalized_path is imported by rel
-                    # Example: reverse["utils/logger.js"] = ["index.js", ...]
-            
-            nodes[rel]['imports'] = normalized
-            # Store normalized imports in nodes dictionary
-
-        # ════════════════════════════════════════════════════════════════════
-        # STEP 5: COMPUTE DEPENDENCY COUNTS
-        # ════════════════════════════════════════════════════════════════════
-        # Location: Line 171-179
-        # Purpose: Calculate how many other files depend on each file
+                edge_pairs.append((rel, normalized_path))
+                # Add edge: rel → normalized_path
+                # Meaning: current file imports normalized_path
         
-        for k in nodes.keys():
-            # Loop through all files
-            
-            nodes[k]['imported_by_count'] = len(reverse.get(k, []))
-            # Count: How many files import this file?
-            # reverse[k] = list of files that import file k
-            # len() = count of importers
-            # .get(k, []) = return empty list if not found
-            
-            nodes[k]['imports_count'] = len(nodes[k]['imports'])
-            # Count: How many files does this file import?
-            # nodes[k]['imports'] = list of imports from this file
-            # len() = count of imports
+        nodes[rel]['imports'] = normalized
+        # Store normalized imports in nodes dictionary
+    stopwatch.lap('resolve_imports')
 
-        # ════════════════════════════════════════════════════════════════════
-        # STEP 6: CALCULATE RISK SCORES
-        # ════════════════════════════════════════════════════════════════════
-        # Location: Line 180-191
-        # Purpose: Assign risk score to each file based on complexity & dependencies
-        
-        for k, meta in nodes.items():
-            # Loop through all files with their metadata
-            
-            # RISK FORMULA (simplified for MVP):
-            # risk = (loc/10) + (imported_by_count * 3) + (imports_count * 2)
-            #
-            # Breakdown:
-            # - (loc/10): Larger files are riskier
-            #   Example: 100 LOC → 10 points
-            #
-            # - (imported_by_count * 3): If many files depend on you, breaking you breaks many
-            #   Example: 3 files import you → 9 points (HIGH RISK!)
-            #   Reason: Single point of failure
-            #
-            # - (imports_count * 2): If you import many files, you're tightly coupled
-            #   Example: 5 imports → 10 points
-            #   Reason: Complexity and potential cascading failures
-            
-            risk = (meta['loc'] / 10.0) + (meta['imported_by_count'] * 3.0) + (meta['imports_count'] * 2.0)
-            
-            # Round to 2 decimal places
-            nodes[k]['risk'] = round(risk, 2)
-            
-            # Example calculation:
-            # File: utils/logger.js
-            #   loc = 4 → 4/10 = 0.4
-            #   imported_by = 3 → 3*3 = 9
-            #   imports = 0 → 0*2 = 0
-            #   risk = 0.4 + 9 + 0 = 9.4 ← VERY RISKY!
+    graph = build_graph(list(nodes.keys()), edge_pairs)
+    # FUNCTION CALL: build_graph()
+    #   Source: graph.py
+    #   Returns: DependencyGraph - node i = i-th file, forward + reverse CSR arrays
+    #   The only copy of the graph; counts, edges list and SCCs all read from it
+    edge_pairs = None
+    stopwatch.lap('graph_build')
 
-        # ════════════════════════════════════════════════════════════════════
-        # STEP 7: BUILD EDGES LIST & IDENTIFY TOP RISKY FILES
-        # ════════════════════════════════════════════════════════════════════
-        # Location: Line 192-210
+    # ════════════════════════════════════════════════════════════════════
+    # STEP 5: COMPUTE DEPENDENCY COUNTS
+    # ════════════════════════════════════════════════════════════════════
+    # Location: Line 171-179
+    # Purpose: Calculate how many other files depend on each file
+    
+    for i, k in enumerate(graph.paths):
+        # Loop through all files (node id i, path k)
         
-        # Build edges list for visualization/analysis
-        edges = []
-        # List of dictionaries: [{"from": A, "to": B}, ...]
+        nodes[k]['imported_by_count'] = graph.in_degree(i)
+        # Count: How many files import this file?
+        # in_degree(i) = length of node i's slice in the reverse CSR
         
-        for src, tos in graph.items():
-            # Loop through dependency graph
-            # src = source file
-            # tos = list of target files it imports
-            
-            for t in tos:
-                # For each target file
-                
-                edges.append({"from": src, "to": t})
-                # Add edge to list
-                # Meaning: src imports t
+        nodes[k]['imports_count'] = len(nodes[k]['imports'])
+        # Count: How many files does this file import?
+        # nodes[k]['imports'] = list of imports from this file
+        # len() = count of imports
+
+    # ════════════════════════════════════════════════════════════════════
+    # STEP 6: CALCULATE RISK SCORES
+    # ════════════════════════════════════════════════════════════════════
+    # Location: Line 180-191
+    # Purpose: Assign risk score to each file based on complexity & dependencies
+    
+    scores = risk.score(
+        graph,
+        [nodes[k]['loc'] for k in graph.paths],
+        [nodes[k]['imports_count'] for k in graph.paths],
+    )
+    # FUNCTION CALL: risk.score()
+    #   Source: risk.py
+    #   Weighted sum of per-node signals over the whole node index at once
+    #   (NumPy arrays when installed); weights from LEGACYMAP_RISK_WEIGHTS
+    #   Returns: list of scores by node id, rounded to 2 decimal places
+    
+    for k, value in zip(graph.paths, scores):
+        # Loop through all files with their score
+        
+        # RISK FORMULA (default weights):
+        # risk = (loc/10) + (imported_by_count * 3) + (imports_count * 2)
+        #
+        # Breakdown:
+        # - (loc/10): Larger files are riskier
+        #   Example: 100 LOC → 10 points
+        #
+        # - (imported_by_count * 3): If many files depend on you, breaking you breaks many
+        #   Example: 3 files import you → 9 points (HIGH RISK!)
+        #   Reason: Single point of failure
+        #
+        # - (imports_count * 2): If you import many files, you're tightly coupled
+        #   Example: 5 imports → 10 points
+        #   Reason: Complexity and potential cascading failures
+        #
+        # Optional extra signals (weight 0 by default): pagerank, betweenness,
+        # in_cycle - see risk.py
         
-        # Sort all files by risk score (highest first)
-        sorted_nodes = sorted(nodes.values(), key=lambda x: x['risk'], reverse=True)
-        # FUNCTION: sorted()
-        # Parameter: nodes.values() (all node dictionaries)
-        # Key: lambda x: x['risk'] (sort by risk field)
-        # reverse=True: highest risk first
-        # Returns: list of nodes sorted by risk score
+        nodes[k]['risk'] = value
         
-        # Get top 5 riskiest files
-        top5 = sorted_nodes[:5]
-        # Slice: First 5 elements (or fewer if < 5 files)
+        # Example calculation:
+        # File: utils/logger.js
+        #   loc = 4 → 4/10 = 0.4
+        #   imported_by = 3 → 3*3 = 9
+        #   imports = 0 → 0*2 = 0
+        #   risk = 0.4 + 9 + 0 = 9.4 ← VERY RISKY!
 
-        # ════════════════════════════════════════════════════════════════════
-        # STEP 8: IDENTIFY CONNECTED COMPONENTS
-        # ════════════════════════════════════════════════════════════════════
-        # Location: Line 211-225
-        # Purpose: Find clusters of tightly-coupled code
+    # ════════════════════════════════════════════════════════════════════
+    # STEP 7: BUILD EDGES LIST & IDENTIFY TOP RISKY FILES
+    # ════════════════════════════════════════════════════════════════════
+    # Location: Line 192-210
+    
+    # Build edges list for visualization/analysis
+    edges = []
+    # List of dictionaries: [{"from": A, "to": B}, ...]
+    
+    paths = graph.paths
+    for src, t in graph.edges():
+        # Loop through dependency graph (node ids, grouped by source)
         
-        # Create networkx directed graph for analysis
-        G = nx.DiGraph()
-        # CLASS: networkx.DiGraph (Directed Graph)
-        # Purpose: Represent code dependencies as a graph
-        # Properties: Nodes=files, Edges=dependencies
+        edges.append({"from": paths[src], "to": paths[t]})
+        # Add edge to list
+        # Meaning: src imports t
+    
+    # Get top 5 riskiest files (highest first)
+    top5 = [nodes[paths[i]] for i in risk.top_k(scores, 5)]
+    # FUNCTION: risk.top_k()
+    # Partial selection of the 5 highest scores - no full sort of every node
+    # Ties keep file order, exactly like a stable sorted(..., reverse=True)
+    stopwatch.lap('risk')
+
+    # ════════════════════════════════════════════════════════════════════
+    # STEP 8: IDENTIFY CONNECTED COMPONENTS
+    # ════════════════════════════════════════════════════════════════════
+    # Location: Line 211-225
+    # Purpose: Find clusters of tightly-coupled code
+    
+    try:
+        # Find strongly connected components (circular dependencies)
+        comps = graph.strongly_connected_components()
+        # METHOD: DependencyGraph.strongly_connected_components()
+        # Iterative Tarjan over the CSR arrays, O(files + edges)
+        # Returns: List of lists of node ids, each = strongly connected component
+        # Meaning: Files that can reach each other through dependencies
         
-        # Add all files as nodes
-        for n in nodes.keys():
-            G.add_node(n)
-            # METHOD: add_node()
-            # Adds a node (file) to the graph
+        # Build summary of components (size > 1)
+        comp_summary = [
+            {"size": len(c), "members_sample": [paths[i] for i in sorted(c)[:5]]}
+            for c in comps
+            if len(c) > 1
+        ]
+        # List comprehension: Extract meaningful components
+        # Filters: Only components with 2+ members (circular deps)
         
-        # Add all dependencies as edges
-        for e in edges:
-            G.add_edge(e['from'], e['to'])
-            # METHOD: add_edge()
-            # Adds directed edge from 'from' to 'to'
-            # Meaning: 'from' depends on 'to'
+    except Exception as ex:
+        # If graph analysis fails, return empty
+        comp_summary = []
+    stopwatch.lap('components')
+
+    # ════════════════════════════════════════════════════════════════════
+    # STEP 9: BUILD FINAL JSON RESPONSE
+    # ════════════════════════════════════════════════════════════════════
+    # Location: Line 226-250
+    
+    result = {
+        # Main response object
         
-        try:
-            # Find strongly connected components (circular dependencies)
-            comps = list(nx.strongly_connected_components(G))
-            # METHOD: nx.strongly_connected_components()
-            # Returns: List of sets, each set = strongly connected component
-            # Meaning: Files that can reach each other through dependencies
+        "summary": {
+            # High-level overview of the analysis
             
-            # Build summary of components (size > 1)
-            comp_summary = [
-                {"size": len(c), "members_sample": list(c)[:5]}
-                for c in comps
-                if len(c) > 1
-            ]
-            # List comprehension: Extract meaningful components
-            # Filters: Only components with 2+ members (circular deps)
+            "total_files": len(nodes),
+            # Count: Total source files analyzed
             
-        except Exception as ex:
-            # If graph analysis fails, return empty
-            comp_summary = []
-
-        # ════════════════════════════════════════════════════════════════════
-        # STEP 9: BUILD FINAL JSON RESPONSE
-        # ════════════════════════════════════════════════════════════════════
-        # Location: Line 226-250
-        
-        result = {
-            # Main response object
+            "total_loc": total_loc,
+            # Count: Total lines of code across all files
             
-            "summary": {
-                # High-level overview of the analysis
-                
-                "total_files": len(nodes),
-                # Count: Total source files analyzed
-                
-                "total_loc": total_loc,
-                # Count: Total lines of code across all files
+            "top_5_risky": [
+                # List: Top 5 riskiest files
                 
-                "top_5_risky": [
-                    # List: Top 5 riskiest files
+                {
+                    "path": x['path'],
+                    # File path relative to project root
                     
-                    {
-                        "path": x['path'],
-                        # File path relative to project root
-                        
-                        "risk": x['risk'],
-                        # Risk score (0-100+)
-                        
-                        "loc": x['loc'],
-                        # Lines of code
-                        
-                        "imported_by": x['imported_by_count']
-                        # Count of files that import this file
-                    }
-                    for x in top5
-                    # Loop through top 5 files
-                ]
-            },
-            
-            "nodes": nodes,
-            # Complete data for all files
-            # Each node contains: path, loc, imports, imported_by_count, risk, etc.
-            
-            "edges": edges,
-            # List of dependencies: [{"from": A, "to": B}, ...]
-            # Represents: Which files depend on which
-            
-            "components": comp_summary
-            # Clusters of circularly-dependent code
-            # Indicates: Areas of tight coupling
-        }
+                    "risk": x['risk'],
+                    # Risk score (0-100+)
+                    
+                    "loc": x['loc'],
+                    # Lines of code
+                    
+                    "imported_by": x['imported_by_count']
+                    # Count of files that import this file
+                }
+                for x in top5
+                # Loop through top 5 files
+            ]
+        },
         
-        return JSONResponse(content=result)
-        # CLASS: JSONResponse (from fastapi.responses)
-        # Purpose: Return JSON data to client
-        # Default status: 200 OK
-    finally:
-        # ════════════════════════════════════════════════════════════════════
-        # STEP 10: CLEANUP TEMPORARY FILES
-        # ════════════════════════════════════════════════════════════════════
-        # Location: Line 251-260
-        # Purpose: Free up disk space, remove temporary files
+        "nodes": nodes,
+        # Complete data for all files
+        # Each node contains: path, loc, imports, imported_by_count, risk, etc.
         
-        cleanup(repo_root)
-        # FUNCTION CALL: cleanup()
-        #   Source: utils.py:12-17
-        #   Input: repo_root = temporary directory path
-        #   Action: Recursively delete directory and all contents
-        #   Uses: shutil.rmtree()
+        "edges": edges,
+        # List of dependencies: [{"from": A, "to": B}, ...]
+        # Represents: Which files depend on which
         
-        try:
-            # Attempt to remove temporary ZIP file
-            os.remove(local_zip)
-            # FUNCTION: os.remove()
-            # Removes: The temporary ZIP file we saved earlier
-            
-        except:
-            # Ignore errors if file doesn't exist or can't be deleted
-            pass
+        "components": comp_summary
+        # Clusters of circularly-dependent code
+        # Indicates: Areas of tight coupling
+    }
+    
+    return result
+
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # END OF APPLICATION
@@ -605,7 +705,7 @@ async def upload_zip(file: UploadFile = File(...)):
 #
 #  User Upload (ZIP)
 #       ↓
-#  [Step 1] Validate & Save ZIP
+#  [Step 1] Validate ZIP (rest runs in a worker thread: analyze_zip)
 #       ↓
 #  [Step 2] Extract to /tmp/legacymap_xyz/
 #       ↓
@@ -636,117 +736,542 @@ async def upload_zip(file: UploadFile = File(...)):
 # NEW ENDPOINTS FOR FUNCTION/CLASS DETAILS
 # ═══════════════════════════════════════════════════════════════════════════════
 
-# Store uploaded repo paths for later queries (in production use database)
-_uploaded_repos = {}
+# Uploaded repos (extracted tree + per-file records) live in repo_store,
+# bounded by LEGACYMAP_REPO_MAX_ENTRIES / _MAX_BYTES / _TTL_SECONDS
 
 @app.post("/upload-analyze")
-async def upload_and_analyze(file: UploadFile = File(...)):
+async def upload_and_analyze(file: UploadFile = File(...), in_archive: bool = False, format: str = "json", timings: bool = False,
+                             view: str = "full", fields: str = None, accept: str = Header(None)):
     """
     Upload ZIP and return detailed analysis with function/class information
     Response includes line numbers and metadata for each function/class
+    in_archive=true: scan straight from the ZIP and only materialize source
+    files (needed later by /function-details)
+    format=ndjson: stream summary/node/edge/risky lines instead of one JSON document
+    timings=true: add per-stage durations and file/byte counts under "timings"
+    view=summary|graph|full, fields=..., Accept: same as /upload
+    """
+    _check_format(format)
+    node_fields = _check_view(view, fields, encoding.DETAILED_NODE_FIELDS)
+    # Blocking analysis runs in a worker thread, reading the spooled upload directly
+    result, stage_timings = await run_in_threadpool(
+        metrics.collect, "/upload-analyze", analyze_zip_detailed, file.file, in_archive)
+    result = encoding.select(result, view, node_fields)
+    return _respond(result, format, streaming.detailed_events, stage_timings, timings, accept=accept)
+
+
+def analyze_zip_detailed(zip_source, in_archive=False):
+    """
+    Body of /upload-analyze (blocking - call from a worker thread or job)
+    zip_source: path or seekable file object of the uploaded ZIP
+    Registers the extracted tree under a new repo_id for /function-details
     """
-    local_zip = f"/tmp/{uuid.uuid4()}.zip"
+    zf = None
+    repo_root = None
     
     try:
-        # Save uploaded file
-        with open(local_zip, "wb") as f:
-            f.write(await file.read())
-        
-        # Extract ZIP
-        repo_root = extract_zip_to_temp(local_zip)
+        if in_archive:
+            # Scan members from the upload, extract only source files
+            with metrics.stage('extract'):
+                zf = open_upload_zip(zip_source)
+                sources = list_archive_sources(zf)
+                repo_root = extract_zip_members(zf, [(member, rel) for rel, member in sources])
+            with metrics.stage('scan'):
+                records = scan_archive(zf)
+        else:
+            # Extract ZIP
+            with metrics.stage('extract'):
+                repo_root = extract_zip_to_temp(zip_source)
+            with metrics.stage('scan'):
+                records = scan_directory(repo_root)
+        _count_scanned(records)
         repo_id = str(uuid.uuid4())
-        _uploaded_repos[repo_id] = repo_root
+        result = _detailed_result(repo_id, repo_root, records)
+        _store_repo(repo_id, repo_root, records, result)
         
-        # Initialize structures
-        nodes = {}
-        functions_by_file = {}
+        return result
+    
+    except:
+        # Not registered in the repo store, so nothing else would delete the tree
+        if repo_root is not None:
+            cleanup(repo_root)
+        raise
+    
+    finally:
+        if zf is not None:
+            zf.close()
+
+
+def reanalyze_zip_detailed(zip_source, base_repo_id):
+    """
+    Incremental /upload-analyze against a previous upload (blocking)
+    Only files whose content hash is new are scanned; everything else reuses
+    the base repo's per-file records (and, while the base tree is on disk, its
+    files via hard links). Graph and risk are rebuilt from records.
+    Registers the new tree under a new repo_id
+    """
+    base = _get_repo(base_repo_id)
+    if base is None:
+        raise HTTPException(status_code=404, detail="Repository not found")
+    previous = base['records']
+    
+    repo_root = None
+    try:
+        with open_upload_zip(zip_source) as zf:
+            with metrics.stage('scan'):
+                records, changes = scan_archive_incremental(zf, previous)
+            with metrics.stage('extract'):
+                # Files unchanged at the same path are hard-linked from the base
+                # repo's extracted tree; only new content is written from the ZIP
+                repo_root = tempfile.mkdtemp(prefix="legacymap_")
+                sources = list_archive_sources(zf)
+                linked = set()
+                if base['root'] is not None and base['owned']:
+                    fresh = set(changes['added']) | set(changes['changed'])
+                    linked = link_files(base['root'], repo_root, [rel for rel, _ in sources if rel not in fresh])
+                extract_zip_members(zf, [(member, rel) for rel, member in sources if rel not in linked], root=repo_root)
+        _count_scanned(records)
         
-        # Find all source files
-        source_files = []
-        for root, dirs, files in os.walk(repo_root):
-            for f in files:
-                if scanner.is_source_file(f):
-                    full_path = os.path.join(root, f)
-                    rel_path = os.path.relpath(full_path, repo_root)
-                    source_files.append((rel_path, full_path))
-                    
-                    # Extract functions/classes for this file
-                    functions_classes = extract_functions_and_classes(full_path)
-                    functions_by_file[rel_path] = functions_classes
+        repo_id = str(uuid.uuid4())
+        result = _detailed_result(repo_id, repo_root, records)
+        _store_repo(repo_id, repo_root, records, result)
+    except:
+        # Not registered in the repo store, so nothing else would delete the tree
+        if repo_root is not None:
+            cleanup(repo_root)
+        raise
+    
+    result['base_repo_id'] = base_repo_id
+    result['changes'] = changes
+    return result
+
+
+def _store_repo(repo_id, repo_root, records, result, owned=True):
+    """
+    Keep tree, records, symbol index, node/edge lists and call graph for later queries
+    owned=False: repo_root isn't ours (local directory), never delete it
+    With the SQLite store enabled the analysis (sources included) is also
+    persisted, and an owned extracted tree is deleted right away
+    """
+    graph = {
+        'nodes': [dict(meta, path=path) for path, meta in result['nodes'].items()],
+        'edges': result['edges']
+    }
+    with metrics.stage('symbol_index'):
+        symbols = build_symbol_index(records)
+    with metrics.stage('call_graph'):
+        call_graph = build_call_graph(records, result['edges'])
+    with metrics.stage('reachability'):
+        # Condensation DAG now; transitive closures on the first /impact query
+        graph['reachability'] = Reachability(build_graph(
+            list(result['nodes']), ((e['source'], e['target']) for e in result['edges'])))
+    if sqlite_store.enabled():
+        with metrics.stage('persist'):
+            try:
+                sqlite_store.save(repo_id, repo_root, records, graph['nodes'], result['edges'])
+                persisted = True
+            except sqlite_store.Error as e:
+                # Not fatal: the repo is still served from memory and its tree
+                print(f"[WARN] Could not persist {repo_id}: {e}")
+                persisted = False
+        if persisted and owned:
+            # Sources now come from the database; the tree isn't needed
+            cleanup(repo_root)
+            repo_root, owned = None, False
+    with metrics.stage('store'):
+        repo_store.add(repo_id, repo_root, records, symbols, graph, owned=owned, call_graph=call_graph)
+
+
+async def _find_repo(repo_id):
+    """Stored repo by id (see _get_repo); a database restore runs off the event loop"""
+    repo = repo_store.get(repo_id)
+    if repo is None and sqlite_store.enabled():
+        repo = await run_in_threadpool(_get_repo, repo_id)
+    return repo
+
+
+def _get_repo(repo_id):
+    """
+    Stored repo by id: from memory, else restored from the SQLite store
+    (after a restart or eviction) and kept in memory again
+    Returns: repo_store entry, or None if unknown
+    """
+    repo = repo_store.get(repo_id)
+    if repo is not None or not sqlite_store.enabled():
+        return repo
+    data = sqlite_store.load(repo_id)
+    if data is None:
+        return None
+    
+    records, edges = data['records'], data['edges']
+    symbols = {
+        'calls': sqlite_store.SymbolLookup(repo_id, 'calls'),
+        'definitions': sqlite_store.SymbolLookup(repo_id, 'definitions'),
+    }
+    graph = {
+        'nodes': data['nodes'],
+        'edges': edges,
+        'reachability': Reachability(build_graph(
+            [n['path'] for n in data['nodes']], ((e['source'], e['target']) for e in edges))),
+    }
+    call_graph = build_call_graph(records, edges)
+    # No tree on disk: sources are read from the database
+    return repo_store.add(repo_id, None, records, symbols, graph, owned=False, call_graph=call_graph)
+
+
+def _source_lines(repo, file_path):
+    """
+    Lines of one source file of a stored repo: from its tree when it still
+    has one, else from the SQLite store
+    Returns: list of lines, or None if the file isn't there
+    """
+    if repo['root'] is not None:
+        full_file_path = os.path.join(repo['root'], file_path)
+        return scanner.read_file_lines(full_file_path) if os.path.isfile(full_file_path) else None
+    if sqlite_store.enabled():
+        return sqlite_store.source_lines(repo['repo_id'], file_path)
+    return None
+
+
+def _detailed_result(repo_id, repo_root, records):
+    """
+    Graph, counts and risk for /upload-analyze, built from per-file records
+    Cheap compared to scanning, so incremental re-analysis just re-runs it
+    """
+    stopwatch = metrics.Stopwatch()
+    
+    # Build nodes (one record per source file, each file read once)
+    nodes = {}
+    for rec in records:
+        nodes[rec['path']] = {
+            'loc': rec['loc'],
+            'imports': [],
+            'imported_by': [],
+            'imports_count': 0,
+            'imported_by_count': 0,
+            'risk': 0,
+            'functions_classes': rec['functions_classes']
+        }
+    
+    # Dependency pairs, turned into a compact DependencyGraph below
+    edge_pairs = []
+    
+    # Resolve against a snapshot of source paths (no stat calls), then index
+    # nodes by the same repo-relative form so each import is a dict hit
+    resolve_import = scanner.make_import_resolver(set(nodes.keys()), repo_root)
+    path_index = scanner.build_path_index(nodes.keys())
+    
+    for rec in records:
+        rel_path = rec['path']
+        seen = set()
         
-        # Build nodes
-        for rel_path, full_path in source_files:
-            lines = scanner.read_file_lines(full_path)
-            loc = scanner.count_loc(lines)
-            imports = scanner.extract_imports(lines)
+        for imp in rec['imports_raw']:
+            normalized = resolve_import(imp, rel_path)
+            target_rel_path = path_index.get(os.path.normpath(normalized))
             
-            nodes[rel_path] = {
-                'loc': loc,
-                'imports': [],
-                'imported_by': [],
-                'imports_count': 0,
-                'imported_by_count': 0,
-                'risk': 0,
-                'functions_classes': functions_by_file.get(rel_path, [])
+            if target_rel_path is not None and target_rel_path not in seen:
+                seen.add(target_rel_path)
+                nodes[rel_path]['imports'].append(target_rel_path)
+                edge_pairs.append((rel_path, target_rel_path))
+    stopwatch.lap('resolve_imports')
+    
+    graph = build_graph(list(nodes.keys()), edge_pairs)
+    paths = graph.paths
+    edges = [{'source': paths[a], 'target': paths[b]} for a, b in graph.edges()]
+    stopwatch.lap('graph_build')
+    
+    # Calculate counts and risk
+    for i, file_path in enumerate(paths):
+        nodes[file_path]['imports_count'] = graph.out_degree(i)
+        nodes[file_path]['imported_by_count'] = graph.in_degree(i)
+    
+    scores = risk.score(graph, [nodes[p]['loc'] for p in paths], [graph.out_degree(i) for i in range(len(paths))])
+    for file_path, value in zip(paths, scores):
+        nodes[file_path]['risk'] = value
+    
+    top_nodes = [(paths[i], nodes[paths[i]]) for i in risk.top_k(scores, 10)]
+    stopwatch.lap('risk')
+    
+    return {
+        'status': 'success',
+        'repo_id': repo_id,
+        'total_files': len(nodes),
+        'total_edges': len(edges),
+        'total_loc': sum(meta['loc'] for meta in nodes.values()),
+        'nodes': nodes,
+        'edges': edges,
+        'top_10_risky': [
+            {
+                'file': file_path,
+                'risk': meta['risk'],
+                'loc': meta['loc'],
+                'imported_by': meta['imported_by_count'],
+                'imports': meta['imports_count'],
+                'functions_classes': meta['functions_classes']
             }
-        
-        # Build dependency graph (same as before)
-        graph = defaultdict(list)
-        reverse_graph = defaultdict(list)
-        edges = []
-        
-        for rel_path, full_path in source_files:
-            lines = scanner.read_file_lines(full_path)
-            imports = scanner.extract_imports(lines)
-            
-            for imp in imports:
-                normalized = scanner.normalize_import_path(imp, full_path, repo_root)
-                
-                for target_rel_path in nodes.keys():
-                    target_full_path = os.path.join(repo_root, target_rel_path)
-                    if os.path.normpath(normalized) == os.path.normpath(target_full_path):
-                        if target_rel_path not in nodes[rel_path]['imports']:
-                            nodes[rel_path]['imports'].append(target_rel_path)
-                            graph[rel_path].append(target_rel_path)
-                            reverse_graph[target_rel_path].append(rel_path)
-                            edges.append({'source': rel_path, 'target': target_rel_path})
-                        break
-        
-        # Calculate counts and risk
-        for file_path in nodes.keys():
-            nodes[file_path]['imports_count'] = len(nodes[file_path]['imports'])
-            nodes[file_path]['imported_by_count'] = len(reverse_graph[file_path])
-        
-        for k, meta in nodes.items():
-            risk = (meta['loc'] / 10.0) + (meta['imported_by_count'] * 3.0) + (meta['imports_count'] * 2.0)
-            nodes[k]['risk'] = round(risk, 2)
-        
-        sorted_nodes = sorted(nodes.items(), key=lambda x: x[1]['risk'], reverse=True)
-        
-        return {
-            'status': 'success',
-            'repo_id': repo_id,
-            'total_files': len(nodes),
-            'total_edges': len(edges),
-            'total_loc': sum(meta['loc'] for meta in nodes.values()),
-            'nodes': nodes,
-            'edges': edges,
-            'top_10_risky': [
-                {
-                    'file': file_path,
-                    'risk': meta['risk'],
-                    'loc': meta['loc'],
-                    'imported_by': meta['imported_by_count'],
-                    'imports': meta['imports_count'],
-                    'functions_classes': meta['functions_classes']
-                }
-                for file_path, meta in sorted_nodes[:10]
-            ]
-        }
+            for file_path, meta in top_nodes
+        ]
+    }
+
+
+@app.get("/repo-store/stats")
+async def get_repo_store_stats():
+    """Current usage (entries, bytes on disk) and limits of the repo store, plus the SQLite store"""
+    return dict(repo_store.stats(), database=sqlite_store.stats())
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Prometheus text format: request duration histograms per endpoint, analysis
+    stage histograms, files/bytes analyzed, repo store and result cache usage
+    """
+    store = repo_store.stats()
+    cache = result_cache.stats()
+    gauges = [
+        ('legacymap_repo_store_entries', 'Repos held for function-level queries', store['entries']),
+        ('legacymap_repo_store_bytes', 'Bytes of extracted trees held on disk', store['bytes']),
+        ('legacymap_result_cache_entries', 'Cached /upload results', cache['entries']),
+        ('legacymap_result_cache_bytes', 'Bytes of cached /upload results', cache['bytes']),
+    ]
+    return PlainTextResponse(metrics.render(gauges), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/repos/{repo_id}/nodes")
+async def get_repo_nodes(repo_id: str, cursor: str = None, limit: int = streaming.DEFAULT_PAGE_SIZE, format: str = "json"):
+    """
+    Page through the nodes of an /upload-analyze result
+    Returns: {"items": [...], "next_cursor": str | null, "total": int}
+    format=ndjson streams every node from the cursor on (no page limit)
+    """
+    return await _graph_page(repo_id, 'nodes', cursor, limit, format)
+
+
+@app.get("/repos/{repo_id}/edges")
+async def get_repo_edges(repo_id: str, cursor: str = None, limit: int = streaming.DEFAULT_PAGE_SIZE, format: str = "json"):
+    """Page through the edges of an /upload-analyze result (same contract as /nodes)"""
+    return await _graph_page(repo_id, 'edges', cursor, limit, format)
+
+
+@app.get("/repos/{repo_id}/functions")
+async def get_repo_functions(repo_id: str, cursor: str = None, limit: int = streaming.DEFAULT_PAGE_SIZE, format: str = "json"):
+    """
+    Page through the functions/methods of the call graph (same contract as /nodes)
+    Each item: id, key (file::qualname), file, name, qualname, type, line_start,
+    line_end, fan_in, fan_out, cycle (index into /call-graph cycles, or null)
+    """
+    return await _graph_page(repo_id, 'functions', cursor, limit, format, section='call_graph')
+
+
+@app.get("/repos/{repo_id}/calls")
+async def get_repo_calls(repo_id: str, cursor: str = None, limit: int = streaming.DEFAULT_PAGE_SIZE, format: str = "json"):
+    """Page through caller -> callee edges {source, target, line, count} (same contract as /nodes)"""
+    return await _graph_page(repo_id, 'calls', cursor, limit, format, section='call_graph')
+
+
+@app.get("/repos/{repo_id}/call-graph")
+async def get_repo_call_graph(repo_id: str, top: int = 10):
+    """
+    Call graph summary: totals, mutually recursive function groups, and the
+    functions with the highest fan-in / fan-out
+    """
+    repo = await _find_repo(repo_id)
+    if repo is None or repo.get('call_graph') is None:
+        raise HTTPException(status_code=404, detail="Repository not found")
+    
+    call_graph = repo['call_graph']
+    functions = call_graph['functions']
+    top = max(top, 0)
+    return {
+        'status': 'success',
+        'repo_id': repo_id,
+        'total_functions': len(functions),
+        'total_calls': len(call_graph['calls']),
+        'unresolved_calls': call_graph['unresolved_calls'],
+        'cycles': call_graph['cycles'],
+        'top_fan_in': heapq.nlargest(top, functions, key=lambda f: f['fan_in']),
+        'top_fan_out': heapq.nlargest(top, functions, key=lambda f: f['fan_out']),
+    }
+
+
+@app.get("/repos/{repo_id}/impact")
+async def get_repo_impact(repo_id: str, file_path: str, direction: str = "both", max_depth: int = None):
+    """
+    Blast radius of changing one file
+    dependents: files that import it, directly or transitively
+    dependencies: files it imports, directly or transitively
+    direction: dependents | dependencies | both
+    max_depth: only files within this many import hops (unbounded if omitted)
+    cycle: files in the same import cycle as it
+    """
+    if direction not in ("dependents", "dependencies", "both"):
+        raise HTTPException(status_code=400, detail="direction must be dependents, dependencies or both")
+    if max_depth is not None and max_depth < 0:
+        raise HTTPException(status_code=400, detail="max_depth must be >= 0")
+    repo = await _find_repo(repo_id)
+    if repo is None or repo.get('graph') is None or 'reachability' not in repo['graph']:
+        raise HTTPException(status_code=404, detail="Repository not found")
+    
+    reach = repo['graph']['reachability']
+    paths = reach.graph.paths
+    node = reach.graph.ids.get(file_path)
+    if node is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    result = {
+        'status': 'success',
+        'repo_id': repo_id,
+        'file': file_path,
+        'max_depth': max_depth,
+        'cycle': sorted(paths[v] for v in reach.cycle(node)),
+    }
+    if direction in ("dependents", "both"):
+        dependents = await run_in_threadpool(reach.dependents, node, max_depth)
+        result['dependents'] = sorted(paths[v] for v in dependents)
+        result['dependents_count'] = len(dependents)
+    if direction in ("dependencies", "both"):
+        dependencies = await run_in_threadpool(reach.dependencies, node, max_depth)
+        result['dependencies'] = sorted(paths[v] for v in dependencies)
+        result['dependencies_count'] = len(dependencies)
+    return result
+
+
+@app.get("/repos/{repo_id}/risk")
+async def get_repo_risk(repo_id: str, weights: str = None, top: int = 10):
+    """
+    Re-score a stored /upload-analyze result with other weights (no re-scan)
+    weights: "imported_by=5,pagerank=20,in_cycle=10" - overrides the server
+    weights; signals: loc, imported_by, imports, pagerank, betweenness, in_cycle
+    Returns: the weights used and the top files with their signal values
+    """
+    try:
+        chosen = risk.parse_weights(weights, base=risk.WEIGHTS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    repo = await _find_repo(repo_id)
+    if repo is None or repo.get('graph') is None or 'reachability' not in repo['graph']:
+        raise HTTPException(status_code=404, detail="Repository not found")
+    try:
+        risk.check_weights(chosen, len(repo['graph']['nodes']))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return await run_in_threadpool(_rescore, repo, chosen, max(top, 0))
+
+
+def _rescore(repo, weights, top):
+    graph = repo['graph']['reachability'].graph
+    nodes = repo['graph']['nodes']
+    names = [name for name in risk.SIGNALS if weights.get(name)]
+    values = risk.signals(graph, [n['loc'] for n in nodes], [n['imports_count'] for n in nodes], names)
+    scores = risk.combine(values, weights) if values else [0.0] * len(nodes)
+    
+    return {
+        'status': 'success',
+        'repo_id': repo['repo_id'],
+        'weights': weights,
+        'total_files': len(nodes),
+        'top_risky': [
+            {
+                'file': nodes[i]['path'],
+                'risk': scores[i],
+                'loc': nodes[i]['loc'],
+                'imported_by': nodes[i]['imported_by_count'],
+                'imports': nodes[i]['imports_count'],
+                'signals': {name: round(float(values[name][i]), 6) for name in names}
+            }
+            for i in risk.top_k(scores, top)
+        ]
+    }
+
+
+@app.get("/repos/{repo_id}/export")
+async def export_repo(repo_id: str, table: str = None, format: str = "csv"):
+    """
+    Bulk export of a stored /upload-analyze result as columnar tables with
+    stable integer ids: nodes, edges, functions, calls, components
+    table=<name>: that table alone (CSV is streamed); omitted: a ZIP of all of them
+    format=csv | parquet (parquet needs pyarrow installed)
+    """
+    if format not in export.FORMATS:
+        raise HTTPException(status_code=400, detail="format must be one of " + ", ".join(export.FORMATS))
+    if format == "parquet" and export.pyarrow is None:
+        raise HTTPException(status_code=400, detail="format=parquet needs pyarrow installed on the server")
+    if table is not None and table not in export.TABLES:
+        raise HTTPException(status_code=400, detail="table must be one of " + ", ".join(export.TABLES))
+    repo = await _find_repo(repo_id)
+    if repo is None or repo.get('call_graph') is None or 'reachability' not in (repo.get('graph') or {}):
+        raise HTTPException(status_code=404, detail="Repository not found")
+    
+    if table is None:
+        spool = await run_in_threadpool(_export_zip, repo, format)
+        return StreamingResponse(
+            _iter_spool(spool), media_type=export.MEDIA_TYPES['zip'],
+            headers={"Content-Disposition": f'attachment; filename="{repo_id}.zip"'})
     
+    names, cols = await run_in_threadpool(export.columns, repo, table)
+    headers = {"Content-Disposition": f'attachment; filename="{repo_id}-{table}.{format}"'}
+    if format == "parquet":
+        body = await run_in_threadpool(export.parquet_bytes, names, cols)
+        return Response(content=body, media_type=export.MEDIA_TYPES['parquet'], headers=headers)
+    return StreamingResponse(export.iter_csv(names, cols), media_type=export.MEDIA_TYPES['csv'], headers=headers)
+
+
+def _export_zip(repo, format):
+    # Spooled: small exports stay in memory, big ones go to a temp file
+    spool = tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024)
+    export.write_zip(repo, spool, format)
+    spool.seek(0)
+    return spool
+
+
+def _iter_spool(spool, chunk_size=1024 * 1024):
+    try:
+        while True:
+            chunk = spool.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
     finally:
-        if os.path.exists(local_zip):
-            os.remove(local_zip)
+        spool.close()
+
+
+async def _graph_page(repo_id, kind, cursor, limit, format, section='graph'):
+    _check_format(format)
+    repo = await _find_repo(repo_id)
+    if repo is None or repo.get(section) is None:
+        raise HTTPException(status_code=404, detail="Repository not found")
+    
+    items = repo[section][kind]
+    try:
+        if format == "ndjson":
+            start = int(cursor) if cursor else 0
+            return streaming.ndjson_response(items[i] for i in range(max(start, 0), len(items)))
+        page, next_cursor = streaming.paginate(items, cursor, limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    return encoding.FastJSONResponse({
+        'items': page,
+        'next_cursor': next_cursor,
+        'total': len(items)
+    })
+
+
+@app.post("/upload-analyze/{repo_id}/incremental")
+async def upload_and_reanalyze(repo_id: str, file: UploadFile = File(...)):
+    """
+    Upload a new snapshot of a repo previously sent to /upload-analyze
+    Re-scans only added/changed files (by content hash) and returns the same
+    shape as /upload-analyze, plus base_repo_id and a 'changes' summary
+    """
+    if not file.filename.endswith('.zip'):
+        raise HTTPException(status_code=400, detail="Upload a zip file")
+    if await _find_repo(repo_id) is None:
+        raise HTTPException(status_code=404, detail="Repository not found")
+    result, _ = await run_in_threadpool(
+        metrics.collect, "/upload-analyze/{repo_id}/incremental", reanalyze_zip_detailed, file.file, repo_id)
+    return result
 
 
 @app.get("/function-details/{repo_id}")
@@ -758,34 +1283,49 @@ async def get_function_details(repo_id: str, file_path: str, function_name: str)
     
     Returns 2 tables of data for frontend display
     """
-    if repo_id not in _uploaded_repos:
+    repo = await _find_repo(repo_id)
+    if repo is None:
         raise HTTPException(status_code=404, detail="Repository not found")
     
-    repo_root = _uploaded_repos[repo_id]
-    full_file_path = os.path.join(repo_root, file_path)
-    
-    if not os.path.exists(full_file_path):
+    # Source read and symbol lookups (SQLite queries for a restored repo) run off the event loop
+    details = await run_in_threadpool(_function_details, repo, file_path, function_name)
+    if details is None:
         raise HTTPException(status_code=404, detail="File not found")
-    
-    # TABLE 1: Where this function is called
-    call_sites = []
-    for root, dirs, files in os.walk(repo_root):
-        for file in files:
-            if scanner.is_source_file(file):
-                fpath = os.path.join(root, file)
-                rpath = os.path.relpath(fpath, repo_root)
-                
-                # Find all calls to this function
-                calls = find_function_calls(fpath, function_name)
-                for call in calls:
-                    call_sites.append({
-                        'file': rpath,
-                        'line': call['line'],
-                        'code': call['code']
-                    })
+    return details
+
+
+def _function_details(repo, file_path, function_name, lines=None):
+    """
+    Both tables of /function-details (blocking)
+    lines: the file's source lines if already read
+    Returns: result dict, or None if the file isn't in the repo
+    """
+    if lines is None:
+        lines = _source_lines(repo, file_path)
+        if lines is None:
+            return None
     
     # TABLE 2: Dependencies of this function
-    dependencies = find_function_dependencies(full_file_path, function_name)
+    # (sliced by the definition's line span when the extractor recorded one)
+    line_start, line_end = _definition_span(repo, file_path, function_name)
+    dependencies = find_function_dependencies_in_lines(lines, function_name, line_start, line_end)
+    
+    return _function_details_tables(repo, file_path, function_name, dependencies)
+
+
+def _definition_span(repo, file_path, function_name):
+    """(line_start, line_end) of the first function/method with this name in the file, or (None, None)"""
+    for item in repo['symbols']['definitions'].get(function_name, []):
+        if item['file'] == file_path and item['type'] != 'class' and item.get('line_end'):
+            return item['line'], item['line_end']
+    return None, None
+
+
+def _function_details_tables(repo, file_path, function_name, dependencies):
+    """The 2 tables of /function-details for one symbol"""
+    # TABLE 1: Where this function is called
+    # Looked up in the symbol index built at upload time (no repo walk)
+    call_sites = [dict(site) for site in repo['symbols']['calls'].get(function_name, [])]
     
     return {
         'status': 'success',
@@ -803,4 +1343,185 @@ async def get_function_details(repo_id: str, file_path: str, function_name: str)
             'rows': dependencies,
             'count': len(dependencies)
         }
-    }
\ No newline at end of file
+    }
+
+
+class FunctionRef(BaseModel):
+    file_path: str
+    function_name: str
+
+
+class FunctionDetailsBatch(BaseModel):
+    symbols: List[FunctionRef]
+
+
+@app.post("/function-details/{repo_id}/batch")
+async def get_function_details_batch(repo_id: str, batch: FunctionDetailsBatch):
+    """
+    /function-details for many symbols in one request
+    Body: {"symbols": [{"file_path": ..., "function_name": ...}, ...]}
+    Each source file is read once no matter how many of its symbols are asked for;
+    results come back in request order, same shape as /function-details
+    (symbols whose file is missing get status "error")
+    """
+    repo = await _find_repo(repo_id)
+    if repo is None:
+        raise HTTPException(status_code=404, detail="Repository not found")
+    
+    return await run_in_threadpool(_function_details_batch, repo, batch.symbols)
+
+
+def _function_details_batch(repo, symbols):
+    lines_by_file = {}
+    results = []
+    
+    for ref in symbols:
+        if ref.file_path not in lines_by_file:
+            lines_by_file[ref.file_path] = _source_lines(repo, ref.file_path)
+        
+        lines = lines_by_file[ref.file_path]
+        if lines is None:
+            results.append({
+                'status': 'error',
+                'detail': 'File not found',
+                'function_name': ref.function_name,
+                'file': ref.file_path
+            })
+            continue
+        
+        results.append(_function_details(repo, ref.file_path, ref.function_name, lines))
+    
+    return {
+        'status': 'success',
+        'repo_id': repo['repo_id'],
+        'count': len(results),
+        'results': results
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SERVER-LOCAL DIRECTORIES
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# Directories (and everything below them) /analyze-local may read.
+# os.pathsep-separated; unset or empty disables the endpoint
+LOCAL_ROOTS = [
+    os.path.realpath(p)
+    for p in os.environ.get('LEGACYMAP_LOCAL_ROOTS', '').split(os.pathsep) if p
+]
+
+@app.post("/analyze-local")
+async def analyze_local(path: str, kind: str = "upload", format: str = "json", timings: bool = False,
+                        view: str = "full", fields: str = None, accept: str = Header(None)):
+    """
+    Analyze a directory already on the server (e.g. a git checkout) in place:
+    no upload, ZIP write or extraction. path must be inside LEGACYMAP_LOCAL_ROOTS
+    kind: "upload" (same result as /upload) or "upload-analyze" (same as
+    /upload-analyze; the directory is registered for /function-details but
+    never deleted)
+    format, timings, view, fields, Accept: as on /upload
+    """
+    _check_format(format)
+    if kind not in ('upload', 'upload-analyze'):
+        raise HTTPException(status_code=400, detail="kind must be one of ['upload', 'upload-analyze']")
+    
+    if kind == "upload":
+        analyze, events, node_fields = analyze_directory, streaming.upload_events, encoding.UPLOAD_NODE_FIELDS
+    else:
+        analyze, events, node_fields = analyze_directory_detailed, streaming.detailed_events, encoding.DETAILED_NODE_FIELDS
+    node_fields = _check_view(view, fields, node_fields)
+    repo_root = resolve_local_path(path)
+    result, stage_timings = await run_in_threadpool(metrics.collect, "/analyze-local", analyze, repo_root)
+    result = encoding.select(result, view, node_fields)
+    return _respond(result, format, events, stage_timings, timings, accept=accept)
+
+
+def resolve_local_path(path):
+    """
+    Canonical form of a requested local directory (symlinks resolved)
+    Raises: HTTPException 403 outside the allow-list, 404 if not a directory
+    """
+    if not LOCAL_ROOTS:
+        raise HTTPException(status_code=403, detail="Local analysis is disabled (set LEGACYMAP_LOCAL_ROOTS)")
+    real = os.path.realpath(path)
+    if not any(os.path.commonpath([real, root]) == root for root in LOCAL_ROOTS):
+        raise HTTPException(status_code=403, detail="Path is outside the allowed roots")
+    if not os.path.isdir(real):
+        raise HTTPException(status_code=404, detail="Directory not found")
+    return real
+
+
+def analyze_directory(repo_root):
+    """/upload analysis of a directory on disk (blocking)"""
+    with metrics.stage('scan'):
+        records = scan_directory(repo_root, functions=False)
+    _count_scanned(records)
+    return analyze_repo(records, repo_root)
+
+
+def analyze_directory_detailed(repo_root):
+    """
+    /upload-analyze analysis of a directory on disk (blocking)
+    Registered under a new repo_id; the store never deletes the directory
+    """
+    with metrics.stage('scan'):
+        records = scan_directory(repo_root)
+    _count_scanned(records)
+    repo_id = str(uuid.uuid4())
+    result = _detailed_result(repo_id, repo_root, records)
+    _store_repo(repo_id, repo_root, records, result, owned=False)
+    return result
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# BACKGROUND ANALYSIS JOBS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# kind -> blocking analysis function, same bodies as /upload and /upload-analyze
+_JOB_KINDS = {
+    'upload': lambda zip_source, in_archive: analyze_zip_cached(zip_source, in_archive)[0],
+    'upload-analyze': analyze_zip_detailed,
+}
+
+@app.post("/jobs", status_code=202)
+async def submit_analysis_job(file: UploadFile = File(...), kind: str = "upload", in_archive: bool = False):
+    """
+    Queue an analysis and return immediately with a job_id
+    kind: "upload" (same result as /upload) or "upload-analyze" (same as /upload-analyze)
+    Poll GET /jobs/{job_id} for status and result
+    """
+    if kind not in _JOB_KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of {sorted(_JOB_KINDS)}")
+    if not file.filename.endswith('.zip'):
+        raise HTTPException(status_code=400, detail="Upload a zip file")
+    
+    # The upload is closed when this request ends, so the job gets its own copy
+    local_zip = await run_in_threadpool(save_upload_to_temp, file.file)
+    job = jobs.submit_job(kind, _run_zip_job, kind, local_zip, in_archive)
+    
+    return {
+        'status': job['status'],
+        'job_id': job['job_id'],
+        'kind': kind
+    }
+
+
+def _run_zip_job(kind, local_zip, in_archive):
+    try:
+        result, _ = metrics.collect(f"/jobs:{kind}", _JOB_KINDS[kind], local_zip, in_archive)
+        return result
+    finally:
+        if os.path.exists(local_zip):
+            os.remove(local_zip)
+
+
+@app.get("/jobs/{job_id}")
+async def get_analysis_job(job_id: str):
+    """
+    Status of a background analysis: queued | running | done | failed
+    'result' holds the analysis once status is done, 'error' once failed
+    """
+    job = jobs.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
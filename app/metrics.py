@@ -0,0 +1,229 @@
+"""
+Metrics Module
+Per-stage timers and file/byte counters for each analysis, plus process-wide
+histograms and counters rendered in Prometheus text format for /metrics
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram buckets (seconds), shared by request and stage durations
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Timings of the analysis running in this thread / task, if any
+_current = contextvars.ContextVar('legacymap_timings', default=None)
+_lock = threading.Lock()
+
+
+class Timings:
+    """Stage durations (seconds) and counters of one analysis"""
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.stages = {}
+        self.counters = {}
+        self.started = time.perf_counter()
+
+    def as_dict(self):
+        return {
+            'total_seconds': round(time.perf_counter() - self.started, 6),
+            'stages': {name: round(seconds, 6) for name, seconds in self.stages.items()},
+            **self.counters,
+        }
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values"""
+
+    def __init__(self, name, help_text, label_names, buckets=BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, labels, value):
+        with _lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        out = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with _lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in items:
+            base = _labels(self.label_names, labels)
+            for bound, count in zip(self.buckets, series):
+                out.append(f'{self.name}_bucket{{{base},le="{bound}"}} {count}')
+            out.append(f'{self.name}_bucket{{{base},le="+Inf"}} {series[-1]}')
+            out.append(f"{self.name}_sum{{{base}}} {series[-2]}")
+            out.append(f"{self.name}_count{{{base}}} {series[-1]}")
+        return out
+
+
+class Counter:
+    """Monotonic counter keyed by a tuple of label values"""
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._series = {}
+
+    def inc(self, labels, value=1):
+        with _lock:
+            self._series[labels] = self._series.get(labels, 0) + value
+
+    def render(self):
+        out = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with _lock:
+            items = sorted(self._series.items())
+        for labels, value in items:
+            out.append(f"{self.name}{{{_labels(self.label_names, labels)}}} {value}")
+        return out
+
+
+REQUEST_SECONDS = Histogram(
+    'legacymap_request_duration_seconds', 'HTTP request duration by endpoint',
+    ('method', 'endpoint', 'status'))
+STAGE_SECONDS = Histogram(
+    'legacymap_stage_duration_seconds', 'Analysis stage duration by endpoint',
+    ('endpoint', 'stage'))
+ANALYZED_TOTAL = Counter(
+    'legacymap_analyzed_total', 'Files and bytes analyzed by endpoint',
+    ('endpoint', 'kind'))
+
+
+def collect(endpoint, fn, *args):
+    """
+    Run fn(*args) with a fresh Timings active, so stage() and count() calls
+    anywhere below it are attributed to this analysis
+    Returns: (fn result, Timings)
+    """
+    timings = Timings(endpoint)
+    token = _current.set(timings)
+    try:
+        return fn(*args), timings
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def stage(name):
+    """Time a block as stage `name` of the current analysis (no-op outside collect)"""
+    timings = _current.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            record_stage(timings, name, time.perf_counter() - start)
+
+
+class Stopwatch:
+    """
+    Times consecutive stages of one long function without re-indenting it:
+    lap(name) records the time since the previous lap (or creation)
+    """
+
+    def __init__(self):
+        self.timings = _current.get()
+        self.last = time.perf_counter()
+
+    def lap(self, name):
+        now = time.perf_counter()
+        if self.timings is not None:
+            record_stage(self.timings, name, now - self.last)
+        self.last = now
+
+
+def record_stage(timings, name, seconds):
+    timings.stages[name] = timings.stages.get(name, 0.0) + seconds
+    STAGE_SECONDS.observe((timings.endpoint, name), seconds)
+
+
+def count(name, value):
+    """Add to counter `name` (e.g. files, bytes) of the current analysis"""
+    timings = _current.get()
+    if timings is None:
+        return
+    timings.counters[name] = timings.counters.get(name, 0) + value
+    ANALYZED_TOTAL.inc((timings.endpoint, name), value)
+
+
+def render(gauges=()):
+    """
+    Prometheus text exposition of every metric
+    gauges: extra (name, help, value) triples sampled at scrape time
+    """
+    out = []
+    for metric in (REQUEST_SECONDS, STAGE_SECONDS, ANALYZED_TOTAL):
+        out.extend(metric.render())
+    for name, help_text, value in gauges:
+        out.extend([f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value}"])
+    return '\n'.join(out) + '\n'
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware observing every HTTP request in REQUEST_SECONDS, labelled
+    by route template (/repos/{repo_id}/nodes) rather than the raw path
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._templates = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = [500]
+        done = [False]
+
+        def observe():
+            done[0] = True
+            REQUEST_SECONDS.observe(
+                (scope['method'], self._endpoint(scope), str(status[0])),
+                time.perf_counter() - start)
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                status[0] = message['status']
+            await send(message)
+            if message['type'] == 'http.response.body' and not message.get('more_body'):
+                # Body fully sent: streamed responses are timed to their last chunk
+                observe()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not done[0]:
+                # Unhandled error (answered with a 500 further out) or client gone
+                observe()
+
+    def _endpoint(self, scope):
+        if self._templates is None:
+            app = scope.get('app')
+            routes = getattr(app, 'routes', [])
+            self._templates = {getattr(r, 'endpoint', None): r.path for r in routes}
+        # Unmatched paths share one label so 404 scans can't blow up cardinality
+        return self._templates.get(scope.get('endpoint'), 'unmatched')
+
+
+def _labels(names, values):
+    return ','.join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values))
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,124 @@
+"""
+Repository Store Module
+Keeps uploaded repos (extracted tree + per-file records) for later queries,
+bounded by entry count, total bytes on disk and age. Least-recently-used
+entries are evicted first and their temp dirs removed with utils.cleanup
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+
+from .utils import cleanup, dir_size
+
+# Most repos kept at once
+MAX_ENTRIES = int(os.environ.get('LEGACYMAP_REPO_MAX_ENTRIES', '100'))
+# Most bytes of extracted trees kept on disk at once
+MAX_BYTES = int(os.environ.get('LEGACYMAP_REPO_MAX_BYTES', str(2 * 1024 * 1024 * 1024)))
+# Repos not accessed for this long are dropped
+TTL_SECONDS = int(os.environ.get('LEGACYMAP_REPO_TTL_SECONDS', str(6 * 3600)))
+
+_entries = OrderedDict()  # repo_id -> entry, least recently used first
+_lock = threading.Lock()
+_evicted = 0
+
+
+def add(repo_id, repo_root, records, symbols=None, graph=None, owned=True, call_graph=None):
+    """
+    Register an uploaded repo, then evict until within limits
+    symbols: symbol_index.build_symbol_index() output for call-site lookups
+    graph: {'nodes': [...], 'edges': [...]} lists served page by page, plus
+        'reachability' (graph.Reachability) for /impact queries
+    owned: False for server-local directories - never deleted, not counted in bytes
+    call_graph: call_graph.build_call_graph() output (functions, calls, cycles)
+    Returns: the stored entry (root, records, symbols, graph, call_graph, bytes, created_at, last_access)
+    """
+    now = time.time()
+    entry = {
+        'repo_id': repo_id,
+        'root': repo_root,
+        'records': records,
+        'symbols': symbols,
+        'graph': graph,
+        'call_graph': call_graph,
+        'bytes': dir_size(repo_root) if owned else 0,
+        'owned': owned,
+        'created_at': now,
+        'last_access': now,
+    }
+    with _lock:
+        _entries[repo_id] = entry
+        doomed = _collect_evictions(now, keep=repo_id)
+    _cleanup_all(doomed)
+    return entry
+
+
+def get(repo_id):
+    """
+    Look up a repo and mark it as recently used
+    Returns: entry dict, or None if unknown or expired
+    """
+    now = time.time()
+    with _lock:
+        doomed = _collect_evictions(now)
+        entry = _entries.get(repo_id)
+        if entry is not None:
+            entry['last_access'] = now
+            _entries.move_to_end(repo_id)
+    _cleanup_all(doomed)
+    return entry
+
+
+def stats():
+    """Returns: dict with current usage and configured limits"""
+    with _lock:
+        doomed = _collect_evictions(time.time())
+        result = {
+            'entries': len(_entries),
+            'bytes': sum(e['bytes'] for e in _entries.values()),
+            'max_entries': MAX_ENTRIES,
+            'max_bytes': MAX_BYTES,
+            'ttl_seconds': TTL_SECONDS,
+            'evicted_total': _evicted,
+        }
+    _cleanup_all(doomed)
+    return result
+
+
+def clear():
+    """Drop every repo (used on shutdown)"""
+    with _lock:
+        doomed = list(_entries.values())
+        _entries.clear()
+    _cleanup_all(doomed)
+
+
+def _collect_evictions(now, keep=None):
+    # Caller holds _lock. Pops expired entries, then LRU entries while over
+    # the count/byte limits (never the just-added `keep` entry).
+    global _evicted
+    doomed = []
+    for repo_id in list(_entries):
+        if now - _entries[repo_id]['last_access'] > TTL_SECONDS:
+            doomed.append(_entries.pop(repo_id))
+
+    total_bytes = sum(e['bytes'] for e in _entries.values())
+    for repo_id in list(_entries):
+        if len(_entries) <= MAX_ENTRIES and total_bytes <= MAX_BYTES:
+            break
+        if repo_id == keep:
+            continue
+        entry = _entries.pop(repo_id)
+        total_bytes -= entry['bytes']
+        doomed.append(entry)
+
+    _evicted += len(doomed)
+    return doomed
+
+
+def _cleanup_all(entries):
+    # rmtree outside the lock so lookups aren't blocked on disk I/O
+    for entry in entries:
+        if entry['owned']:
+            cleanup(entry['root'])
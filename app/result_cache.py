@@ -0,0 +1,134 @@
+"""
+Result Cache Module
+Content-addressed on-disk cache of analysis results, keyed by the SHA-256
+of the uploaded ZIP, with a size cap and least-recently-used eviction.
+Safe to share between server processes: entries are written atomically
+and eviction holds a lock file
+"""
+
+import os
+import json
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: eviction is then only locked within one process
+    fcntl = None
+
+# Where cached results live (one JSON file per key)
+CACHE_DIR = os.environ.get('LEGACYMAP_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'legacymap_cache'))
+# Total size cap for the cache directory; 0 disables caching
+CACHE_MAX_BYTES = int(os.environ.get('LEGACYMAP_CACHE_MAX_BYTES', str(512 * 1024 * 1024)))
+# Bump when the analysis output changes so stale results are never served
+CACHE_VERSION = '3'
+
+_lock = threading.Lock()
+
+
+def enabled():
+    return CACHE_MAX_BYTES > 0
+
+
+def make_key(digest, kind):
+    """Cache key for one analysis kind of one archive"""
+    return f"{kind}-v{CACHE_VERSION}-{digest}"
+
+
+def get(key):
+    """
+    Look up a cached result
+    Returns: result dict, or None on a miss
+    """
+    if not enabled():
+        return None
+    path = _path_for(key)
+    try:
+        with open(path, 'r') as f:
+            result = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # Touch mtime so eviction is least-recently-used, not least-recently-written
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+    return result
+
+
+def put(key, result):
+    """Store a result (atomically) and evict old entries past CACHE_MAX_BYTES"""
+    if not enabled():
+        return
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(result, f)
+        os.replace(tmp_path, _path_for(key))
+    except:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _evict()
+
+
+def stats():
+    """Returns: dict with entries, bytes and max_bytes of the cache directory"""
+    entries = _list_entries()
+    return {
+        'entries': len(entries),
+        'bytes': sum(size for _, size, _ in entries),
+        'max_bytes': CACHE_MAX_BYTES,
+    }
+
+
+def _path_for(key):
+    return os.path.join(CACHE_DIR, key + '.json')
+
+
+def _list_entries():
+    # (path, size, mtime) for every cached result
+    entries = []
+    try:
+        with os.scandir(CACHE_DIR) as it:
+            for entry in it:
+                if entry.name.endswith('.json'):
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((entry.path, st.st_size, st.st_mtime))
+    except OSError:
+        pass
+    return entries
+
+
+def _evict():
+    with _lock, _process_lock():
+        entries = _list_entries()
+        total = sum(size for _, size, _ in entries)
+        # Oldest access first
+        for path, size, _ in sorted(entries, key=lambda e: e[2]):
+            if total <= CACHE_MAX_BYTES:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+@contextmanager
+def _process_lock():
+    # Exclusive flock on CACHE_DIR/.lock, so two processes don't evict at once
+    if fcntl is None:
+        yield
+        return
+    fd = os.open(os.path.join(CACHE_DIR, '.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)  # closing releases the lock
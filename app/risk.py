@@ -0,0 +1,312 @@
+"""
+Risk Scoring Module
+Per-file risk as a weighted sum of signals computed over the graph's node
+ids: size, direct fan-in / fan-out, PageRank, approximate betweenness and
+import-cycle membership. Uses NumPy arrays when NumPy is installed and plain
+Python otherwise (same results)
+"""
+
+import heapq
+import math
+import os
+
+try:
+    import numpy as np
+except ImportError:  # optional: pure-Python fallback below
+    np = None
+
+SIGNALS = ('loc', 'imported_by', 'imports', 'pagerank', 'betweenness', 'in_cycle')
+
+# The original formula: loc/10 + imported_by*3 + imports*2
+DEFAULT_WEIGHTS = {'loc': 0.1, 'imported_by': 3.0, 'imports': 2.0,
+                   'pagerank': 0.0, 'betweenness': 0.0, 'in_cycle': 0.0}
+
+PAGERANK_DAMPING = 0.85
+PAGERANK_TOLERANCE = 1e-6  # L1 change of the rank vector (sums to 1)
+PAGERANK_MAX_ITERATIONS = 100
+# Source nodes sampled for approximate betweenness (exact when >= node count)
+BETWEENNESS_SAMPLES = int(os.environ.get('LEGACYMAP_BETWEENNESS_SAMPLES', '64'))
+# Edge visits one betweenness run may spend; big graphs get fewer samples
+BETWEENNESS_MAX_WORK = int(os.environ.get('LEGACYMAP_BETWEENNESS_MAX_WORK', '4000000'))
+# Graphs with more files than this are refused betweenness altogether
+BETWEENNESS_MAX_NODES = int(os.environ.get('LEGACYMAP_BETWEENNESS_MAX_NODES', '500000'))
+
+
+def parse_weights(text, base=DEFAULT_WEIGHTS):
+    """
+    "imported_by=5,pagerank=20" -> base weights with those overridden
+    Raises: ValueError on unknown signals or non-numeric / non-finite weights
+    """
+    weights = dict(base)
+    for part in (text or '').split(','):
+        if not part.strip():
+            continue
+        name, sep, value = part.partition('=')
+        name = name.strip()
+        if not sep or name not in SIGNALS:
+            raise ValueError(f"unknown risk weight {part.strip()!r} (expected name=value, name in {', '.join(SIGNALS)})")
+        weight = float(value)
+        if not math.isfinite(weight):
+            raise ValueError(f"risk weight {name} must be a finite number, got {value.strip()!r}")
+        weights[name] = weight
+    return weights
+
+
+# Server-wide weights for /upload and /upload-analyze
+WEIGHTS = parse_weights(os.environ.get('LEGACYMAP_RISK_WEIGHTS', ''))
+
+
+def check_weights(weights, node_count):
+    """
+    Raises: ValueError if the weights ask for a signal too costly for a graph this size
+    """
+    if weights.get('betweenness') and node_count > BETWEENNESS_MAX_NODES:
+        raise ValueError(f"betweenness is limited to graphs of at most {BETWEENNESS_MAX_NODES} files "
+                         f"(this one has {node_count})")
+
+
+def weights_tag(weights):
+    """Short stable suffix for cache keys; '' for the default weights"""
+    if weights == DEFAULT_WEIGHTS:
+        return ''
+    return ','.join(f"{name}={weights[name]!r}" for name in SIGNALS if weights[name])
+
+
+def signals(graph, loc, imports, names=SIGNALS):
+    """
+    graph: DependencyGraph; loc, imports: per node id sequences
+    names: signals to compute (graph-wide ones are only computed when asked)
+    Returns: dict name -> per node id values (NumPy array or list)
+    """
+    n = graph.node_count
+    out = {}
+    for name in names:
+        if name == 'loc':
+            out[name] = _vector(loc)
+        elif name == 'imports':
+            out[name] = _vector(imports)
+        elif name == 'imported_by':
+            offs = graph.rev_offsets
+            if np is not None:
+                out[name] = np.diff(np.frombuffer(offs, dtype=np.int32)).astype(np.float64)
+            else:
+                out[name] = [float(offs[i + 1] - offs[i]) for i in range(n)]
+        elif name == 'pagerank':
+            out[name] = pagerank(graph)
+        elif name == 'betweenness':
+            out[name] = _vector(betweenness(graph))
+        elif name == 'in_cycle':
+            flags = [0.0] * n
+            for comp in graph.strongly_connected_components():
+                if len(comp) > 1:
+                    for v in comp:
+                        flags[v] = 1.0
+            out[name] = _vector(flags)
+    return out
+
+
+def combine(values, weights):
+    """
+    Weighted sum of signals() output
+    Returns: list of risk scores by node id, rounded to 2 places
+    """
+    total = None
+    for name, vector in values.items():
+        w = weights.get(name, 0.0)
+        if not w:
+            continue
+        if np is not None:
+            total = vector * w if total is None else total + vector * w
+        elif total is None:
+            total = [x * w for x in vector]
+        else:
+            total = [t + x * w for t, x in zip(total, vector)]
+    if total is None:
+        return [0.0] * len(next(iter(values.values()), []))
+    if np is not None:
+        return np.round(total, 2).tolist()
+    return [round(t, 2) for t in total]
+
+
+def score(graph, loc, imports, weights=None):
+    """
+    Risk of every node: sum of weight * signal over the non-zero weights
+    Returns: list of risk scores by node id, rounded to 2 places
+    """
+    weights = WEIGHTS if weights is None else weights
+    names = [name for name in SIGNALS if weights.get(name)]
+    values = signals(graph, loc, imports, names)
+    if not values:
+        return [0.0] * graph.node_count
+    return combine(values, weights)
+
+
+def top_k(scores, k):
+    """
+    Node ids of the k highest scores, highest first; ties keep node id order
+    (same order as a stable sort, without sorting everything)
+    """
+    k = max(0, min(k, len(scores)))
+    if not k:
+        return []
+    if np is not None and len(scores) > k:
+        arr = np.asarray(scores)
+        # Partition, then widen to every score tied with the k-th so tie order is exact
+        kth = np.partition(arr, len(arr) - k)[len(arr) - k]
+        candidates = np.flatnonzero(arr >= kth)
+        order = np.lexsort((candidates, -arr[candidates]))
+        return candidates[order[:k]].tolist()
+    return heapq.nlargest(k, range(len(scores)), key=scores.__getitem__)
+
+
+def pagerank(graph, damping=PAGERANK_DAMPING):
+    """
+    PageRank by power iteration over the CSR arrays (rank flows A -> B along
+    "A imports B"; dangling files spread theirs evenly), scaled so the mean is 1
+    Returns: per node id values
+    """
+    n = graph.node_count
+    if not n:
+        return _vector([])
+    if np is not None:
+        offs = np.frombuffer(graph.fwd_offsets, dtype=np.int32)
+        targets = np.frombuffer(graph.fwd_targets, dtype=np.int32)
+        out_deg = np.diff(offs)
+        sources = np.repeat(np.arange(n), out_deg)
+        dangling = out_deg == 0
+        inv_deg = np.where(dangling, 0.0, 1.0 / np.maximum(out_deg, 1))
+        rank = np.full(n, 1.0 / n)
+        for _ in range(PAGERANK_MAX_ITERATIONS):
+            flow = np.bincount(targets, weights=(rank * inv_deg)[sources], minlength=n)
+            new = (1.0 - damping) / n + damping * (flow + rank[dangling].sum() / n)
+            delta = np.abs(new - rank).sum()
+            rank = new
+            if delta < PAGERANK_TOLERANCE:
+                break
+        return rank * n
+
+    offs, targets = graph.fwd_offsets, graph.fwd_targets
+    rank = [1.0 / n] * n
+    for _ in range(PAGERANK_MAX_ITERATIONS):
+        flow = [0.0] * n
+        leak = 0.0
+        for v in range(n):
+            start, end = offs[v], offs[v + 1]
+            if start == end:
+                leak += rank[v]
+                continue
+            share = rank[v] / (end - start)
+            for pos in range(start, end):
+                flow[targets[pos]] += share
+        base = (1.0 - damping) / n + damping * leak / n
+        new = [base + damping * f for f in flow]
+        delta = sum(abs(a - b) for a, b in zip(new, rank))
+        rank = new
+        if delta < PAGERANK_TOLERANCE:
+            break
+    return [r * n for r in rank]
+
+
+def betweenness(graph, samples=None):
+    """
+    Brandes betweenness from an evenly spaced sample of source nodes, scaled
+    up to the full graph and normalized to [0, 1] by (n - 1)(n - 2)
+    Samples are cut so samples * edges stays within BETWEENNESS_MAX_WORK
+    Returns: list of per node id values
+    """
+    n = graph.node_count
+    samples = BETWEENNESS_SAMPLES if samples is None else samples
+    samples = min(samples, max(1, BETWEENNESS_MAX_WORK // max(1, len(graph.fwd_targets))))
+    if n < 3 or samples <= 0:
+        return [0.0] * n
+    if n > BETWEENNESS_MAX_NODES:
+        raise ValueError(f"betweenness is limited to graphs of at most {BETWEENNESS_MAX_NODES} files")
+    step = max(1, n // samples)
+    sources = range(0, n, step)
+    if np is not None:
+        central = _betweenness_numpy(graph, sources)
+    else:
+        central = _betweenness_python(graph, sources)
+    scale = (n / len(sources)) / ((n - 1) * (n - 2))
+    if np is not None:
+        return (central * scale).tolist()
+    return [c * scale for c in central]
+
+
+def _betweenness_numpy(graph, sources):
+    # Level-synchronous BFS over the CSR arrays: each level expands every
+    # frontier edge at once; dependencies flow back level by level
+    n = graph.node_count
+    offs = np.frombuffer(graph.fwd_offsets, dtype=np.int32).astype(np.int64)
+    targets = np.frombuffer(graph.fwd_targets, dtype=np.int32)
+    out_deg = np.diff(offs)
+    central = np.zeros(n)
+    for s in sources:
+        dist = np.full(n, -1, dtype=np.int64)
+        sigma = np.zeros(n)
+        dist[s] = 0
+        sigma[s] = 1.0
+        frontier = np.array([s])
+        levels = []  # (v, w) arrays of shortest-path edges, one pair per level
+        depth = 0
+        while frontier.size:
+            counts = out_deg[frontier]
+            total = int(counts.sum())
+            if not total:
+                break
+            # Positions of every out-edge of the frontier in the CSR targets
+            starts = np.repeat(offs[frontier] - np.cumsum(counts) + counts, counts)
+            v = np.repeat(frontier, counts)
+            w = targets[starts + np.arange(total)]
+            fresh = w[dist[w] < 0]
+            dist[fresh] = depth + 1
+            on_path = dist[w] == depth + 1
+            v, w = v[on_path], w[on_path]
+            sigma += np.bincount(w, weights=sigma[v], minlength=n)
+            levels.append((v, w))
+            frontier = np.unique(fresh)
+            depth += 1
+        delta = np.zeros(n)
+        for v, w in reversed(levels):
+            delta += np.bincount(v, weights=sigma[v] * (1.0 + delta[w]) / sigma[w], minlength=n)
+        delta[s] = 0.0
+        central += delta
+    return central
+
+
+def _betweenness_python(graph, sources):
+    n = graph.node_count
+    offs, targets = graph.fwd_offsets, graph.fwd_targets
+    central = [0.0] * n
+    for s in sources:
+        # BFS shortest-path counts, then dependencies accumulated in reverse order
+        sigma = [0] * n
+        dist = [-1] * n
+        sigma[s] = 1
+        dist[s] = 0
+        order = [s]
+        preds = {}
+        for v in order:
+            dv = dist[v] + 1
+            for pos in range(offs[v], offs[v + 1]):
+                w = targets[pos]
+                if dist[w] < 0:
+                    dist[w] = dv
+                    order.append(w)
+                if dist[w] == dv:
+                    sigma[w] += sigma[v]
+                    preds.setdefault(w, []).append(v)
+        delta = [0.0] * n
+        for w in reversed(order):
+            coeff = (1.0 + delta[w]) / sigma[w]
+            for v in preds.get(w, ()):
+                delta[v] += sigma[v] * coeff
+            if w != s:
+                central[w] += delta[w]
+    return central
+
+
+def _vector(values):
+    if np is not None:
+        return np.asarray(values, dtype=np.float64)
+    return [float(x) for x in values]
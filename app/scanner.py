@@ -1,4 +1,4 @@
-import os, re
+import os, re, io
 from collections import defaultdict
 
 IMPORT_PATTERNS = [
@@ -7,6 +7,35 @@ IMPORT_PATTERNS = [
     re.compile(r"^\s*require\(['\"](.+)['\"]\)"),
 ]
 
+LANGUAGES = {'.js': 'javascript', '.ts': 'javascript', '.py': 'python', '.java': 'java'}
+# Tried in order when resolving './x' style imports
+RELATIVE_SUFFIXES = ['', '.js', '.ts', '.py', '/index.js', '/index.ts', '/index.py', '/__init__.py']
+# Tried when looking up dotted Python/Java modules on disk
+MODULE_SUFFIXES = ['.py', '/__init__.py', '.java']
+
+# Whole-file import lexers. Statements are matched only at the start of a line
+# that contains an import keyword; calls (require(), import(), import_module())
+# only inside such lines. Everything else in the file is skipped.
+JS_STATEMENT = re.compile(r"""
+    [ \t]*(?:import|export)\b[^'"`;]*?\bfrom\s*(['"])(?P<from>[^'"\n]+)\1   # import/export ... from 'x' (may span lines)
+  | [ \t]*import\s*(['"])(?P<bare>[^'"\n]+)\3                               # import 'x' (side effects only)
+""", re.X)
+JS_CALL = re.compile(r"""\b(?:require|import)\s*\(\s*(['"`])([^'"`\n]+)\1\s*\)""")
+PY_STATEMENT = re.compile(r"""
+    [ \t]*from[ \t]+(?P<module>\.*[\w.]*)[ \t]+import[ \t]*(?P<names>\([^)]*\)|(?:\\\r?\n|[^\n#;])*)  # from x import a, (b, c)
+  | [ \t]*import[ \t]+(?P<modules>(?:\\\r?\n|[^\n#;])+)                                     # import a.b as c, d
+""", re.X)
+# Backslash line continuation inside an import statement
+PY_CONTINUATION = re.compile(r"\\\r?\n")
+PY_CALL = re.compile(r"""\b(?:import_module|__import__)\(\s*(['"])([\w.]+)\1""")
+JAVA_STATEMENT = re.compile(r"[ \t]*import[ \t]+(?P<static>static[ \t]+)?(?P<name>[\w.]+?)(?P<star>\.\*)?[ \t]*;")
+# language -> (keyword prefilter, statement pattern, call pattern)
+IMPORT_LEXERS = {
+    'javascript': (re.compile(r'import|require|export'), JS_STATEMENT, JS_CALL),
+    'python': (re.compile(r'import'), PY_STATEMENT, PY_CALL),
+    'java': (re.compile(r'import'), JAVA_STATEMENT, None),
+}
+
 def is_source_file(path):
     return path.endswith(('.js','.ts','.py','.java'))
 
@@ -17,6 +46,27 @@ def read_file_lines(path):
     except:
         return []
 
+def read_file_bytes(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except:
+        return b''
+
+def split_lines(data):
+    # Same decoding/newline handling as read_file_lines, for bytes already in memory
+    return split_text_lines(decode_source(data))
+
+def decode_source(data):
+    # Universal newlines up front, so whole-text lexers only ever see '\n'
+    text = data.decode('utf-8', errors='ignore')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+def split_text_lines(text):
+    return io.StringIO(text, newline=None).readlines()
+
 def count_loc(lines):
     c = 0
     for ln in lines:
@@ -28,7 +78,14 @@ def count_loc(lines):
         c += 1
     return c
 
-def extract_imports(lines):
+def language_for(path):
+    return LANGUAGES.get(os.path.splitext(path)[1], 'javascript')
+
+def extract_imports(lines, language='javascript'):
+    return extract_imports_from_text(''.join(lines), language)
+
+def extract_imports_per_line(lines):
+    # Original JS-only extractor (three regexes per line), kept for benchmarks
     imports = []
     for ln in lines:
         for pat in IMPORT_PATTERNS:
@@ -37,13 +94,79 @@ def extract_imports(lines):
                 imports.append(m.group(1))
     return imports
 
+def extract_imports_from_text(text, language):
+    """
+    Single pass over a whole file: jump from one import keyword to the next,
+    try the language's statement pattern at the start of that line (it may
+    continue over several lines), then look for import calls in the rest of it
+    Python relative imports come back in path form ('..pkg.mod' -> '../pkg/mod'),
+    absolute Python and Java imports as dotted module names (one per imported
+    name: 'from pkg import a, b' -> 'pkg.a', 'pkg.b')
+    Returns: import strings in source order, for normalize_import_path
+    """
+    keyword, statement, call = IMPORT_LEXERS[language]
+    imports = []
+    pos = 0
+    while True:
+        k = keyword.search(text, pos)
+        if k is None:
+            return imports
+        line_start = text.rfind('\n', 0, k.start()) + 1
+        if line_start >= pos:
+            # Line not consumed by an earlier (multi-line) statement
+            m = statement.match(text, line_start)
+            if m is not None:
+                imports.extend(_statement_targets(language, m))
+                pos = m.end()
+                continue
+        line_end = text.find('\n', k.start())
+        if line_end == -1:
+            line_end = len(text)
+        if call is not None:
+            for m in call.finditer(text, max(line_start, pos), line_end):
+                target = m.group(2)
+                imports.append(_python_module_path(target) if language == 'python' else target)
+        pos = line_end
+
+def _statement_targets(language, m):
+    if language == 'javascript':
+        return [m.group('from') or m.group('bare')]
+    if language == 'java':
+        name = m.group('name')
+        if m.group('static') and not m.group('star'):
+            name = name.rpartition('.')[0]  # static member import -> its class
+        return [name]
+    if m.group('modules') is not None:
+        modules = PY_CONTINUATION.sub(' ', m.group('modules'))
+        return [_python_module_path(part.split()[0]) for part in modules.split(',') if part.strip()]
+    module = m.group('module')
+    names = PY_CONTINUATION.sub(' ', m.group('names')).strip('()\r\n\t ')
+    names = [name.split()[0] for name in names.split(',') if name.strip()]
+    if not module.strip('.'):
+        # from . import a, b: each name is a sibling module
+        return [_python_module_path(module + name) for name in names]
+    if module.startswith('.') or not names or names == ['*']:
+        return [_python_module_path(module)]
+    # from pkg import a, b: 'pkg.a', 'pkg.b' - each is kept if it is a module
+    # of the repo, else resolves to pkg itself (see _resolve_module)
+    return [f"{module}.{name}" for name in names]
+
+def _python_module_path(module):
+    # '.a.b' -> './a/b', '..a' -> '../a'; absolute 'a.b' stays dotted
+    rest = module.lstrip('.')
+    dots = len(module) - len(rest)
+    if not dots:
+        return module
+    prefix = './' if dots == 1 else '../' * (dots - 1)
+    return prefix + rest.replace('.', '/')
+
 def normalize_import_path(import_path, from_file, repo_root):
     if import_path.startswith('.') or import_path.startswith('/'):
         base = os.path.dirname(from_file)
         candidate = os.path.normpath(os.path.join(base, import_path))
         
         # Try with various extensions
-        for ext in ['', '.js', '.ts', '.py', '/index.js', '/index.ts', '/index.py']:
+        for ext in RELATIVE_SUFFIXES:
             if ext and not candidate.endswith(ext):
                 p = candidate + ext
             else:
@@ -61,5 +184,127 @@ def normalize_import_path(import_path, from_file, repo_root):
         
         # Return as-is if not found
         return os.path.relpath(candidate, repo_root)
+    elif language_for(from_file) != 'javascript':
+        # Dotted Python/Java module (or its closest parent), looked up from the repo root
+        module = import_path.replace('.', '/')
+        while module:
+            for ext in MODULE_SUFFIXES:
+                if os.path.isfile(os.path.join(repo_root, module + ext)):
+                    return module + ext
+            module = module.rpartition('/')[0]
+        return import_path.split('.')[0]
     else:
         return import_path.split('/')[0]
+
+def make_import_resolver(known_paths, repo_root):
+    """
+    Build an import resolver over a snapshot of repo-relative source paths
+    (taken once while walking the repo / listing the ZIP), without any stat calls,
+    memoized per (from_dir, import_path, language)
+    Relative imports resolve as in normalize_import_path. Dotted Python/Java
+    modules go through build_module_index, so unlike normalize_import_path
+    (repo root only) they are also found below source roots like src/, and a
+    bare Python name also matches a module next to the importer
+    Returns: resolve(import_path, from_rel) -> normalized path
+    """
+    cache = {}
+    modules = build_module_index(known_paths)
+
+    def resolve(import_path, from_rel):
+        key = (os.path.dirname(from_rel), import_path, language_for(from_rel))
+        hit = cache.get(key)
+        if hit is None:
+            hit = cache[key] = _resolve_in_snapshot(import_path, key[0], known_paths, repo_root, modules, key[2])
+        return hit
+
+    return resolve
+
+def _resolve_in_snapshot(import_path, from_dir, known_paths, repo_root, modules, language):
+    if not (import_path.startswith('.') or import_path.startswith('/')):
+        if language == 'javascript':
+            return import_path.split('/')[0]
+        return _resolve_module(import_path, from_dir, modules, known_paths, language)
+
+    full = os.path.normpath(os.path.join(repo_root, from_dir, import_path))
+    candidate = os.path.relpath(full, repo_root)
+
+    # The '/index.*' suffixes also cover normalize_import_path's directory fallback
+    for ext in RELATIVE_SUFFIXES:
+        if ext and not candidate.endswith(ext):
+            p = os.path.normpath(candidate + ext)
+        else:
+            p = candidate
+        if p in known_paths:
+            return p
+
+    return candidate
+
+def build_module_index(paths):
+    """
+    Dotted module name -> Python/Java files that can be imported under it,
+    without knowing where the source roots are
+    Java: every trailing part of the path counts, so
+    src/main/java/com/x/Foo.java answers 'com.x.Foo'
+    Python: trailing parts of two or more names count ('pkg.mod' for
+    src/pkg/mod.py); a single name only at the repo root (and, see
+    _module_candidates, next to the importer), so app/logging.py never
+    answers 'import logging' elsewhere in the repo
+    """
+    modules = defaultdict(list)
+    for p in paths:
+        stem, ext = os.path.splitext(p)
+        if ext not in ('.py', '.java'):
+            continue
+        if ext == '.py' and os.path.basename(stem) == '__init__':
+            stem = os.path.dirname(stem)
+        parts = stem.replace(os.sep, '/').split('/')
+        if ext == '.java':
+            for i in range(len(parts)):
+                modules['.'.join(parts[i:])].append(p)
+            continue
+        for i in range(len(parts) - 1):
+            modules['.'.join(parts[i:])].append(p)
+        if len(parts) == 1:
+            modules[parts[0]].append(p)
+    return modules
+
+def _module_candidates(module, from_dir, modules, known_paths, language):
+    candidates = modules.get(module, [])
+    if language == 'python' and '.' not in module:
+        # 'import helpers' next to the importer (script directories)
+        here = [p for p in (os.path.join(from_dir, module + '.py'), os.path.join(from_dir, module, '__init__.py'))
+                if p in known_paths and p not in candidates]
+        if here:
+            candidates = candidates + here
+    return candidates
+
+def _resolve_module(module, from_dir, modules, known_paths, language):
+    # 'pkg.name' that isn't a module (a function, class, ...) -> the closest indexed parent
+    candidates = _module_candidates(module, from_dir, modules, known_paths, language)
+    parent = module
+    while not candidates and '.' in parent:
+        parent = parent.rpartition('.')[0]
+        candidates = _module_candidates(parent, from_dir, modules, known_paths, language)
+    if not candidates:
+        # Not in the repo: report the top-level package, like JS externals
+        return module.split('.')[0]
+    if len(candidates) == 1:
+        return candidates[0]
+    # Ambiguous suffix: prefer the file sharing most directories with the
+    # importer, then the one closest to the repo root
+    here = from_dir.split('/') if from_dir else []
+
+    def rank(p):
+        there = os.path.dirname(p).split('/')
+        shared = 0
+        for a, b in zip(here, there):
+            if a != b:
+                break
+            shared += 1
+        return (-shared, p.count('/'), p)
+
+    return min(candidates, key=rank)
+
+def build_path_index(paths):
+    # normalized repo-relative path -> node key, so import resolution is a dict hit
+    return {os.path.normpath(p): p for p in paths}
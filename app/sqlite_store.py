@@ -0,0 +1,338 @@
+"""
+SQLite Store Module
+/upload-analyze results persisted in an embedded SQLite database: files
+(scan record + compressed source), edges, definitions and call sites,
+indexed by path and symbol name. Repo ids survive restarts, and symbol and
+source lookups need neither the repo in memory nor its extracted tree.
+Background job state lives here too, so with several server processes
+sharing one database any of them can answer for any repo_id or job_id
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+from .scanner import decode_source, split_text_lines
+
+# Database file (put it on a persistent volume); empty (the default) disables persistence
+DB_PATH = os.environ.get('LEGACYMAP_DB_PATH', '')
+# Most repos kept in the database; the oldest are deleted past this
+MAX_REPOS = int(os.environ.get('LEGACYMAP_DB_MAX_REPOS', '1000'))
+# Most bytes of stored repos (records + compressed sources + call sites); oldest deleted first
+MAX_BYTES = int(os.environ.get('LEGACYMAP_DB_MAX_BYTES', str(1024 * 1024 * 1024)))
+# Seconds a writer waits for another process' transaction before giving up
+BUSY_TIMEOUT = float(os.environ.get('LEGACYMAP_DB_TIMEOUT', '30'))
+
+# Bump when the table layout changes; older databases are emptied and recreated
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS repos (
+    repo_id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    bytes INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    repo_id TEXT NOT NULL,
+    node_id INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    loc INTEGER NOT NULL,
+    imports_count INTEGER NOT NULL,
+    imported_by_count INTEGER NOT NULL,
+    risk REAL NOT NULL,
+    record TEXT NOT NULL,
+    source BLOB,
+    PRIMARY KEY (repo_id, node_id)
+);
+CREATE INDEX IF NOT EXISTS files_path ON files (repo_id, path);
+CREATE TABLE IF NOT EXISTS edges (
+    repo_id TEXT NOT NULL,
+    source_id INTEGER NOT NULL,
+    target_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS edges_repo ON edges (repo_id);
+CREATE TABLE IF NOT EXISTS definitions (
+    repo_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    path TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    line_end INTEGER,
+    type TEXT NOT NULL,
+    parent_class TEXT
+);
+CREATE INDEX IF NOT EXISTS definitions_name ON definitions (repo_id, name);
+CREATE TABLE IF NOT EXISTS call_sites (
+    repo_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    path TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    code TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS call_sites_name ON call_sites (repo_id, name);
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    submitted_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished_at);
+"""
+
+# What save() / load() may raise (database locked, disk full, ...)
+Error = (sqlite3.Error, OSError)
+
+# Tables holding per-repo rows, deleted together
+REPO_TABLES = ('files', 'edges', 'definitions', 'call_sites', 'repos')
+ALL_TABLES = REPO_TABLES + ('jobs',)
+JOB_COLUMNS = ('job_id', 'kind', 'status', 'submitted_at', 'started_at', 'finished_at', 'result', 'error')
+
+_local = threading.local()
+
+
+def enabled():
+    return bool(DB_PATH)
+
+
+def _connect():
+    # One connection per thread (sqlite3 connections aren't shared across threads)
+    conn = getattr(_local, 'conn', None)
+    if conn is None or getattr(_local, 'path', None) != DB_PATH:
+        os.makedirs(os.path.dirname(os.path.abspath(DB_PATH)), exist_ok=True)
+        conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT)
+        # WAL: readers (any process) never wait for a writer
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            if conn.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+                for table in ALL_TABLES:
+                    conn.execute(f'DROP TABLE IF EXISTS {table}')
+                conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+            for statement in SCHEMA.split(';'):
+                conn.execute(statement)
+        _local.conn, _local.path = conn, DB_PATH
+    return conn
+
+
+@contextmanager
+def _write():
+    """
+    One write transaction, committed on exit (rolled back on error)
+    BEGIN IMMEDIATE takes the database write lock up front, so concurrent
+    writers from other processes wait up to BUSY_TIMEOUT instead of failing
+    halfway through with "database is locked"
+    """
+    conn = _connect()
+    with conn:
+        conn.execute('BEGIN IMMEDIATE')
+        yield conn
+
+
+def save(repo_id, repo_root, records, nodes, edges):
+    """
+    Persist one analysis in a single transaction (replacing any earlier copy)
+    records: per-file scan records; source text is read from repo_root
+    (call sites go to their own table only, not into the stored record)
+    nodes: stored graph node dicts, in node id order; edges: [{'source', 'target'}]
+    """
+    ids = {node['path']: i for i, node in enumerate(nodes)}
+    by_path = {rec['path']: rec for rec in records}
+    files = []
+    for i, node in enumerate(nodes):
+        rec = {k: v for k, v in by_path[node['path']].items() if k != 'call_sites'}
+        record = json.dumps(rec, separators=(',', ':'))
+        source = _compressed_source(repo_root, node['path'])
+        files.append((repo_id, i, node['path'], node['loc'], node['imports_count'],
+                      node['imported_by_count'], node['risk'], record, source))
+    size = sum(len(row[7]) + len(row[8] or b'') for row in files) + sum(
+        len(name) + len(code) for rec in records for name, _, code in rec.get('call_sites', []))
+    with _write() as conn:
+        _delete(conn, repo_id)
+        conn.execute('INSERT INTO repos (repo_id, created_at, bytes) VALUES (?, ?, ?)',
+                     (repo_id, time.time(), size))
+        conn.executemany('INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', files)
+        conn.executemany(
+            'INSERT INTO edges VALUES (?, ?, ?)',
+            ((repo_id, ids[e['source']], ids[e['target']]) for e in edges))
+        conn.executemany(
+            'INSERT INTO definitions VALUES (?, ?, ?, ?, ?, ?, ?)',
+            ((repo_id, item['name'], rec['path'], item['line_start'], item.get('line_end'),
+              item['type'], item.get('parent_class'))
+             for rec in records for item in rec['functions_classes']))
+        conn.executemany(
+            'INSERT INTO call_sites VALUES (?, ?, ?, ?, ?)',
+            ((repo_id, name, rec['path'], line, code)
+             for rec in records for name, line, code in rec.get('call_sites', [])))
+        _prune(conn, keep=repo_id)
+
+
+def load(repo_id):
+    """
+    Returns: {'records', 'nodes', 'edges'} as save() got them (node dicts
+    rebuilt), or None if the repo isn't in the database
+    """
+    conn = _connect()
+    if conn.execute('SELECT 1 FROM repos WHERE repo_id = ?', (repo_id,)).fetchone() is None:
+        return None
+    rows = conn.execute(
+        'SELECT path, loc, imports_count, imported_by_count, risk, record FROM files '
+        'WHERE repo_id = ? ORDER BY node_id', (repo_id,)).fetchall()
+    paths = [row[0] for row in rows]
+    imports = [[] for _ in rows]
+    edges = []
+    for src, dst in conn.execute(
+            'SELECT source_id, target_id FROM edges WHERE repo_id = ? ORDER BY rowid', (repo_id,)):
+        imports[src].append(paths[dst])
+        edges.append({'source': paths[src], 'target': paths[dst]})
+
+    call_sites = {path: [] for path in paths}
+    for path, name, line, code in conn.execute(
+            'SELECT path, name, line, code FROM call_sites WHERE repo_id = ? ORDER BY rowid', (repo_id,)):
+        call_sites[path].append((name, line, code))
+
+    records = []
+    nodes = []
+    for i, (path, loc, imports_count, imported_by_count, risk, record) in enumerate(rows):
+        rec = json.loads(record)
+        rec['call_sites'] = call_sites[path]
+        records.append(rec)
+        # Same keys, same order as the node dicts _store_repo keeps
+        nodes.append({
+            'loc': loc,
+            'imports': imports[i],
+            'imported_by': [],
+            'imports_count': imports_count,
+            'imported_by_count': imported_by_count,
+            'risk': risk,
+            'functions_classes': rec['functions_classes'],
+            'path': path,
+        })
+    return {'records': records, 'nodes': nodes, 'edges': edges}
+
+
+def source_lines(repo_id, path):
+    """
+    Returns: lines of a stored source file (like scanner.read_file_lines), or None
+    """
+    row = _connect().execute(
+        'SELECT source FROM files WHERE repo_id = ? AND path = ?', (repo_id, path)).fetchone()
+    if row is None or row[0] is None:
+        return None
+    return split_text_lines(decode_source(zlib.decompress(row[0])))
+
+
+class SymbolLookup:
+    """
+    Indexed stand-in for the symbol index dicts of build_symbol_index:
+    get(name) runs one query on (repo_id, name) instead of holding the index
+    """
+
+    QUERIES = {
+        'calls': ('SELECT path, line, code FROM call_sites WHERE repo_id = ? AND name = ? ORDER BY rowid',
+                  ('file', 'line', 'code')),
+        'definitions': ('SELECT path, line, line_end, type, parent_class FROM definitions '
+                        'WHERE repo_id = ? AND name = ? ORDER BY rowid',
+                        ('file', 'line', 'line_end', 'type', 'parent_class')),
+    }
+
+    def __init__(self, repo_id, kind):
+        self.repo_id = repo_id
+        self.sql, self.columns = self.QUERIES[kind]
+
+    def get(self, name, default=None):
+        rows = _connect().execute(self.sql, (self.repo_id, name)).fetchall()
+        if not rows:
+            return default
+        return [dict(zip(self.columns, row)) for row in rows]
+
+
+def delete(repo_id):
+    with _write() as conn:
+        _delete(conn, repo_id)
+
+
+def save_job(job):
+    """Insert or replace a background job (jobs.submit_job dict; result stored as JSON)"""
+    row = dict(job, result=None if job['result'] is None else json.dumps(job['result'], separators=(',', ':')))
+    with _write() as conn:
+        conn.execute(
+            f"INSERT OR REPLACE INTO jobs VALUES ({', '.join('?' * len(JOB_COLUMNS))})",
+            [row[name] for name in JOB_COLUMNS])
+
+
+def load_job(job_id):
+    """Returns: job dict as save_job() got it, or None if unknown"""
+    row = _connect().execute(
+        f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+    if row is None:
+        return None
+    job = dict(zip(JOB_COLUMNS, row))
+    if job['result'] is not None:
+        job['result'] = json.loads(job['result'])
+    return job
+
+
+def prune_jobs(cutoff):
+    """Delete jobs that finished before cutoff (epoch seconds)"""
+    with _write() as conn:
+        conn.execute('DELETE FROM jobs WHERE finished_at < ?', (cutoff,))
+
+
+def stats():
+    """Returns: dict with the database path, repo and job counts, stored repo bytes and size on disk"""
+    if not enabled():
+        return {'enabled': False}
+    conn = _connect()
+    repos, repo_bytes = conn.execute('SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM repos').fetchone()
+    jobs = conn.execute('SELECT COUNT(*) FROM jobs').fetchone()[0]
+    try:
+        size = os.path.getsize(DB_PATH)
+    except OSError:
+        size = 0
+    return {
+        'enabled': True,
+        'path': DB_PATH,
+        'repos': repos,
+        'jobs': jobs,
+        'repo_bytes': repo_bytes,
+        'file_bytes': size,
+        'max_repos': MAX_REPOS,
+        'max_bytes': MAX_BYTES,
+    }
+
+
+def _delete(conn, repo_id):
+    for table in REPO_TABLES:
+        conn.execute(f'DELETE FROM {table} WHERE repo_id = ?', (repo_id,))
+
+
+def _prune(conn, keep=None):
+    # Caller holds the transaction. Deletes the oldest repos while over the
+    # count/byte limits (never the just-saved `keep` repo)
+    rows = conn.execute('SELECT repo_id, bytes FROM repos ORDER BY created_at').fetchall()
+    count = len(rows)
+    total = sum(size for _, size in rows)
+    for repo_id, size in rows:
+        if count <= MAX_REPOS and total <= MAX_BYTES:
+            break
+        if repo_id == keep:
+            continue
+        _delete(conn, repo_id)
+        count -= 1
+        total -= size
+
+
+def _compressed_source(repo_root, path):
+    try:
+        with open(os.path.join(repo_root, path), 'rb') as f:
+            return zlib.compress(f.read(), 1)
+    except OSError:
+        return None
@@ -0,0 +1,79 @@
+"""
+Streaming & Pagination Module
+NDJSON encoding of analysis results (one JSON object per line, written in
+chunks instead of one giant document) and cursor pagination over stored graphs
+"""
+
+from fastapi.responses import StreamingResponse
+
+from .encoding import dumps
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Lines joined per chunk written to the socket
+NDJSON_CHUNK_LINES = 500
+# Page size limits for /repos/{repo_id}/nodes and /edges
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10000
+
+
+def iter_ndjson(items):
+    """Encode an iterable of dicts as NDJSON, yielded in chunks of lines (bytes)"""
+    buf = []
+    for item in items:
+        buf.append(dumps(item))
+        if len(buf) >= NDJSON_CHUNK_LINES:
+            yield b'\n'.join(buf) + b'\n'
+            buf = []
+    if buf:
+        yield b'\n'.join(buf) + b'\n'
+
+
+def ndjson_response(items, headers=None):
+    return StreamingResponse(iter_ndjson(items), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+
+
+def upload_events(result):
+    """
+    /upload result as NDJSON events:
+    {"type": "summary", ...}, then one {"type": "node"}, {"type": "edge"},
+    {"type": "component"} line per item
+    timings=true adds "timings" to the summary event
+    """
+    summary = dict(result['summary'], type='summary')
+    if 'timings' in result:
+        summary['timings'] = result['timings']
+    yield summary
+    # nodes / edges are missing under view=summary
+    for node in result.get('nodes', {}).values():
+        yield dict(node, type='node')
+    for edge in result.get('edges', ()):
+        yield dict(edge, type='edge')
+    for comp in result['components']:
+        yield dict(comp, type='component')
+
+
+def detailed_events(result):
+    """/upload-analyze result as NDJSON events (summary, nodes, edges, top_10_risky)"""
+    summary = {k: v for k, v in result.items() if k not in ('nodes', 'edges', 'top_10_risky')}
+    yield dict(summary, type='summary')
+    for path, meta in result.get('nodes', {}).items():
+        yield dict(meta, type='node', path=path)
+    for edge in result.get('edges', ()):
+        yield dict(edge, type='edge')
+    for item in result['top_10_risky']:
+        yield dict(item, type='risky')
+
+
+def paginate(items, cursor, limit):
+    """
+    Slice a stored list with an opaque cursor (the offset of the next item)
+    Returns: (page, next_cursor) - next_cursor is None on the last page
+    Raises: ValueError for a malformed cursor
+    """
+    start = int(cursor) if cursor else 0
+    if start < 0:
+        raise ValueError(cursor)
+    limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+    end = start + limit
+    page = items[start:end]
+    return page, (str(end) if end < len(items) else None)
@@ -0,0 +1,58 @@
+"""
+Symbol Index Module
+Inverted index of identifiers built once per upload, so /function-details
+answers "where is X called" with a dictionary lookup instead of a repo walk
+"""
+
+import re
+
+# Same call shapes find_function_calls looks for (name(, .name(, new Name( ):
+# all of them are an identifier followed by '('
+CALL_PATTERN = re.compile(r'\b(\w+)\s*\(')
+
+
+def extract_call_sites(lines):
+    """
+    Find every identifier used as a call in a file
+    Returns: List of (name, line_number, code) - one entry per name per line
+    """
+    sites = []
+    for i, line in enumerate(lines, 1):
+        if '(' not in line:
+            continue
+        seen = set()
+        code = None
+        for m in CALL_PATTERN.finditer(line):
+            name = m.group(1)
+            if name in seen:
+                continue
+            seen.add(name)
+            if code is None:
+                code = line.strip()
+            sites.append((name, i, code))
+    return sites
+
+
+def build_symbol_index(records):
+    """
+    Merge per-file records into repo-wide lookups
+    Returns: {
+        'calls': name -> [{'file', 'line', 'code'}, ...],
+        'definitions': name -> [{'file', 'line', 'line_end', 'type', 'parent_class'}, ...]
+    }
+    """
+    calls = {}
+    definitions = {}
+    for rec in records:
+        path = rec['path']
+        for name, line, code in rec.get('call_sites', []):
+            calls.setdefault(name, []).append({'file': path, 'line': line, 'code': code})
+        for item in rec['functions_classes']:
+            definitions.setdefault(item['name'], []).append({
+                'file': path,
+                'line': item['line_start'],
+                'line_end': item.get('line_end'),
+                'type': item['type'],
+                'parent_class': item.get('parent_class'),
+            })
+    return {'calls': calls, 'definitions': definitions}
@@ -1,9 +1,13 @@
-import zipfile, tempfile, shutil, os
+import zipfile, tempfile, shutil, os, posixpath, hashlib
 
 def extract_zip_to_temp(zip_path):
     tmp = tempfile.mkdtemp(prefix="legacymap_")
-    with zipfile.ZipFile(zip_path, 'r') as z:
-        z.extractall(tmp)
+    try:
+        with zipfile.ZipFile(zip_path, 'r') as z:
+            z.extractall(tmp)
+    except:
+        cleanup(tmp)
+        raise
     return tmp
 
 def cleanup(path):
@@ -11,3 +15,108 @@ def cleanup(path):
         shutil.rmtree(path)
     except:
         pass
+
+def dir_size(path):
+    """Total bytes of the regular files under path"""
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for fname in files:
+            try:
+                total += os.lstat(os.path.join(root, fname)).st_size
+            except OSError:
+                pass
+    return total
+
+def open_upload_zip(source):
+    """
+    Open a ZIP from a path or directly on a seekable file object (e.g.
+    UploadFile.file, which Starlette already spools to memory/disk)
+    """
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return zipfile.ZipFile(source, 'r')
+
+def save_upload_to_temp(fileobj, chunk_size=1024 * 1024):
+    """
+    Copy an upload to a temp ZIP on disk in chunks (for work that outlives the request)
+    Returns: zip_path (str)
+    """
+    fileobj.seek(0)
+    fd, zip_path = tempfile.mkstemp(prefix="legacymap_", suffix=".zip")
+    with os.fdopen(fd, 'wb') as dst:
+        shutil.copyfileobj(fileobj, dst, chunk_size)
+    return zip_path
+
+def sha256_file(source, chunk_size=1024 * 1024):
+    """
+    SHA-256 of a path or seekable file object, read in chunks
+    Returns: hex digest (str)
+    """
+    h = hashlib.sha256()
+    if hasattr(source, 'seek'):
+        source.seek(0)
+        for chunk in iter(lambda: source.read(chunk_size), b''):
+            h.update(chunk)
+        source.seek(0)
+    else:
+        with open(source, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                h.update(chunk)
+    return h.hexdigest()
+
+def list_zip_members(z):
+    """
+    List regular files in an open ZIP
+    Returns: List of (member_name, rel_path) with unsafe paths (absolute, '..') dropped
+    """
+    members = []
+    for info in z.infolist():
+        if info.is_dir():
+            continue
+        rel = posixpath.normpath(info.filename.replace('\\', '/').lstrip('/'))
+        if rel == '.' or rel == '..' or rel.startswith('../'):
+            continue
+        members.append((info.filename, rel))
+    return members
+
+def read_zip_bytes(z, member):
+    try:
+        return z.read(member)
+    except:
+        return b''
+
+def extract_zip_members(z, members, root=None):
+    """
+    Materialize only the given (member_name, rel_path) pairs into a fresh temp dir
+    root: existing directory to extract into instead
+    Returns: temp_directory_path (str)
+    """
+    tmp = tempfile.mkdtemp(prefix="legacymap_") if root is None else root
+    try:
+        for member, rel in members:
+            dest = os.path.join(tmp, rel)
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            with z.open(member) as src, open(dest, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+    except:
+        if root is None:
+            cleanup(tmp)
+        raise
+    return tmp
+
+
+def link_files(src_root, dst_root, rel_paths):
+    """
+    Hard-link files from one tree into another (same relative paths); no data is copied
+    Returns: set of rel paths linked (the rest, e.g. across filesystems, weren't)
+    """
+    linked = set()
+    for rel in rel_paths:
+        dest = os.path.join(dst_root, rel)
+        try:
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            os.link(os.path.join(src_root, rel), dest)
+        except OSError:
+            continue
+        linked.add(rel)
+    return linked
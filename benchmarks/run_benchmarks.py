@@ -0,0 +1,182 @@
+"""
+Benchmark Suite
+Times each analysis stage on a synthetic repo and prints the results as JSON,
+so runs can be saved and compared between versions
+
+    python -m benchmarks.run_benchmarks --files 2000 --loc 200 --repeat 3 > bench.json
+
+Stages (each timed separately, best of --repeat runs):
+    zip_extraction         extract_zip_to_temp on a ZIP of the repo
+    extract_imports        scanner.extract_imports_from_text (per-language lexer) over every file
+    extract_imports_per_line  the original three-regexes-per-line loop, for comparison
+    normalize_import_path  scanner.normalize_import_path (stat calls) per import - the original resolver
+    resolve_imports        scanner.make_import_resolver (path snapshot + module index) per import;
+                           same answers for relative imports, also finds dotted modules below source roots
+    extract_functions      extract_functions_and_classes_from_lines (AST for Python) over every file
+    graph_build            graph.build_graph from the resolved edges
+    scc                    DependencyGraph.strongly_connected_components
+    serialization          encoding.dumps (orjson when installed) of the /upload result
+    upload_end_to_end      main.analyze_zip (what /upload runs)
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import zipfile
+
+from app import encoding, scanner
+from app.analysis import list_directory_sources, shutdown_pool
+from app.function_extractor import extract_functions_and_classes_from_lines
+from app.graph import build_graph
+from app.utils import extract_zip_to_temp, cleanup
+
+from .synthetic_repo import LANGUAGES, generate_repo
+
+with contextlib.redirect_stdout(sys.stderr):
+    # main.py announces itself on import; keep stdout for the JSON report
+    from app import main as app_main
+
+
+def time_stage(fn, repeat):
+    """
+    Run fn() `repeat` times
+    Returns: (stats dict, value returned by the last run)
+    """
+    runs = []
+    value = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = fn()
+        runs.append(time.perf_counter() - start)
+    return {'best': min(runs), 'mean': sum(runs) / len(runs), 'runs': runs}, value
+
+
+def run_benchmarks(repo_root, zip_path, repeat=3):
+    """
+    Time every stage on an already generated repo
+    Returns: dict stage name -> {'best', 'mean', 'runs'} (seconds)
+    """
+    stages = {}
+
+    def extract():
+        cleanup(extract_zip_to_temp(zip_path))
+    stages['zip_extraction'], _ = time_stage(extract, repeat)
+
+    sources = list_directory_sources(repo_root)
+    files = [(rel, scanner.read_file_lines(full)) for rel, full in sources]
+    texts = [(rel, ''.join(lines), scanner.language_for(rel)) for rel, lines in files]
+
+    stages['extract_imports'], raw = time_stage(
+        lambda: [(rel, scanner.extract_imports_from_text(text, language)) for rel, text, language in texts], repeat)
+    stages['extract_imports_per_line'], _ = time_stage(
+        lambda: [scanner.extract_imports_per_line(lines) for _, lines in files], repeat)
+
+    def normalize():
+        return [
+            scanner.normalize_import_path(imp, os.path.join(repo_root, rel), repo_root)
+            for rel, imports in raw for imp in imports
+        ]
+    stages['normalize_import_path'], _ = time_stage(normalize, repeat)
+
+    known = {rel for rel, _ in files}
+
+    def resolve():
+        resolve_import = scanner.make_import_resolver(known, repo_root)
+        return [
+            (rel, target)
+            for rel, imports in raw for target in (resolve_import(imp, rel) for imp in imports)
+            if target in known and target != rel
+        ]
+    stages['resolve_imports'], edge_pairs = time_stage(resolve, repeat)
+
+    stages['extract_functions'], _ = time_stage(
+        lambda: [extract_functions_and_classes_from_lines(lines, scanner.language_for(rel)) for rel, lines in files], repeat)
+
+    paths = [rel for rel, _ in files]
+    stages['graph_build'], graph = time_stage(lambda: build_graph(paths, edge_pairs), repeat)
+    stages['scc'], _ = time_stage(graph.strongly_connected_components, repeat)
+
+    stages['upload_end_to_end'], result = time_stage(lambda: app_main.analyze_zip(zip_path), repeat)
+    stages['serialization'], _ = time_stage(lambda: encoding.dumps(result), repeat)
+
+    return stages
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run_benchmarks', description='Time LegacyMap analysis stages')
+    parser.add_argument('--files', type=int, default=500)
+    parser.add_argument('--loc', type=int, default=100)
+    parser.add_argument('--fanout', type=int, default=4)
+    parser.add_argument('--cycles', type=int, default=5)
+    parser.add_argument('--languages', default=','.join(LANGUAGES))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--out', help='write the JSON report here instead of stdout')
+    parser.add_argument('--baseline', help='earlier report; adds best-time ratios (new / old) per stage')
+    args = parser.parse_args(argv)
+
+    config = {
+        'files': args.files,
+        'loc': args.loc,
+        'fanout': args.fanout,
+        'cycles': args.cycles,
+        'languages': args.languages.split(','),
+        'seed': args.seed,
+        'repeat': args.repeat,
+    }
+
+    work_dir = tempfile.mkdtemp(prefix='legacymap_bench_')
+    try:
+        repo_root = os.path.join(work_dir, 'repo')
+        info = generate_repo(repo_root, args.files, args.loc, args.fanout, args.cycles,
+                             tuple(config['languages']), args.seed)
+
+        zip_path = os.path.join(work_dir, 'repo.zip')
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as z:
+            for rel in info['files']:
+                z.write(os.path.join(repo_root, rel), rel)
+        zip_bytes = os.path.getsize(zip_path)
+
+        stages = run_benchmarks(repo_root, zip_path, args.repeat)
+    finally:
+        cleanup(work_dir)
+        shutdown_pool()
+
+    report = {
+        'config': config,
+        'repo': {
+            'files': len(info['files']),
+            'imports': info['imports'],
+            'zip_bytes': zip_bytes,
+        },
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        },
+        'stages': stages,
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['stages']
+        report['vs_baseline'] = {
+            name: round(stats['best'] / baseline[name]['best'], 3)
+            for name, stats in stages.items()
+            if baseline.get(name, {}).get('best')
+        }
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""
+Synthetic Repository Generator
+Writes a fake multi-language repo (JS / TS / Python / Java) with a chosen
+number of files, lines per file, import fan-out and import cycles, so the
+analysis stages can be timed on repos of any size
+
+    python -m benchmarks.synthetic_repo OUT_DIR --files 2000 --loc 200
+"""
+
+import argparse
+import os
+import random
+
+LANGUAGES = ('js', 'ts', 'py', 'java')
+PACKAGE_SIZE = 50  # files per directory
+
+
+def generate_repo(out_dir, files=200, loc=100, fanout=4, cycles=5, languages=LANGUAGES, seed=0):
+    """
+    Write the repo under out_dir (created if missing)
+    files: number of source files, spread round-robin over `languages`
+    loc: approximate lines per file
+    fanout: imports per file (of earlier files in the same language)
+    cycles: back edges added per language, each closing an import cycle
+    Returns: dict with the generated file list and import count
+    """
+    rng = random.Random(seed)
+    modules = [_module(i, languages[i % len(languages)]) for i in range(files)]
+
+    by_language = {}
+    for mod in modules:
+        by_language.setdefault(mod['language'], []).append(mod)
+
+    # Acyclic imports first: every file imports earlier files of its language...
+    for group in by_language.values():
+        for pos, mod in enumerate(group):
+            if pos:
+                mod['imports'] = rng.sample(group[:pos], min(fanout, pos))
+        # ...then each back edge (earlier -> later file that imports it) closes a cycle
+        for _ in range(cycles if fanout and len(group) > 1 else 0):
+            later = group[rng.randrange(1, len(group))]
+            earlier = rng.choice(later['imports'])
+            if later not in earlier['imports']:
+                earlier['imports'].append(later)
+
+    total_imports = 0
+    for mod in modules:
+        path = os.path.join(out_dir, mod['path'])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(_render(mod, loc))
+        total_imports += len(mod['imports'])
+
+    return {'files': [m['path'] for m in modules], 'imports': total_imports}
+
+
+def _module(i, language):
+    package = f"pkg{i // PACKAGE_SIZE}"
+    if language == 'java':
+        name = f"Mod{i}"
+    else:
+        name = f"mod{i}"
+    return {
+        'index': i,
+        'language': language,
+        'package': package,
+        'name': name,
+        'path': f"{package}/{name}.{language}",
+        'imports': [],
+    }
+
+
+def _render(mod, loc):
+    render = {'js': _render_js, 'ts': _render_js, 'py': _render_py, 'java': _render_java}[mod['language']]
+    return render(mod, loc)
+
+
+def _relative(mod, other):
+    rel = os.path.relpath(os.path.join(other['package'], other['name']), mod['package'])
+    return rel if rel.startswith('.') else './' + rel
+
+
+def _render_js(mod, loc):
+    out = []
+    for k, other in enumerate(mod['imports']):
+        if k % 2:
+            out.append(f"const {other['name']} = require('{_relative(mod, other)}');")
+        else:
+            out.append(f"import {{ helper as {other['name']} }} from '{_relative(mod, other)}';")
+    out.append('')
+    out.append(f"class {mod['name'].capitalize()}Service {{")
+    out.append("  constructor(repo) {")
+    out.append("    this.repo = repo;")
+    out.append("  }")
+    out.append("")
+    out.append("  run(input) {")
+    out.append("    return helper(input);")
+    out.append("  }")
+    out.append("}")
+    out.append('')
+    callees = [o['name'] for o in mod['imports']] or ['Math.abs']
+    n = 0
+    while len(out) < loc:
+        callee = callees[n % len(callees)]
+        out.append(f"// step {n}")
+        out.append(f"function step{n}(value) {{")
+        out.append(f"  const next = {callee}(value + {n});")
+        out.append("  if (next > 100) {")
+        out.append("    return next - 1;")
+        out.append("  }")
+        out.append("  return next;")
+        out.append("}")
+        out.append("")
+        n += 1
+    out.append("function helper(value) {")
+    out.append("  return value * 2;")
+    out.append("}")
+    out.append("")
+    out.append(f"module.exports = {{ helper, {mod['name'].capitalize()}Service }};")
+    return '\n'.join(out) + '\n'
+
+
+def _render_py(mod, loc):
+    out = [f'"""{mod["name"]} (generated)"""', 'import os']
+    for k, other in enumerate(mod['imports']):
+        if k % 2:
+            out.append(f"import {other['package']}.{other['name']}")
+        else:
+            out.append(f"from {other['package']}.{other['name']} import helper as {other['name']}_helper")
+    out.append('')
+    out.append('')
+    out.append(f"class {mod['name'].capitalize()}Service:")
+    out.append("    def __init__(self, repo):")
+    out.append("        self.repo = repo")
+    out.append("")
+    out.append("    def run(self, value):")
+    out.append("        return helper(value)")
+    out.append('')
+    out.append('')
+    callees = [f"{o['name']}_helper" for k, o in enumerate(mod['imports']) if not k % 2] or ['abs']
+    n = 0
+    while len(out) < loc:
+        callee = callees[n % len(callees)]
+        out.append(f"# step {n}")
+        out.append(f"def step{n}(value):")
+        out.append(f"    result = {callee}(value + {n})")
+        out.append("    if result > 100:")
+        out.append("        return result - 1")
+        out.append("    return result")
+        out.append('')
+        n += 1
+    out.append("def helper(value):")
+    out.append("    return value * 2")
+    return '\n'.join(out) + '\n'
+
+
+def _render_java(mod, loc):
+    out = [f"package {mod['package']};", '']
+    for other in mod['imports']:
+        out.append(f"import {other['package']}.{other['name']};")
+    out.append('')
+    out.append(f"public class {mod['name']} {{")
+    callees = [f"{o['name']}.helper" for o in mod['imports']] or ['Math.abs']
+    n = 0
+    while len(out) < loc - 5:
+        callee = callees[n % len(callees)]
+        out.append(f"    // step {n}")
+        out.append(f"    public static int step{n}(int value) {{")
+        out.append(f"        int result = {callee}(value + {n});")
+        out.append("        if (result > 100) {")
+        out.append("            return result - 1;")
+        out.append("        }")
+        out.append("        return result;")
+        out.append("    }")
+        out.append('')
+        n += 1
+    out.append("    public static int helper(int value) {")
+    out.append("        return value * 2;")
+    out.append("    }")
+    out.append("}")
+    return '\n'.join(out) + '\n'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.synthetic_repo', description=__doc__.strip().splitlines()[0])
+    parser.add_argument('out_dir')
+    parser.add_argument('--files', type=int, default=200)
+    parser.add_argument('--loc', type=int, default=100)
+    parser.add_argument('--fanout', type=int, default=4)
+    parser.add_argument('--cycles', type=int, default=5)
+    parser.add_argument('--languages', default=','.join(LANGUAGES))
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    info = generate_repo(args.out_dir, args.files, args.loc, args.fanout, args.cycles,
+                         tuple(args.languages.split(',')), args.seed)
+    print(f"{len(info['files'])} files, {info['imports']} imports -> {args.out_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+import io
+import os
+import zipfile
+
+import pytest
+
+SAMPLE_REPO = os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "sample_repo"))
+
+
+@pytest.fixture(scope="session")
+def sample_repo():
+    """Path of the checked-in sample_repo directory"""
+    return SAMPLE_REPO
+
+
+@pytest.fixture(scope="session")
+def sample_repo_zip():
+    """
+    Factory for sample_repo as ZIP bytes
+    changes: {rel_path: new text, or None to drop the file}
+    """
+    def build(changes=None):
+        files = {}
+        for dirpath, _, names in os.walk(SAMPLE_REPO):
+            for name in names:
+                full = os.path.join(dirpath, name)
+                with open(full, "rb") as f:
+                    files[os.path.relpath(full, SAMPLE_REPO).replace(os.sep, "/")] = f.read()
+        for rel, text in (changes or {}).items():
+            if text is None:
+                files.pop(rel)
+            else:
+                files[rel] = text.encode()
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w") as z:
+            for rel, data in sorted(files.items()):
+                z.writestr(rel, data)
+        return buf.getvalue()
+    return build
@@ -0,0 +1,30 @@
+import os
+
+from app import main, repo_store, sqlite_store
+from app.analysis import scan_directory
+
+
+def test_parallel_scan_matches_serial(sample_repo):
+    serial = scan_directory(sample_repo, workers=0)
+    parallel = scan_directory(sample_repo, workers=2, chunk_size=3)
+
+    assert len(serial) > 3
+    assert parallel == serial
+
+
+def test_incremental_upload_links_unchanged_files(monkeypatch, tmp_path, sample_repo_zip):
+    monkeypatch.setattr(sqlite_store, "DB_PATH", "")
+    old_zip, new_zip = tmp_path / "old.zip", tmp_path / "new.zip"
+    old_zip.write_bytes(sample_repo_zip())
+    new_zip.write_bytes(sample_repo_zip({"utils/logger.js": "// new\n"}))
+
+    base = repo_store.get(main.analyze_zip_detailed(str(old_zip), in_archive=True)["repo_id"])
+    new = repo_store.get(main.reanalyze_zip_detailed(str(new_zip), base["repo_id"])["repo_id"])
+
+    unchanged = os.path.join("utils", "validator.js")
+    changed = os.path.join("utils", "logger.js")
+    assert os.path.samefile(os.path.join(base["root"], unchanged), os.path.join(new["root"], unchanged))
+    assert not os.path.samefile(os.path.join(base["root"], changed), os.path.join(new["root"], changed))
+    with open(os.path.join(new["root"], changed)) as f:
+        assert f.read() == "// new\n"
+    repo_store.clear()
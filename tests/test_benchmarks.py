@@ -0,0 +1,32 @@
+import zipfile
+
+from app.analysis import scan_directory
+from app.main import analyze_directory
+from benchmarks.run_benchmarks import run_benchmarks
+from benchmarks.synthetic_repo import generate_repo
+
+
+def test_synthetic_repo_has_requested_shape(tmp_path):
+    info = generate_repo(str(tmp_path), files=40, loc=60, fanout=3, cycles=2, languages=("js",))
+    records = scan_directory(str(tmp_path), functions=False)
+
+    assert sorted(r["path"] for r in records) == sorted(info["files"])
+    assert all(r["loc"] >= 40 for r in records)
+    assert sum(len(r["imports_raw"]) for r in records) == info["imports"]
+    assert analyze_directory(str(tmp_path))["components"]
+
+
+def test_run_benchmarks_reports_every_stage(tmp_path):
+    repo = tmp_path / "repo"
+    info = generate_repo(str(repo), files=20, loc=40, fanout=2, cycles=2, languages=("js",))
+    zip_path = tmp_path / "repo.zip"
+    with zipfile.ZipFile(zip_path, "w") as z:
+        for rel in info["files"]:
+            z.write(repo / rel, rel)
+
+    stages = run_benchmarks(str(repo), str(zip_path), repeat=1)
+    assert set(stages) == {
+        "zip_extraction", "extract_imports", "extract_imports_per_line", "normalize_import_path", "resolve_imports",
+        "extract_functions", "graph_build", "scc", "serialization", "upload_end_to_end",
+    }
+    assert all(s["best"] >= 0 and len(s["runs"]) == 1 for s in stages.values())
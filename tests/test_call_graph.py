@@ -0,0 +1,63 @@
+from app.analysis import analyze_bytes
+from app.call_graph import build_call_graph
+
+UTIL_PY = b"""\
+def helper(x):
+    return x * 2
+
+
+def ping(n):
+    return pong(n - 1) if n else 0
+
+
+def pong(n):
+    return ping(n)
+"""
+
+MAIN_PY = b"""\
+from util import helper
+
+
+class Service:
+    def run(self, x):
+        return self.check(helper(x))
+
+    def check(self, value):
+        log.check(value)
+        return value
+
+
+def main():
+    print(Service().run(1))
+"""
+
+
+def _records():
+    return [analyze_bytes("util.py", UTIL_PY), analyze_bytes("main.py", MAIN_PY)]
+
+
+def test_calls_resolved_by_scope_and_imports():
+    cg = build_call_graph(_records(), [{"source": "main.py", "target": "util.py"}])
+    calls = {(c["source"], c["target"]) for c in cg["calls"]}
+
+    assert calls == {
+        ("util.py::ping", "util.py::pong"),
+        ("util.py::pong", "util.py::ping"),
+        ("main.py::Service.run", "main.py::Service.check"),
+        ("main.py::Service.run", "util.py::helper"),
+        ("main.py::main", "main.py::Service.run"),
+    }
+    by_key = {f["key"]: f for f in cg["functions"]}
+    assert by_key["util.py::helper"]["fan_in"] == 1
+    assert by_key["main.py::Service.run"]["fan_out"] == 2
+    # log.check( inside check is not a self-call
+    assert by_key["main.py::Service.check"]["fan_out"] == 0
+
+
+def test_mutual_recursion_is_a_cycle():
+    cg = build_call_graph(_records(), [])
+
+    assert cg["cycles"] == [["util.py::ping", "util.py::pong"]]
+    by_key = {f["key"]: f for f in cg["functions"]}
+    assert by_key["util.py::ping"]["cycle"] == 0
+    assert by_key["util.py::helper"]["cycle"] is None
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from app import encoding
+
+RESULT = {
+    "status": "success",
+    "total_files": 2,
+    "nodes": {
+        "a.py": {"loc": 10, "imports": ["b.py"], "imported_by": [], "imports_count": 1,
+                 "imported_by_count": 0, "risk": 3.0, "functions_classes": [{"name": "f"}]},
+        "b.py": {"loc": 5, "imports": [], "imported_by": [], "imports_count": 0,
+                 "imported_by_count": 1, "risk": 3.5, "functions_classes": []},
+    },
+    "edges": [{"source": "a.py", "target": "b.py"}],
+    "top_10_risky": [{"file": "b.py", "risk": 3.5, "functions_classes": []}],
+}
+
+
+def test_views_and_fields():
+    assert encoding.select(RESULT) is RESULT
+
+    graph = encoding.select(RESULT, "graph")
+    assert graph["nodes"]["a.py"] == {"loc": 10, "imports_count": 1, "imported_by_count": 0, "risk": 3.0}
+    assert graph["edges"] == RESULT["edges"]
+    assert "functions_classes" not in graph["top_10_risky"][0]
+
+    summary = encoding.select(RESULT, "summary")
+    assert "nodes" not in summary and "edges" not in summary
+    assert summary["total_files"] == 2
+
+    fields = encoding.parse_fields("risk,loc", encoding.DETAILED_NODE_FIELDS)
+    assert encoding.select(RESULT, "full", fields)["nodes"]["b.py"] == {"risk": 3.5, "loc": 5}
+    with pytest.raises(ValueError):
+        encoding.parse_fields("loc,owner", encoding.DETAILED_NODE_FIELDS)
+    # Trimming never touches the (possibly cached) original
+    assert "functions_classes" in RESULT["nodes"]["a.py"]
+
+
+def test_dumps_without_orjson_is_equivalent(monkeypatch):
+    fast = encoding.dumps(RESULT)
+    monkeypatch.setattr(encoding, "orjson", None)
+    assert json.loads(encoding.dumps(RESULT)) == json.loads(fast) == RESULT
+
+
+def test_msgpack_negotiation():
+    msgpack = pytest.importorskip("msgpack")
+
+    assert encoding.negotiate(None) == encoding.JSON_MEDIA_TYPE
+    assert encoding.negotiate("application/json, application/msgpack") == encoding.JSON_MEDIA_TYPE
+    assert encoding.negotiate("application/msgpack, application/json") == "application/msgpack"
+    assert encoding.negotiate("application/msgpack, */*") == "application/msgpack"
+    assert encoding.negotiate("application/json;q=0.5, application/msgpack") == "application/msgpack"
+    assert encoding.negotiate("application/x-msgpack;q=0") == encoding.JSON_MEDIA_TYPE
+
+    body = encoding.encode(RESULT, "application/msgpack")
+    assert msgpack.unpackb(body, raw=False) == RESULT
@@ -0,0 +1,47 @@
+import csv
+import io
+import zipfile
+
+import pytest
+
+from app import export, main, repo_store, sqlite_store
+
+
+@pytest.fixture(scope="module")
+def stored(tmp_path_factory, sample_repo):
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(sqlite_store, "DB_PATH", str(tmp_path_factory.mktemp("db") / "legacymap.db"))
+        result = main.analyze_directory_detailed(sample_repo)
+        yield result, repo_store.get(result["repo_id"])
+    repo_store.clear()
+
+
+def _read_csv(repo, table):
+    text = b"".join(export.iter_csv(*export.columns(repo, table))).decode()
+    return list(csv.DictReader(io.StringIO(text)))
+
+
+def test_csv_tables_use_stable_node_ids(stored):
+    result, repo = stored
+    nodes = _read_csv(repo, "nodes")
+    path_of = {row["node_id"]: row["path"] for row in nodes}
+
+    assert set(path_of.values()) == set(result["nodes"])
+    edges = {(path_of[r["source_id"]], path_of[r["target_id"]]) for r in _read_csv(repo, "edges")}
+    assert edges == {(e["source"], e["target"]) for e in result["edges"]}
+    for row in _read_csv(repo, "functions"):
+        names = [item["name"] for item in result["nodes"][path_of[row["node_id"]]]["functions_classes"]]
+        assert row["name"] in names
+
+
+def test_zip_and_parquet(stored):
+    _, repo = stored
+    buf = io.BytesIO()
+    export.write_zip(repo, buf)
+    assert zipfile.ZipFile(buf).namelist() == [f"{t}.csv" for t in export.TABLES]
+
+    pq = pytest.importorskip("pyarrow.parquet")
+    names, cols = export.columns(repo, "calls")
+    table = pq.read_table(io.BytesIO(export.parquet_bytes(names, cols)))
+    assert table.column_names == names
+    assert table.num_rows == len(cols[0])
@@ -0,0 +1,78 @@
+from app.function_extractor import (
+    extract_functions_and_classes_from_lines,
+    extract_with_regex,
+    find_function_dependencies_in_lines,
+)
+
+PYTHON_SOURCE = '''import functools
+
+
+class Repo:
+    @property
+    def name(self):
+        return "repo"
+
+    async def load(self):
+        def helper():
+            return fetch()
+        return helper()
+
+
+@functools.lru_cache()
+def top_level():
+    return Repo()
+'''
+
+
+def _by_name(items):
+    return {item["name"]: item for item in items}
+
+
+def test_python_ast_spans_nesting_and_flags():
+    items = _by_name(extract_functions_and_classes_from_lines(PYTHON_SOURCE.splitlines(True), "python"))
+
+    assert (items["Repo"]["line_start"], items["Repo"]["line_end"]) == (4, 12)
+    assert items["name"]["type"] == "method" and items["name"]["decorators"] == ["property"]
+    assert items["load"]["is_async"] and items["load"]["parent_class"] == "Repo"
+    assert items["helper"]["parent"] == "Repo.load" and items["helper"]["parent_class"] is None
+    assert items["helper"]["depth"] == 2
+    # Top-level function after a class is not attributed to it
+    assert items["top_level"]["parent_class"] is None
+    assert items["top_level"]["decorators"] == ["functools.lru_cache"]
+
+
+def test_python_syntax_error_falls_back_to_regex():
+    lines = (PYTHON_SOURCE + "def broken(:\n").splitlines(True)
+    items = _by_name(extract_functions_and_classes_from_lines(lines, "python"))
+
+    assert items["load"]["parent_class"] == "Repo"
+    assert items["top_level"]["parent_class"] is None
+    assert (items["Repo"]["line_start"], items["Repo"]["line_end"]) == (4, 12)
+
+
+def test_regex_class_scope_ends_with_its_braces():
+    lines = [
+        "class Service {\n",
+        "  run(input) {\n",
+        "    return work(input);\n",
+        "  }\n",
+        "}\n",
+        "\n",
+        "function standalone() {\n",
+        "  return 1;\n",
+        "}\n",
+    ]
+    items = _by_name(extract_with_regex(lines, "javascript"))
+
+    assert (items["Service"]["line_start"], items["Service"]["line_end"]) == (1, 5)
+    assert (items["run"]["line_end"], items["run"]["parent_class"]) == (4, "Service")
+    assert items["standalone"]["parent_class"] is None
+    assert items["standalone"]["line_end"] == 9
+
+
+def test_dependencies_sliced_by_span():
+    lines = PYTHON_SOURCE.splitlines(True)
+    load = _by_name(extract_functions_and_classes_from_lines(lines, "python"))["load"]
+
+    deps = find_function_dependencies_in_lines(lines, "load", load["line_start"], load["line_end"])
+    assert [(d["name"], d["line"]) for d in deps] == [("helper", 10), ("fetch", 11), ("helper", 12)]
@@ -0,0 +1,91 @@
+import random
+
+from app import graph as graph_module
+from app.graph import Reachability, build_graph
+
+
+def _reachable(adj, start):
+    seen, todo = {start}, [start]
+    while todo:
+        for w in adj[todo.pop()]:
+            if w not in seen:
+                seen.add(w)
+                todo.append(w)
+    return seen
+
+
+def test_scc_matches_mutual_reachability():
+    rng = random.Random(7)
+    for _ in range(30):
+        n = rng.randint(1, 25)
+        paths = [f"f{i}.js" for i in range(n)]
+        pairs = [(rng.choice(paths), rng.choice(paths)) for _ in range(rng.randint(0, 3 * n))]
+        graph = build_graph(paths, pairs)
+
+        adj = {i: [] for i in range(n)}
+        for a, b in pairs:
+            adj[graph.ids[a]].append(graph.ids[b])
+        reach = {i: _reachable(adj, i) for i in range(n)}
+        expected = {frozenset(j for j in range(n) if j in reach[i] and i in reach[j]) for i in range(n)}
+
+        comps = graph.strongly_connected_components()
+        assert {frozenset(c) for c in comps} == expected
+        assert sum(len(c) for c in comps) == n
+
+
+def test_csr_degrees_and_edge_order():
+    graph = build_graph(["a", "b", "c"], [("a", "c"), ("b", "c"), ("a", "b"), ("a", "c")])
+
+    assert list(graph.edges()) == [(0, 2), (0, 1), (0, 2), (1, 2)]
+    assert [graph.out_degree(i) for i in range(3)] == [3, 1, 0]
+    assert [graph.in_degree(i) for i in range(3)] == [0, 1, 3]
+    assert sorted(graph.predecessors(2)) == [0, 0, 1]
+
+
+def test_scc_handles_long_chains_without_recursion():
+    n = 50000
+    paths = [str(i) for i in range(n)]
+    pairs = [(paths[i], paths[i + 1]) for i in range(n - 1)] + [(paths[-1], paths[0])]
+
+    comps = build_graph(paths, pairs).strongly_connected_components()
+    assert len(comps) == 1 and len(comps[0]) == n
+
+
+def test_reachability_matches_bfs():
+    rng = random.Random(11)
+    for _ in range(30):
+        n = rng.randint(1, 25)
+        paths = [f"f{i}.js" for i in range(n)]
+        pairs = [(rng.choice(paths), rng.choice(paths)) for _ in range(rng.randint(0, 2 * n))]
+        graph = build_graph(paths, pairs)
+        reach = Reachability(graph)
+
+        fwd = {i: [] for i in range(n)}
+        rev = {i: [] for i in range(n)}
+        for a, b in pairs:
+            fwd[graph.ids[a]].append(graph.ids[b])
+            rev[graph.ids[b]].append(graph.ids[a])
+        for i in range(n):
+            assert set(reach.dependencies(i)) == _reachable(fwd, i) - {i}
+            assert set(reach.dependents(i)) == _reachable(rev, i) - {i}
+            assert set(reach.dependencies(i, max_depth=n)) == _reachable(fwd, i) - {i}
+            assert set(reach.dependencies(i, max_depth=1)) == set(fwd[i]) - {i}
+
+
+def test_reachability_without_bitsets(monkeypatch):
+    monkeypatch.setattr(graph_module, "REACH_BITSET_MAX", 0)
+    graph = build_graph(["a", "b", "c", "d"], [("a", "b"), ("b", "c"), ("c", "b"), ("c", "d")])
+    reach = Reachability(graph)
+
+    assert sorted(reach.dependents(3)) == [0, 1, 2]
+    assert sorted(reach.dependencies(0)) == [1, 2, 3]
+
+
+def test_reachability_cycle():
+    graph = build_graph(["a", "b", "c", "d"], [("a", "b"), ("b", "c"), ("c", "b"), ("c", "d")])
+    reach = Reachability(graph)
+
+    assert reach.cycle(1) == [2]
+    assert sorted(reach.dependents(3)) == [0, 1, 2]
+    assert sorted(reach.dependencies(0)) == [1, 2, 3]
+    assert reach.dependents(0) == []
@@ -1,6 +1,8 @@
 
 import httpx
+import json
 import os
+import time
 import pytest
 
 BASE_URL = "http://localhost:8000"
@@ -43,3 +45,332 @@ def test_upload_analyze_zip():
     assert data["status"] == "success"
     assert "repo_id" in data
     assert "nodes" in data
+
+def test_upload_zip_in_archive_matches_extracted():
+    file_path = "test_repo.zip"
+    if not os.path.exists(file_path):
+        pytest.skip(f"{file_path} not found")
+
+    results = []
+    for params in ({}, {"in_archive": "true"}):
+        with open(file_path, "rb") as f:
+            files = {"file": ("test_repo.zip", f, "application/zip")}
+            response = httpx.post(f"{BASE_URL}/upload", files=files, params=params)
+        assert response.status_code == 200
+        results.append(response.json())
+
+    extracted, in_archive = results
+    assert in_archive["summary"] == extracted["summary"]
+    assert in_archive["nodes"] == extracted["nodes"]
+    assert len(in_archive["edges"]) == len(extracted["edges"])
+
+def test_upload_analyze_edges_match_upload():
+    file_path = "test_repo.zip"
+    if not os.path.exists(file_path):
+        pytest.skip(f"{file_path} not found")
+
+    with open(file_path, "rb") as f:
+        files = {"file": ("test_repo.zip", f, "application/zip")}
+        upload = httpx.post(f"{BASE_URL}/upload", files=files).json()
+    with open(file_path, "rb") as f:
+        files = {"file": ("test_repo.zip", f, "application/zip")}
+        analyze = httpx.post(f"{BASE_URL}/upload-analyze", files=files).json()
+
+    upload_edges = {(e["from"], e["to"]) for e in upload["edges"]}
+    analyze_edges = {(e["source"], e["target"]) for e in analyze["edges"]}
+    assert analyze_edges == upload_edges
+    assert analyze["total_edges"] == len(analyze_edges)
+
+def test_analysis_job_matches_upload():
+    file_path = "test_repo.zip"
+    if not os.path.exists(file_path):
+        pytest.skip(f"{file_path} not found")
+
+    with open(file_path, "rb") as f:
+        files = {"file": ("test_repo.zip", f, "application/zip")}
+        response = httpx.post(f"{BASE_URL}/jobs", files=files, params={"kind": "upload"})
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    for _ in range(100):
+        job = httpx.get(f"{BASE_URL}/jobs/{job_id}").json()
+        if job["status"] in ("done", "failed"):
+            break
+        time.sleep(0.1)
+    assert job["status"] == "done"
+
+    with open(file_path, "rb") as f:
+        files = {"file": ("test_repo.zip", f, "application/zip")}
+        upload = httpx.post(f"{BASE_URL}/upload", files=files).json()
+    assert job["result"]["summary"] == upload["summary"]
+    assert job["result"]["nodes"] == upload["nodes"]
+
+def test_unknown_job_is_404():
+    response = httpx.get(f"{BASE_URL}/jobs/does-not-exist")
+    assert response.status_code == 404
+
+def test_repeated_upload_hits_result_cache():
+    file_path = "test_repo.zip"
+    if not os.path.exists(file_path):
+        pytest.skip(f"{file_path} not found")
+
+    responses = []
+    for _ in range(2):
+        with open(file_path, "rb") as f:
+            files = {"file": ("test_repo.zip", f, "application/zip")}
+            responses.append(httpx.post(f"{BASE_URL}/upload", files=files))
+
+    first, second = responses
+    if second.headers["X-LegacyMap-Cache"] == "BYPASS":
+        pytest.skip("result cache disabled on server")
+    assert second.headers["X-LegacyMap-Cache"] == "HIT"
+    assert second.json() == first.json()
+
+def test_incremental_reanalysis_of_unchanged_upload_reuses_everything():
+    file_path = "test_repo.zip"
+    if not os.path.exists(file_path):
+        pytest.skip(f"{file_path} not found")
+
+    with open(file_path, "rb") as f:
+        files = {"file": ("test_repo.zip", f, "application/zip")}
+        base = httpx.post(f"{BASE_URL}/upload-analyze", files=files).json()
+    with open(file_path, "rb") as f:
+        files = {"file": ("test_repo.zip", f, "application/zip")}
+        response = httpx.post(f"{BASE_URL}/upload-analyze/{base['repo_id']}/incremental", files=files)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["base_repo_id"] == base["repo_id"]
+    assert data["repo_id"] != base["repo_id"]
+    assert data["changes"]["added"] == []
+    assert data["changes"]["changed"] == []
+    assert data["changes"]["removed"] == []
+    assert data["changes"]["reused"] == base["total_files"]
+    assert data["nodes"] == base["nodes"]
+
+def test_incremental_reanalysis_tracks_added_changed_and_removed_files(sample_repo, sample_repo_zip):
+    base = httpx.post(f"{BASE_URL}/upload-analyze", files={"file": ("repo.zip", sample_repo_zip())}).json()
+    with open(os.path.join(sample_repo, "utils", "validator.js")) as f:
+        validator = f.read()
+    snapshot = sample_repo_zip({
+        "utils/cache.js": "const logger = require('./logger');\n",
+        "utils/validator.js": validator + "\nconst db = require('./database');\n",
+        "models/Order.js": None,
+    })
+
+    response = httpx.post(f"{BASE_URL}/upload-analyze/{base['repo_id']}/incremental",
+                          files={"file": ("repo.zip", snapshot)})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["changes"]["added"] == ["utils/cache.js"]
+    assert data["changes"]["changed"] == ["utils/validator.js"]
+    assert data["changes"]["removed"] == ["models/Order.js"]
+    assert data["changes"]["reused"] == base["total_files"] - 2
+
+    edges = {(e["source"], e["target"]) for e in data["edges"]}
+    assert ("utils/cache.js", "utils/logger.js") in edges
+    assert ("utils/validator.js", "utils/database.js") in edges
+    assert ("utils/validator.js", "utils/database.js") not in {(e["source"], e["target"]) for e in base["edges"]}
+    assert not any("models/Order.js" in edge for edge in edges)
+
+    # Same graph as analyzing the snapshot from scratch
+    full = httpx.post(f"{BASE_URL}/upload-analyze", files={"file": ("repo.zip", snapshot)}).json()
+    assert data["nodes"] == full["nodes"]
+    assert edges == {(e["source"], e["target"]) for e in full["edges"]}
+
+def test_incremental_reanalysis_rejects_non_zip(sample_repo_zip):
+    base = httpx.post(f"{BASE_URL}/upload-analyze", files={"file": ("repo.zip", sample_repo_zip())}).json()
+    response = httpx.post(f"{BASE_URL}/upload-analyze/{base['repo_id']}/incremental",
+                          files={"file": ("repo.tar", b"not a zip")})
+    assert response.status_code == 400
+
+def test_repo_store_stats():
+    response = httpx.get(f"{BASE_URL}/repo-store/stats")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["entries"] <= data["max_entries"]
+    assert data["bytes"] <= data["max_bytes"]
+
+def test_function_details_from_symbol_index():
+    file_path = "test_repo.zip"
+    if not os.path.exists(file_path):
+        pytest.skip(f"{file_path} not found")
+
+    with open(file_path, "rb") as f:
+        files = {"file": ("test_repo.zip", f, "application/zip")}
+        data = httpx.post(f"{BASE_URL}/upload-analyze", files=files).json()
+
+    symbol = next(
+        ((path, item["name"]) for path, node in data["nodes"].items() for item in node["functions_classes"]),
+        None,
+    )
+    if symbol is None:
+        pytest.skip("no functions found in test repo")
+
+    response = httpx.get(
+        f"{BASE_URL}/function-details/{data['repo_id']}",
+        params={"file_path": symbol[0], "function_name": symbol[1]},
+    )
+    assert response.status_code == 200
+    table = response.json()["call_sites_table"]
+    assert table["count"] == len(table["rows"])
+    for row in table["rows"]:
+        assert row["file"] in data["nodes"]
+
+def test_function_details_batch_matches_single_requests():
+    file_path = "test_repo.zip"
+    if not os.path.exists(file_path):
+        pytest.skip(f"{file_path} not found")
+
+    with open(file_path, "rb") as f:
+        files = {"file": ("test_repo.zip", f, "application/zip")}
+        data = httpx.post(f"{BASE_URL}/upload-analyze", files=files).json()
+
+    symbols = [
+        {"file_path": path, "function_name": item["name"]}
+        for path, node in data["nodes"].items()
+        for item in node["functions_classes"]
+    ][:20]
+    symbols.append({"file_path": "missing/file.js", "function_name": "nope"})
+
+    response = httpx.post(f"{BASE_URL}/function-details/{data['repo_id']}/batch", json={"symbols": symbols})
+    assert response.status_code == 200
+    batch = response.json()
+    assert batch["count"] == len(symbols)
+    assert batch["results"][-1]["status"] == "error"
+
+    for symbol, result in zip(symbols[:-1], batch["results"]):
+        single = httpx.get(f"{BASE_URL}/function-details/{data['repo_id']}", params=symbol).json()
+        assert result == single
+
+def test_upload_ndjson_stream():
+    file_path = "test_repo.zip"
+    if not os.path.exists(file_path):
+        pytest.skip(f"{file_path} not found")
+
+    with open(file_path, "rb") as f:
+        files = {"file": ("test_repo.zip", f, "application/zip")}
+        response = httpx.post(f"{BASE_URL}/upload", files=files, params={"format": "ndjson"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events[0]["type"] == "summary"
+    nodes = [e for e in events if e["type"] == "node"]
+    assert len(nodes) == events[0]["total_files"]
+
+def test_paginated_repo_nodes_and_edges():
+    file_path = "test_repo.zip"
+    if not os.path.exists(file_path):
+        pytest.skip(f"{file_path} not found")
+
+    with open(file_path, "rb") as f:
+        files = {"file": ("test_repo.zip", f, "application/zip")}
+        data = httpx.post(f"{BASE_URL}/upload-analyze", files=files).json()
+
+    for kind, expected in (("nodes", data["total_files"]), ("edges", data["total_edges"])):
+        items, cursor = [], None
+        while True:
+            params = {"limit": 5}
+            if cursor:
+                params["cursor"] = cursor
+            page = httpx.get(f"{BASE_URL}/repos/{data['repo_id']}/{kind}", params=params).json()
+            items.extend(page["items"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert len(items) == expected
+
+    paged_nodes = httpx.get(f"{BASE_URL}/repos/{data['repo_id']}/nodes", params={"limit": 10000}).json()["items"]
+    assert {n["path"] for n in paged_nodes} == set(data["nodes"])
+
+def test_call_graph_summary_and_pages():
+    file_path = "test_repo.zip"
+    if not os.path.exists(file_path):
+        pytest.skip(f"{file_path} not found")
+
+    with open(file_path, "rb") as f:
+        files = {"file": ("test_repo.zip", f, "application/zip")}
+        data = httpx.post(f"{BASE_URL}/upload-analyze", files=files).json()
+
+    summary = httpx.get(f"{BASE_URL}/repos/{data['repo_id']}/call-graph").json()
+    assert summary["total_functions"] > 0
+    functions = httpx.get(f"{BASE_URL}/repos/{data['repo_id']}/functions", params={"limit": 100000}).json()
+    calls = httpx.get(f"{BASE_URL}/repos/{data['repo_id']}/calls", params={"limit": 100000}).json()
+    assert functions["total"] == summary["total_functions"]
+    assert calls["total"] == summary["total_calls"]
+    assert sum(f["fan_in"] for f in functions["items"]) == calls["total"]
+
+
+def test_impact_of_imported_file():
+    file_path = "test_repo.zip"
+    if not os.path.exists(file_path):
+        pytest.skip(f"{file_path} not found")
+
+    with open(file_path, "rb") as f:
+        files = {"file": ("test_repo.zip", f, "application/zip")}
+        data = httpx.post(f"{BASE_URL}/upload-analyze", files=files).json()
+
+    target = max(data["nodes"], key=lambda p: data["nodes"][p]["imported_by_count"])
+    url = f"{BASE_URL}/repos/{data['repo_id']}/impact"
+    full = httpx.get(url, params={"file_path": target}).json()
+    direct = httpx.get(url, params={"file_path": target, "max_depth": 1}).json()
+
+    importers = {e["source"] for e in data["edges"] if e["target"] == target} - {target}
+    assert set(direct["dependents"]) == importers
+    assert set(direct["dependents"]) <= set(full["dependents"])
+    assert httpx.get(url, params={"file_path": "missing.js"}).status_code == 404
+
+
+def test_upload_views_and_gzip():
+    file_path = "test_repo.zip"
+    if not os.path.exists(file_path):
+        pytest.skip(f"{file_path} not found")
+
+    with open(file_path, "rb") as f:
+        files = {"file": ("test_repo.zip", f, "application/zip")}
+        full = httpx.post(f"{BASE_URL}/upload-analyze", files=files, headers={"Accept-Encoding": "gzip"})
+    with open(file_path, "rb") as f:
+        files = {"file": ("test_repo.zip", f, "application/zip")}
+        summary = httpx.post(f"{BASE_URL}/upload-analyze", files=files, params={"view": "summary"}).json()
+
+    assert full.headers["content-encoding"] == "gzip"
+    assert "nodes" not in summary and "edges" not in summary
+    assert summary["total_files"] == full.json()["total_files"]
+
+
+def test_analyze_local_disabled_by_default():
+    response = httpx.post(f"{BASE_URL}/analyze-local", params={"path": "sample_repo"})
+    assert response.status_code == 403
+
+def test_upload_timings_and_metrics():
+    file_path = "test_repo.zip"
+    if not os.path.exists(file_path):
+        pytest.skip(f"{file_path} not found")
+
+    with open(file_path, "rb") as f:
+        files = {"file": ("test_repo.zip", f, "application/zip")}
+        response = httpx.post(f"{BASE_URL}/upload-analyze", files=files, params={"timings": "true"})
+    assert response.status_code == 200
+    timings = response.json()["timings"]
+    assert "scan" in timings["stages"]
+    assert timings["files"] == response.json()["total_files"]
+
+    metrics = httpx.get(f"{BASE_URL}/metrics")
+    assert metrics.status_code == 200
+    assert 'legacymap_request_duration_seconds_count{method="POST",endpoint="/upload-analyze",status="200"}' in metrics.text
+    assert 'legacymap_stage_duration_seconds_count{endpoint="/upload-analyze",stage="scan"}' in metrics.text
+
+def test_upload_ndjson_timings():
+    file_path = "test_repo.zip"
+    if not os.path.exists(file_path):
+        pytest.skip(f"{file_path} not found")
+
+    with open(file_path, "rb") as f:
+        files = {"file": ("test_repo.zip", f, "application/zip")}
+        response = httpx.post(f"{BASE_URL}/upload", files=files, params={"format": "ndjson", "timings": "true"})
+    assert response.status_code == 200
+
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events[0]["type"] == "summary"
+    assert events[0]["timings"]["stages"]
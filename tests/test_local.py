@@ -0,0 +1,41 @@
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from app import main
+
+
+def test_local_directory_matches_zip_upload(tmp_path, sample_repo, sample_repo_zip):
+    zip_path = tmp_path / "sample_repo.zip"
+    zip_path.write_bytes(sample_repo_zip())
+
+    assert main.analyze_directory(sample_repo) == main.analyze_zip(str(zip_path))
+
+
+def test_local_path_allow_list(monkeypatch, tmp_path, sample_repo):
+    monkeypatch.setattr(main, "LOCAL_ROOTS", [])
+    with pytest.raises(HTTPException) as exc:
+        main.resolve_local_path(sample_repo)
+    assert exc.value.status_code == 403
+
+    monkeypatch.setattr(main, "LOCAL_ROOTS", [os.path.dirname(sample_repo)])
+    assert main.resolve_local_path(sample_repo) == sample_repo
+    with pytest.raises(HTTPException) as exc:
+        main.resolve_local_path(os.path.join(sample_repo, "..", "..", ".."))
+    assert exc.value.status_code == 403
+    with pytest.raises(HTTPException) as exc:
+        main.resolve_local_path(os.path.join(sample_repo, "missing"))
+    assert exc.value.status_code == 404
+
+
+def test_names_from_one_module_count_as_one_import(tmp_path):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "__init__.py").write_text("def x(): pass\ndef y(): pass\n")
+    (tmp_path / "app.py").write_text("from pkg import x, y\nfrom os import path, walk\n")
+
+    result = main.analyze_directory(str(tmp_path))
+    node = result["nodes"]["app.py"]
+    assert node["imports"] == ["pkg/__init__.py", "os"]
+    assert node["imports_count"] == 2  # /upload counts external packages too
+    assert result["edges"] == [{"from": "app.py", "to": "pkg/__init__.py"}]
@@ -0,0 +1,40 @@
+from app import metrics
+
+
+def test_stages_and_counters_recorded_for_current_analysis():
+    def work():
+        with metrics.stage("scan"):
+            metrics.count("files", 3)
+        stopwatch = metrics.Stopwatch()
+        stopwatch.lap("graph_build")
+        return "done"
+
+    result, timings = metrics.collect("/test-endpoint", work)
+
+    assert result == "done"
+    report = timings.as_dict()
+    assert set(report["stages"]) == {"scan", "graph_build"}
+    assert report["files"] == 3
+
+    text = metrics.render()
+    assert 'legacymap_stage_duration_seconds_count{endpoint="/test-endpoint",stage="scan"} 1' in text
+    assert 'legacymap_analyzed_total{endpoint="/test-endpoint",kind="files"} 3' in text
+
+
+def test_stage_outside_collect_is_a_no_op():
+    with metrics.stage("scan"):
+        pass
+    metrics.count("files", 1)
+
+
+def test_histogram_buckets_are_cumulative():
+    hist = metrics.Histogram("h_seconds", "test", ("endpoint",), buckets=(0.1, 1.0))
+    hist.observe(("/a",), 0.05)
+    hist.observe(("/a",), 0.5)
+    hist.observe(("/a",), 5.0)
+
+    lines = hist.render()
+    assert 'h_seconds_bucket{endpoint="/a",le="0.1"} 1' in lines
+    assert 'h_seconds_bucket{endpoint="/a",le="1.0"} 2' in lines
+    assert 'h_seconds_bucket{endpoint="/a",le="+Inf"} 3' in lines
+    assert 'h_seconds_count{endpoint="/a"} 3' in lines
@@ -0,0 +1,62 @@
+import os
+import tempfile
+
+import pytest
+
+from app import main, repo_store
+
+
+def _make_repo(nbytes):
+    root = tempfile.mkdtemp(prefix="legacymap_test_")
+    with open(os.path.join(root, "a.js"), "w") as f:
+        f.write("x" * nbytes)
+    return root
+
+
+def test_lru_eviction_by_count_cleans_up_tree(monkeypatch):
+    monkeypatch.setattr(repo_store, "MAX_ENTRIES", 2)
+    repo_store.clear()
+    roots = [_make_repo(10) for _ in range(3)]
+
+    repo_store.add("r0", roots[0], [])
+    repo_store.add("r1", roots[1], [])
+    repo_store.get("r0")  # r1 is now least recently used
+    repo_store.add("r2", roots[2], [])
+
+    assert repo_store.get("r1") is None
+    assert not os.path.exists(roots[1])
+    assert repo_store.get("r0") is not None
+    assert repo_store.stats()["entries"] == 2
+    repo_store.clear()
+
+
+def test_byte_quota_and_ttl(monkeypatch):
+    monkeypatch.setattr(repo_store, "MAX_BYTES", 150)
+    repo_store.clear()
+
+    repo_store.add("big0", _make_repo(100), [])
+    repo_store.add("big1", _make_repo(100), [])
+    assert repo_store.get("big0") is None
+    assert repo_store.stats()["bytes"] == 100
+
+    monkeypatch.setattr(repo_store, "TTL_SECONDS", -1)
+    assert repo_store.get("big1") is None
+    assert repo_store.stats()["entries"] == 0
+
+
+@pytest.mark.parametrize("in_archive", [False, True])
+def test_failed_analysis_removes_extracted_tree(monkeypatch, tmp_path, in_archive, sample_repo_zip):
+    zip_path = tmp_path / "sample_repo.zip"
+    zip_path.write_bytes(sample_repo_zip())
+    scratch = tmp_path / "scratch"
+    scratch.mkdir()
+    monkeypatch.setattr(tempfile, "tempdir", str(scratch))
+
+    def fail(*args):
+        raise RuntimeError("analysis failed")
+
+    monkeypatch.setattr(main, "_detailed_result", fail)
+    with pytest.raises(RuntimeError):
+        main.analyze_zip_detailed(str(zip_path), in_archive=in_archive)
+    assert os.listdir(scratch) == []
+
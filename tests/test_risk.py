@@ -0,0 +1,73 @@
+import random
+
+import pytest
+
+from app import risk
+from app.graph import build_graph
+
+
+def _random_graph(n, m, seed):
+    rng = random.Random(seed)
+    paths = [f"f{i}.js" for i in range(n)]
+    return build_graph(paths, [(rng.choice(paths), rng.choice(paths)) for _ in range(m)])
+
+
+def test_default_weights_match_original_formula():
+    graph = _random_graph(40, 90, 3)
+    loc = [random.Random(i).randint(0, 500) for i in range(40)]
+    imports = [graph.out_degree(i) for i in range(40)]
+
+    scores = risk.score(graph, loc, imports, risk.DEFAULT_WEIGHTS)
+    expected = [round(loc[i] / 10.0 + graph.in_degree(i) * 3.0 + imports[i] * 2.0, 2) for i in range(40)]
+    assert scores == expected
+
+
+def test_top_k_matches_stable_sort():
+    scores = [float(random.Random(i).randint(0, 5)) for i in range(200)]
+    expected = sorted(range(200), key=lambda i: scores[i], reverse=True)
+    for k in (0, 1, 7, 50, 200, 500):
+        assert risk.top_k(scores, k) == expected[:k]
+
+
+def test_python_fallback_matches_numpy(monkeypatch):
+    pytest.importorskip("numpy")
+    graph = _random_graph(60, 150, 5)
+    loc = list(range(60))
+    imports = [graph.out_degree(i) for i in range(60)]
+    weights = risk.parse_weights("pagerank=7,betweenness=50,in_cycle=4")
+
+    with_numpy = risk.score(graph, loc, imports, weights)
+    monkeypatch.setattr(risk, "np", None)
+    assert risk.score(graph, loc, imports, weights) == pytest.approx(with_numpy, abs=0.011)
+
+
+def test_pagerank_and_betweenness():
+    # a -> b -> c: b sits on the only a..c path; rank collects at c
+    graph = build_graph(["a", "b", "c"], [("a", "b"), ("b", "c")])
+
+    rank = list(risk.pagerank(graph))
+    assert sum(rank) == pytest.approx(3.0)
+    assert rank[2] > rank[1] > rank[0]
+    assert risk.betweenness(graph) == [0.0, 0.5, 0.0]
+
+
+def test_betweenness_levels_match_brandes_and_are_bounded(monkeypatch):
+    pytest.importorskip("numpy")
+    graph = _random_graph(400, 1200, seed=3)
+    vectorized = risk.betweenness(graph, samples=50)
+    monkeypatch.setattr(risk, "np", None)
+    assert risk.betweenness(graph, samples=50) == pytest.approx(vectorized, abs=1e-12)
+
+    monkeypatch.setattr(risk, "BETWEENNESS_MAX_NODES", 100)
+    with pytest.raises(ValueError):
+        risk.check_weights({"betweenness": 1.0}, graph.node_count)
+    risk.check_weights({"pagerank": 1.0}, graph.node_count)
+
+
+def test_parse_weights_rejects_unknown_signal():
+    assert risk.parse_weights("imported_by=5")["imported_by"] == 5.0
+    with pytest.raises(ValueError):
+        risk.parse_weights("popularity=1")
+    for value in ("nan", "inf", "-inf"):
+        with pytest.raises(ValueError):
+            risk.parse_weights(f"loc={value}")
@@ -0,0 +1,109 @@
+from app import scanner
+
+
+def test_js_imports_multiline_dynamic_and_reexports():
+    text = (
+        "import a from './a';\n"
+        "import {\n  b,\n  c,\n} from \"../b\";\n"
+        "import './side-effect';\n"
+        "export * from './reexported';\n"
+        "const d = require('./d'); const e = require('e/lib');\n"
+        "// important: not an import\n"
+        "async function lazy() { return import('./lazy'); }\n"
+    )
+    assert scanner.extract_imports_from_text(text, "javascript") == [
+        "./a", "../b", "./side-effect", "./reexported", "./d", "e/lib", "./lazy",
+    ]
+
+
+def test_js_lexer_matches_per_line_extractor():
+    lines = [
+        "import x from './x';\n",
+        "const y = require('./y');\n",
+        "require('./z');\n",
+        "function f() {}\n",
+    ]
+    assert scanner.extract_imports(lines) == scanner.extract_imports_per_line(lines)
+
+
+def test_python_imports():
+    text = (
+        "import os, pkg.sub.mod as m\n"
+        "from . import a, b as bb\n"
+        "from .. import (\n    c,\n    d,\n)\n"
+        "from .x.y import z\n"
+        "from pkg.util import helper\n"
+        "from pkg import util, other as o\n"
+        "from pkg.star import *\n"
+        "from pkg.cont import first, \\\n    second\n"
+        "plugin = importlib.import_module('plugins.foo')\n"
+    )
+    assert scanner.extract_imports_from_text(text, "python") == [
+        "os", "pkg.sub.mod", "./a", "./b", "../c", "../d", "./x/y", "pkg.util.helper",
+        "pkg.util", "pkg.other", "pkg.star", "pkg.cont.first", "pkg.cont.second", "plugins.foo",
+    ]
+
+
+def test_java_imports():
+    text = (
+        "package com.acme.app;\n\n"
+        "import com.acme.model.User;\n"
+        "import static com.acme.util.Strings.trim;\n"
+        "import com.acme.repo.*;\n"
+    )
+    assert scanner.extract_imports_from_text(text, "java") == [
+        "com.acme.model.User", "com.acme.util.Strings", "com.acme.repo",
+    ]
+
+
+def test_resolver_finds_dotted_modules():
+    known = {
+        "pkg/__init__.py",
+        "pkg/util.py",
+        "app/main.py",
+        "src/main/java/com/acme/model/User.java",
+        "src/main/java/com/acme/app/App.java",
+    }
+    resolve = scanner.make_import_resolver(known, "/repo")
+
+    assert resolve("pkg.util", "app/main.py") == "pkg/util.py"
+    assert resolve("pkg", "app/main.py") == "pkg/__init__.py"
+    assert resolve("os", "app/main.py") == "os"
+    assert resolve("com.acme.model.User", "src/main/java/com/acme/app/App.java") == "src/main/java/com/acme/model/User.java"
+    assert resolve("java.util", "src/main/java/com/acme/app/App.java") == "java"
+    assert resolve("../pkg/util", "app/main.py") == "pkg/util.py"
+
+
+def test_from_import_names_resolve_to_submodules_or_the_package():
+    known = {"pkg/__init__.py", "pkg/util.py", "ns/tool.py", "app/main.py"}
+    resolve = scanner.make_import_resolver(known, "/repo")
+
+    # from pkg import util, helper / from ns import tool (namespace package, no __init__)
+    assert resolve("pkg.util", "app/main.py") == "pkg/util.py"
+    assert resolve("pkg.helper", "app/main.py") == "pkg/__init__.py"
+    assert resolve("pkg.util.helper", "app/main.py") == "pkg/util.py"
+    assert resolve("ns.tool", "app/main.py") == "ns/tool.py"
+    assert resolve("typing.List", "app/main.py") == "typing"
+
+
+def test_python_module_names_need_a_real_package_path():
+    known = {"app/logging.py", "app/json/__init__.py", "tools/x.py", "tools/helpers.py",
+             "src/pkg/__init__.py", "src/pkg/mod.py", "lib/config.py", "lib/a.js", "lib/b.py"}
+    resolve = scanner.make_import_resolver(known, "/repo")
+
+    # Repo files named like stdlib modules aren't what an unrelated directory imports
+    assert resolve("logging", "tools/x.py") == "logging"
+    assert resolve("json", "tools/x.py") == "json"
+    assert resolve("app.logging", "tools/x.py") == "app/logging.py"
+    # Sibling module; dotted names below a source root
+    assert resolve("helpers", "tools/x.py") == "tools/helpers.py"
+    assert resolve("pkg.mod", "tools/x.py") == "src/pkg/mod.py"
+    assert resolve("pkg.mod.func", "tools/x.py") == "src/pkg/mod.py"
+
+
+def test_resolver_cache_is_per_language():
+    known = {"lib/config.py", "lib/a.js", "lib/b.py"}
+    resolve = scanner.make_import_resolver(known, "/repo")
+
+    assert resolve("config", "lib/a.js") == "config"
+    assert resolve("config", "lib/b.py") == "lib/config.py"
@@ -0,0 +1,119 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from app import jobs, main, repo_store, scanner, sqlite_store
+
+
+@pytest.fixture
+def db(monkeypatch, tmp_path):
+    monkeypatch.setattr(sqlite_store, "DB_PATH", str(tmp_path / "legacymap.db"))
+    yield
+    repo_store.clear()
+
+
+def test_repo_survives_losing_memory(db, sample_repo):
+    result = main.analyze_directory_detailed(sample_repo)
+    repo_id = result["repo_id"]
+    before = repo_store.get(repo_id)
+    graph_before = {k: before["graph"][k] for k in ("nodes", "edges")}
+    calls_before = before["call_graph"]["calls"]
+
+    repo_store.clear()  # what a restart leaves behind
+    restored = main._get_repo(repo_id)
+
+    assert restored["root"] is None
+    assert {k: restored["graph"][k] for k in ("nodes", "edges")} == graph_before
+    assert restored["call_graph"]["calls"] == calls_before
+    assert restored["records"] == before["records"]
+
+
+def test_indexed_symbols_and_sources_match_memory(db, sample_repo):
+    result = main.analyze_directory_detailed(sample_repo)
+    repo_id = result["repo_id"]
+    memory = repo_store.get(repo_id)["symbols"]
+
+    for kind in ("calls", "definitions"):
+        lookup = sqlite_store.SymbolLookup(repo_id, kind)
+        for name, rows in list(memory[kind].items())[:50]:
+            assert lookup.get(name) == rows
+        assert lookup.get("no_such_symbol", []) == []
+
+    path = next(iter(result["nodes"]))
+    assert sqlite_store.source_lines(repo_id, path) == scanner.read_file_lines(os.path.join(sample_repo, path))
+    assert sqlite_store.source_lines(repo_id, "missing.js") is None
+    assert main._get_repo("unknown-repo") is None
+
+
+@pytest.mark.parametrize("limit", ["MAX_REPOS", "MAX_BYTES"])
+def test_oldest_repos_pruned(db, monkeypatch, limit, sample_repo):
+    monkeypatch.setattr(sqlite_store, limit, 1)
+    first = main.analyze_directory_detailed(sample_repo)["repo_id"]
+    second = main.analyze_directory_detailed(sample_repo)["repo_id"]
+
+    assert sqlite_store.load(first) is None
+    assert sqlite_store.load(second) is not None
+
+
+def test_call_sites_stored_once(db, sample_repo):
+    repo_id = main.analyze_directory_detailed(sample_repo)["repo_id"]
+    conn = sqlite_store._connect()
+    assert all('"call_sites"' not in record
+               for (record,) in conn.execute("SELECT record FROM files WHERE repo_id = ?", (repo_id,)))
+    stats = sqlite_store.stats()
+    assert stats["repos"] == 1 and 0 < stats["repo_bytes"] <= stats["max_bytes"]
+
+
+def test_any_process_serves_any_repo(db, sample_repo):
+    # Several "workers" write to one database at once; each repo id is then
+    # served by a process that never saw the upload
+    script = (
+        "import sys; from app import main; "
+        "print(main.analyze_directory_detailed(sys.argv[1])['repo_id'])"
+    )
+    env = dict(os.environ, LEGACYMAP_DB_PATH=sqlite_store.DB_PATH, LEGACYMAP_CACHE_MAX_BYTES="0")
+    root = os.path.dirname(sample_repo)
+    workers = [
+        subprocess.Popen([sys.executable, "-c", script, sample_repo], cwd=root, env=env,
+                         stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        for _ in range(3)
+    ]
+    repo_ids = [w.communicate(timeout=120)[0].split()[-1] for w in workers]
+    assert [w.returncode for w in workers] == [0, 0, 0]
+
+    for repo_id in repo_ids:
+        repo = main._get_repo(repo_id)
+        assert repo is not None and repo["root"] is None
+        assert sqlite_store.source_lines(repo_id, repo["graph"]["nodes"][0]["path"])
+
+
+def test_job_polled_from_another_process(db, monkeypatch):
+    job_id = jobs.submit_job("upload", lambda: {"status": "success", "total_files": 2})["job_id"]
+    for _ in range(100):
+        if jobs.get_job(job_id)["status"] == "done":
+            break
+        time.sleep(0.05)
+
+    monkeypatch.setattr(jobs, "_jobs", {})  # a process that didn't run it
+    job = jobs.get_job(job_id)
+    assert job["status"] == "done" and job["kind"] == "upload"
+    assert job["result"] == {"status": "success", "total_files": 2}
+    assert jobs.get_job("unknown-job") is None
+
+
+def test_worker_count_from_argv_and_env():
+    assert main._worker_count([], {}) == 1
+    assert main._worker_count(["uvicorn", "--workers", "4"], {}) == 4
+    assert main._worker_count(["uvicorn", "--workers=3"], {"WEB_CONCURRENCY": "2"}) == 3
+    assert main._worker_count(["uvicorn"], {"WEB_CONCURRENCY": "2"}) == 2
+    assert main._worker_count(["uvicorn"], {"WEB_CONCURRENCY": "many"}) == 1
+
+
+def test_startup_warns_for_workers_without_database(monkeypatch, capsys):
+    monkeypatch.setattr(sqlite_store, "DB_PATH", "")
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    main.check_workers()
+    assert "LEGACYMAP_DB_PATH" in capsys.readouterr().out